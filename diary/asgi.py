@@ -0,0 +1,15 @@
+"""
+ASGI config for diary project.
+
+SSE(생성 진행 이벤트) 같은 오래 열린 연결을 워커 하나씩 붙잡지 않고 처리하려면 ASGI로 실행:
+    uvicorn diary.asgi:application
+    gunicorn diary.asgi:application -k uvicorn.workers.UvicornWorker
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'diary.settings')
+
+application = get_asgi_application()
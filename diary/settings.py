@@ -11,6 +11,7 @@ from pathlib import Path
 import dj_database_url  # 있으면 사용, 없어도 에러 아님(요구사항에 포함 권장)
 from dotenv import load_dotenv
 
+
 # .env 파일 로드
 load_dotenv()
 
@@ -47,10 +48,12 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # ← SecurityMiddleware 다음에 위치
+    'entry.middleware.request_timing_middleware',  # 뷰별 처리 시간 (/metrics)
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'entry.middleware.request_context_middleware',  # 요청 id/사용자 id 로그 문맥 + 접근 로그
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -77,14 +80,21 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'diary.wsgi.application'
+ASGI_APPLICATION = 'diary.asgi.application'
 
 # --------------------------------------------------------------------------------------
 # 데이터베이스: 기본은 SQLite, DATABASE_URL 있으면 그걸로 대체
 # --------------------------------------------------------------------------------------
+# SQLite: 쓰기 잠금을 기다리는 시간(초). WAL 모드는 연결 시 켠다 (entry/signals.py)
+SQLITE_BUSY_TIMEOUT = float(os.getenv('SQLITE_BUSY_TIMEOUT', '20'))
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {'timeout': SQLITE_BUSY_TIMEOUT},
+        # 테스트 DB도 파일 (메모리 공유 캐시는 동시 쓰기를 기다리지 않고 'table is locked'로 거절)
+        'TEST': {'NAME': str(BASE_DIR / 'test_db.sqlite3')},
     }
 }
 
@@ -106,6 +116,22 @@ AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator'},
 ]
 
+# 이메일 로그인: LOWER(email) 고유 인덱스로 조회 (entry/accounts.py). 관리자 username 로그인은 ModelBackend
+AUTHENTICATION_BACKENDS = [
+    'entry.accounts.EmailBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+# 기본 PBKDF2와 같은 형식, 반복 횟수만 PASSWORD_HASH_ITERATIONS로 조정 (0 = Django 기본값)
+# 운영에서는 기본값 유지. 벤치마크/로컬 테스트에서 해시 비용을 낮출 때만 사용 (로그인 시 새 값으로 재해시됨)
+PASSWORD_HASHERS = [
+    'entry.accounts.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+PASSWORD_HASH_ITERATIONS = int(os.getenv('PASSWORD_HASH_ITERATIONS', '0'))
+
 # --------------------------------------------------------------------------------------
 # 국제화
 # --------------------------------------------------------------------------------------
@@ -168,6 +194,144 @@ else:
     MEDIA_URL = '/media/'
     MEDIA_ROOT = BASE_DIR / 'media'
 
+# --------------------------------------------------------------------------------------
+# 이미지 생성 작업 큐 (DB 기반, `python manage.py generation_worker` 로 처리)
+# --------------------------------------------------------------------------------------
+# True면 워커 없이 요청 안에서 바로 생성 (로컬 개발용)
+GENERATION_QUEUE_EAGER = os.getenv('GENERATION_QUEUE_EAGER', 'False') == 'True'
+# running 상태로 이 시간(초) 이상 남은 작업은 워커가 죽은 것으로 보고 재등록
+GENERATION_JOB_TIMEOUT = int(os.getenv('GENERATION_JOB_TIMEOUT', '300'))
+# 생성 진행 SSE: DB 확인 간격(초), 연결 최대 유지 시간(초, 이후 브라우저가 Last-Event-ID로 재연결)
+GENERATION_SSE_POLL_INTERVAL = float(os.getenv('GENERATION_SSE_POLL_INTERVAL', '0.5'))
+GENERATION_SSE_MAX_SECONDS = int(os.getenv('GENERATION_SSE_MAX_SECONDS', '55'))
+# 'single': 한 장에 2x2를 그리도록 요청 / 'panels': 패널 4장을 병렬 생성 후 Pillow로 합성
+CARTOON_GENERATION_MODE = os.getenv('CARTOON_GENERATION_MODE', 'single')
+# S3 저장 시 만드는 썸네일/미리보기/개별 컷 이미지 포맷: 'WEBP' 또는 'JPEG'
+CARTOON_DERIVATIVE_FORMAT = os.getenv('CARTOON_DERIVATIVE_FORMAT', 'WEBP')
+# 스타일 템플릿(sample_prompt_<이름>.txt) 디렉터리와 변경 확인 간격(초). 파일을 고치면 재시작 없이 반영
+CARTOON_STYLE_DIR = os.getenv('CARTOON_STYLE_DIR', str(BASE_DIR))
+CARTOON_STYLE_RELOAD_SECONDS = float(os.getenv('CARTOON_STYLE_RELOAD_SECONDS', '2'))
+
+# --------------------------------------------------------------------------------------
+# OpenAI 호출 (공용 클라이언트: entry/Image_making/client.py)
+# --------------------------------------------------------------------------------------
+OPENAI_CHAT_TIMEOUT = float(os.getenv('OPENAI_CHAT_TIMEOUT', '30'))
+OPENAI_IMAGE_TIMEOUT = float(os.getenv('OPENAI_IMAGE_TIMEOUT', '120'))
+# PRD: 자동 재시도 ≤ 1회 (1보다 크게 설정해도 1회로 제한)
+OPENAI_MAX_RETRIES = int(os.getenv('OPENAI_MAX_RETRIES', '1'))
+OPENAI_RETRY_BACKOFF = float(os.getenv('OPENAI_RETRY_BACKOFF', '1.0'))
+# 프로세스당 동시 요청 수 / 초당 요청 수(토큰 버킷) 제한
+OPENAI_MAX_IN_FLIGHT = int(os.getenv('OPENAI_MAX_IN_FLIGHT', '8'))
+OPENAI_REQUESTS_PER_SECOND = float(os.getenv('OPENAI_REQUESTS_PER_SECOND', '2'))
+OPENAI_BURST = int(os.getenv('OPENAI_BURST', '4'))
+# 'fake': OpenAI 대신 오프라인 가짜 응답 (비용 없이 부하 테스트/개발, entry/Image_making/client.py)
+OPENAI_PROVIDER = os.getenv('OPENAI_PROVIDER', 'openai')
+FAKE_OPENAI_LATENCY = float(os.getenv('FAKE_OPENAI_LATENCY', '0'))
+FAKE_OPENAI_IMAGE_LATENCY = float(os.getenv('FAKE_OPENAI_IMAGE_LATENCY', '0'))
+FAKE_OPENAI_JITTER = float(os.getenv('FAKE_OPENAI_JITTER', '0'))
+FAKE_OPENAI_ERROR_RATE = float(os.getenv('FAKE_OPENAI_ERROR_RATE', '0'))
+FAKE_OPENAI_IMAGE_PX = int(os.getenv('FAKE_OPENAI_IMAGE_PX', '64'))
+FAKE_OPENAI_IMAGE_URL = os.getenv('FAKE_OPENAI_IMAGE_URL', 'https://example.com/fake.png')
+FAKE_OPENAI_SEED = int(os.getenv('FAKE_OPENAI_SEED', '0'))
+
+# --------------------------------------------------------------------------------------
+# 아웃라인 캐시: 같은 일기면 스타일만 바꿔 재생성할 때 gpt-4o-mini 호출 생략
+# --------------------------------------------------------------------------------------
+# 'django'(Django 캐시 프레임워크) / 'db'(OutlineCache 테이블) / 'none'
+OUTLINE_CACHE_BACKEND = os.getenv('OUTLINE_CACHE_BACKEND', 'django')
+OUTLINE_CACHE_ALIAS = 'default'
+OUTLINE_CACHE_TTL = int(os.getenv('OUTLINE_CACHE_TTL', str(60 * 60 * 24 * 7)))
+# 'db' 백엔드 최대 항목 수 (초과 시 오래 안 쓴 항목부터 삭제)
+OUTLINE_CACHE_MAX_ENTRIES = int(os.getenv('OUTLINE_CACHE_MAX_ENTRIES', '10000'))
+
+# --------------------------------------------------------------------------------------
+# 일기 조회 응답 캐시 (날짜별/상세 API, 사용자별 키, 일기 저장/삭제 시 무효화)
+# --------------------------------------------------------------------------------------
+# 'locmem'(프로세스별, 기본) / 'file'(DIARY_CACHE_DIR, 같은 서버의 워커끼리 공유) / 'none'
+DIARY_CACHE_BACKEND = os.getenv('DIARY_CACHE_BACKEND', 'locmem')
+DIARY_CACHE_DIR = os.getenv('DIARY_CACHE_DIR', str(BASE_DIR / '.cache' / 'diary'))
+DIARY_CACHE_TTL = int(os.getenv('DIARY_CACHE_TTL', '300'))
+DIARY_CACHE_ALIAS = 'diary'
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    DIARY_CACHE_ALIAS: {
+        'BACKEND': {
+            'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+            'file': 'django.core.cache.backends.filebased.FileBasedCache',
+            'none': 'django.core.cache.backends.dummy.DummyCache',
+        }[DIARY_CACHE_BACKEND],
+        'LOCATION': DIARY_CACHE_DIR if DIARY_CACHE_BACKEND == 'file' else 'diary',
+        'TIMEOUT': DIARY_CACHE_TTL,
+        'OPTIONS': {'MAX_ENTRIES': int(os.getenv('DIARY_CACHE_MAX_ENTRIES', '20000'))},
+    },
+}
+
+# --------------------------------------------------------------------------------------
+# 이미지 다운로드: 'redirect'(S3 서명 URL로 리다이렉트) / 'stream'(앱 서버가 청크 프록시)
+# --------------------------------------------------------------------------------------
+CARTOON_DOWNLOAD_MODE = os.getenv('CARTOON_DOWNLOAD_MODE', 'redirect' if USE_S3 else 'stream')
+
+# --------------------------------------------------------------------------------------
+# 계측 (/metrics, Prometheus 형식)
+# --------------------------------------------------------------------------------------
+# 프로세스 메모리에 모은 관측값을 DB에 반영하는 주기(초)
+METRICS_FLUSH_SECONDS = int(os.getenv('METRICS_FLUSH_SECONDS', '10'))
+# 설정하면 'Authorization: Bearer <토큰>'으로 수집 (비어 있으면 스태프 로그인만 허용)
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# --------------------------------------------------------------------------------------
+# 로그 (JSON 한 줄, 큐 + 백그라운드 스레드로 쓰기: entry/logs.py)
+# --------------------------------------------------------------------------------------
+# entry.* 기본 레벨, 모듈별 레벨('entry.views=DEBUG,entry.Image_making=WARNING')
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+LOG_LEVELS = os.getenv('LOG_LEVELS', '')
+# 비어 있으면 stderr
+LOG_FILE = os.getenv('LOG_FILE', '')
+# 큐가 가득 차면(쓰기가 밀리면) 요청을 기다리게 하지 않고 버린다
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+# 자주 호출되는 조회 API의 INFO 이하 로그는 이 비율의 요청만 남김 (WARNING 이상은 항상)
+LOG_API_SAMPLE_RATE = float(os.getenv('LOG_API_SAMPLE_RATE', '0.1'))
+LOG_SAMPLED_VIEWS = [
+    'diary_by_date_api', 'get_diary_detail', 'diary_month_api', 'diary_dates_api',
+    'generation_job_status', 'metrics',
+]
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'context': {'()': 'entry.logs.ContextFilter'},
+        'sample_api': {'()': 'entry.logs.SampleFilter', 'rate': LOG_API_SAMPLE_RATE},
+        'sample_access': {'()': 'entry.logs.SampleFilter', 'rate': LOG_API_SAMPLE_RATE, 'views': LOG_SAMPLED_VIEWS},
+    },
+    'handlers': {
+        'json': {
+            'class': 'entry.logs.BackgroundHandler',
+            'filename': LOG_FILE,
+            'queue_size': LOG_QUEUE_SIZE,
+            'filters': ['context'],
+        },
+    },
+    'loggers': {
+        'entry': {'handlers': ['json'], 'level': LOG_LEVEL, 'propagate': False},
+        # 조회 API 로그 / 접근 로그 (표본 추출)
+        'entry.api': {'filters': ['sample_api']},
+        'entry.request': {'filters': ['sample_access']},
+    },
+}
+# LOG_LEVELS: 'entry.views=DEBUG,entry.Image_making=WARNING' → 로거별 level
+for _item in LOG_LEVELS.split(','):
+    _name, _sep, _level = _item.partition('=')
+    if _sep and _name.strip() and _level.strip():
+        LOGGING['loggers'].setdefault(_name.strip(), {})['level'] = _level.strip().upper()
+
+# 테스트 중 JSON 로그 출력 레벨 (diary/test_runner.py, 로거 레벨은 그대로라 assertLogs로 확인)
+TEST_LOG_LEVEL = os.getenv('TEST_LOG_LEVEL', 'CRITICAL')
+TEST_RUNNER = 'diary.test_runner.QuietLogRunner'
+
 # --------------------------------------------------------------------------------------
 # 기본 Primary Key 타입 지정 (Django 3.2+ 권장)
 # --------------------------------------------------------------------------------------
@@ -2,6 +2,9 @@
 AWS S3 Storage 설정
 업로드되는 파일들을 S3의 media 폴더 내에서 용도별로 분류하여 저장
 """
+from urllib.parse import unquote, urlsplit
+
+from boto3.s3.transfer import TransferConfig
 from storages.backends.s3boto3 import S3Boto3Storage
 
 
@@ -21,6 +24,46 @@ class CartoonStorage(S3Boto3Storage):
     """
     location = 'media/cartoon'
     file_overwrite = False
+    # 스트리밍 업로드 시 메모리 상한: 5MB(S3 최소 파트 크기) 단위 멀티파트, 동시 2파트
+    transfer_config = TransferConfig(
+        multipart_threshold=5 * 1024 * 1024,
+        multipart_chunksize=5 * 1024 * 1024,
+        max_concurrency=2,
+    )
+
+    def name_from_url(self, url):
+        """
+        storage.url()로 만든 URL → 저장 이름 (location 기준 상대 경로)
+        이 스토리지의 객체가 아니면 None
+        """
+        path = unquote(urlsplit(url or '').path).lstrip('/')
+        prefix = self.location.strip('/') + '/'
+        if not path.startswith(prefix):
+            return None
+        return path[len(prefix):]
+
+    def presigned_download_url(self, name, content_disposition=None, expire=300):
+        """
+        S3에서 직접 내려받는 서명 URL (앱 서버를 거치지 않음)
+        content_disposition: 응답 Content-Disposition 헤더 (다운로드 파일명)
+        """
+        params = {'Bucket': self.bucket_name, 'Key': self._normalize_name(name)}
+        if content_disposition:
+            params['ResponseContentDisposition'] = content_disposition
+        return self.bucket.meta.client.generate_presigned_url(
+            'get_object', Params=params, ExpiresIn=expire
+        )
+
+
+def cartoon_storage():
+    """
+    만화 이미지 스토리지 인스턴스 (settings.CARTOON_STORAGE, 기본 CartoonStorage).
+    벤치마크/로컬 개발에서는 FileSystemStorage 등으로 바꿔 S3 없이 실행할 수 있다.
+    """
+    from django.conf import settings
+    from django.utils.module_loading import import_string
+
+    return import_string(getattr(settings, 'CARTOON_STORAGE', 'diary.storages.CartoonStorage'))()
 
 # 추후 작업 사항
 
@@ -0,0 +1,36 @@
+"""
+테스트 러너 (settings.TEST_RUNNER)
+
+테스트 동안 JSON 로그 핸들러(settings.LOGGING의 'json')의 출력 레벨만 TEST_LOG_LEVEL로 올린다.
+로거/필터는 그대로라 assertLogs로 로그를 확인할 수 있고, 일부러 실패시키는 경로의 경고가
+테스트 출력에 섞이지 않는다. 출력이 필요하면 TEST_LOG_LEVEL=DEBUG로 실행
+"""
+import logging
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class QuietLogRunner(DiscoverRunner):
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._saved_levels = []
+        for handler in _json_handlers():
+            self._saved_levels.append((handler, handler.level))
+            handler.setLevel(settings.TEST_LOG_LEVEL)
+
+    def teardown_test_environment(self, **kwargs):
+        for handler, level in self._saved_levels:
+            handler.setLevel(level)
+        super().teardown_test_environment(**kwargs)
+
+
+def _json_handlers():
+    names = [''] + list(settings.LOGGING.get('loggers', {}))
+    seen = []
+    for name in names:
+        for handler in logging.getLogger(name).handlers:
+            if handler.get_name() == 'json' and handler not in seen:
+                seen.append(handler)
+    return seen
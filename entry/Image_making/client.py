@@ -0,0 +1,406 @@
+"""
+OpenAI 클라이언트 공용 팩토리.
+
+- 프로세스당 OpenAI 클라이언트 1개를 재사용 (HTTP 커넥션 풀 공유)
+- .env 는 프로세스당 한 번만 로드
+- 호출별 타임아웃, 지수 백오프 재시도(PRD: 자동 재시도 ≤ 1회)
+- 동시 요청 수(세마포어) + 초당 요청 수(토큰 버킷) 제한
+- 오프라인 테스트/부하 테스트용 FakeOpenAIClient (OPENAI_PROVIDER=fake 로 서버 전체에 적용)
+
+사용 예:
+    from entry.Image_making.client import image_generation
+    resp = image_generation(model="dall-e-3", prompt=prompt, size="1024x1024", n=1)
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    from openai import OpenAI  # type: ignore
+    from openai import APIConnectionError, APITimeoutError  # type: ignore
+except Exception:  # pragma: no cover - optional import
+    OpenAI = None  # type: ignore
+    APIConnectionError = APITimeoutError = None  # type: ignore
+
+try:
+    from dotenv import load_dotenv  # type: ignore
+except Exception:  # pragma: no cover
+    load_dotenv = None  # type: ignore
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+# PRD: 실패 시 자동 재시도 ≤ 1회 → 설정값이 더 커도 1회로 제한
+MAX_RETRIES_CAP = 1
+
+DEFAULTS = {
+    "OPENAI_CHAT_TIMEOUT": 30.0,        # 아웃라인(gpt-4o-mini) 호출 타임아웃(초)
+    "OPENAI_IMAGE_TIMEOUT": 120.0,      # DALL·E 3 호출 타임아웃(초)
+    "OPENAI_MAX_RETRIES": 1,
+    "OPENAI_RETRY_BACKOFF": 1.0,        # 첫 재시도 대기(초), 이후 2배씩
+    "OPENAI_MAX_IN_FLIGHT": 8,          # 프로세스 내 동시 요청 수
+    "OPENAI_REQUESTS_PER_SECOND": 2.0,  # 토큰 버킷 충전 속도
+    "OPENAI_BURST": 4,                  # 토큰 버킷 최대 크기
+    "OPENAI_PROVIDER": "openai",        # 'openai' 또는 'fake'(오프라인, 비용 없음)
+    "FAKE_OPENAI_LATENCY": 0.0,         # fake: 아웃라인 호출 지연(초)
+    "FAKE_OPENAI_IMAGE_LATENCY": 0.0,   # fake: 이미지 호출 지연(초)
+    "FAKE_OPENAI_JITTER": 0.0,          # fake: 지연 ±비율 (0.2 → ±20%)
+    "FAKE_OPENAI_ERROR_RATE": 0.0,      # fake: 호출당 5xx/429 오류 확률
+    "FAKE_OPENAI_IMAGE_PX": 64,         # fake: 생성 PNG 한 변 길이(px)
+    "FAKE_OPENAI_IMAGE_URL": "https://example.com/fake.png",
+    "FAKE_OPENAI_SEED": 0,
+}
+
+_lock = threading.Lock()
+_env_loaded = False
+_client: Any = None
+_limiter: Optional["RateLimiter"] = None
+
+
+def setting(name: str, default: Any = None) -> Any:
+    """Django settings 값 (Django 밖에서 실행 시 환경변수)"""
+    if default is None:
+        default = DEFAULTS.get(name)
+    try:
+        from django.conf import settings  # type: ignore
+        if settings.configured:
+            return getattr(settings, name, os.getenv(name, default))
+    except Exception:
+        pass
+    return os.getenv(name, default)
+
+
+def ensure_env_loaded() -> None:
+    """.env를 프로세스당 한 번만 로드하고 OPENAI_API 키를 환경변수로 노출한다."""
+    global _env_loaded
+    if _env_loaded:
+        return
+    with _lock:
+        if _env_loaded:
+            return
+        if load_dotenv is not None:
+            env_path = PROJECT_ROOT / ".env"
+            if env_path.exists():
+                load_dotenv(dotenv_path=env_path)
+
+        api_key = (
+            os.getenv("OPENAI_API")
+            or os.getenv("OPENAI_API_KEY")
+            or os.getenv("OPENAI_API_TOKEN")
+        )
+        if api_key:
+            os.environ.setdefault("OPENAI_API_KEY", api_key)
+        _env_loaded = True
+
+
+def get_client() -> Any:
+    """
+    프로세스 공용 OpenAI 클라이언트 (SDK 미설치 시 None, OPENAI_PROVIDER=fake면 FakeOpenAIClient).
+    SDK 자체 재시도는 끄고(max_retries=0) call_with_retry 에서 재시도 예산을 관리한다.
+    """
+    global _client
+    if _client is not None:
+        return _client
+    with _lock:
+        if _client is None and setting("OPENAI_PROVIDER") == "fake":
+            _client = FakeOpenAIClient.from_settings()
+        elif _client is None and OpenAI is not None:
+            ensure_env_loaded()
+            _client = OpenAI(max_retries=0, timeout=float(setting("OPENAI_IMAGE_TIMEOUT")))
+    return _client
+
+
+def set_client(client: Any) -> None:
+    """공용 클라이언트 교체 (테스트/오프라인 실행용). None이면 다음 호출 때 다시 생성"""
+    global _client
+    with _lock:
+        _client = client
+
+
+# ───────────────────────────
+# 동시성 / 속도 제한
+# ───────────────────────────
+
+class RateLimiter:
+    """
+    동시 요청 수(세마포어)와 초당 요청 수(토큰 버킷)를 함께 제한한다.
+        with limiter.slot():
+            ...요청...
+    """
+
+    def __init__(self, max_in_flight: int = 8, rate: float = 2.0, burst: int = 4, clock=time.monotonic, sleep=time.sleep):
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._semaphore = threading.BoundedSemaphore(self.max_in_flight)
+        self._bucket_lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._clock = clock
+        self._sleep = sleep
+        self._last = clock()
+
+    def _take_token(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            with self._bucket_lock:
+                now = self._clock()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            self._sleep(wait)
+
+    @contextmanager
+    def slot(self):
+        self._semaphore.acquire()
+        try:
+            self._take_token()
+            yield
+        finally:
+            self._semaphore.release()
+
+
+def get_limiter() -> RateLimiter:
+    global _limiter
+    if _limiter is None:
+        with _lock:
+            if _limiter is None:
+                _limiter = RateLimiter(
+                    max_in_flight=int(setting("OPENAI_MAX_IN_FLIGHT")),
+                    rate=float(setting("OPENAI_REQUESTS_PER_SECOND")),
+                    burst=int(setting("OPENAI_BURST")),
+                )
+    return _limiter
+
+
+def set_limiter(limiter: Optional[RateLimiter]) -> None:
+    global _limiter
+    with _lock:
+        _limiter = limiter
+
+
+# ───────────────────────────
+# 재시도
+# ───────────────────────────
+
+def is_retryable(exc: BaseException) -> bool:
+    """429/5xx/타임아웃/연결 오류만 재시도 (4xx 요청 오류는 재시도해도 같은 결과)"""
+    retryable_types = tuple(t for t in (APIConnectionError, APITimeoutError) if t is not None)
+    if retryable_types and isinstance(exc, retryable_types):
+        return True
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    status = getattr(exc, "status_code", None)
+    return status is not None and (status in (408, 409, 429) or status >= 500)
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def call_with_retry(
+    fn: Callable[..., Any],
+    *args: Any,
+    retries: Optional[int] = None,
+    backoff: Optional[float] = None,
+    limiter: Optional[RateLimiter] = None,
+    sleep: Callable[[float], None] = time.sleep,
+    **kwargs: Any,
+) -> Any:
+    """
+    fn(*args, **kwargs)를 제한기 슬롯 안에서 실행하고, 일시적 오류면 지수 백오프로 재시도.
+    재시도 횟수는 MAX_RETRIES_CAP(=1)을 넘지 않는다. 백오프 대기 중에는 슬롯을 잡지 않는다.
+    """
+    if retries is None:
+        retries = int(setting("OPENAI_MAX_RETRIES"))
+    retries = max(0, min(int(retries), MAX_RETRIES_CAP))
+    if backoff is None:
+        backoff = float(setting("OPENAI_RETRY_BACKOFF"))
+    limiter = limiter or get_limiter()
+
+    attempt = 0
+    while True:
+        try:
+            with limiter.slot():
+                return fn(*args, **kwargs)
+        except Exception as exc:
+            if attempt >= retries or not is_retryable(exc):
+                raise
+            delay = _retry_after(exc)
+            if delay is None:
+                delay = backoff * (2 ** attempt) * (1 + random.random() * 0.25)
+            sleep(min(delay, 30.0))
+            attempt += 1
+
+
+def chat_completion(**kwargs: Any) -> Any:
+    """공용 클라이언트로 chat.completions.create 호출 (타임아웃/재시도/제한 적용)"""
+    client = get_client()
+    if client is None:
+        raise RuntimeError("OpenAI SDK를 사용할 수 없습니다.")
+    kwargs.setdefault("timeout", float(setting("OPENAI_CHAT_TIMEOUT")))
+    return call_with_retry(client.chat.completions.create, **kwargs)
+
+
+def image_generation(**kwargs: Any) -> Any:
+    """공용 클라이언트로 images.generate 호출 (타임아웃/재시도/제한 적용)"""
+    client = get_client()
+    if client is None:
+        raise RuntimeError("OpenAI SDK를 사용할 수 없습니다.")
+    kwargs.setdefault("timeout", float(setting("OPENAI_IMAGE_TIMEOUT")))
+    return call_with_retry(client.images.generate, **kwargs)
+
+
+# ───────────────────────────
+# 테스트/부하 테스트용 가짜 클라이언트
+# ───────────────────────────
+
+_png_cache: Dict[tuple, str] = {}
+
+
+def _blank_png_b64(size: int = 64) -> str:
+    import base64
+    from io import BytesIO
+    from PIL import Image
+
+    buf = BytesIO()
+    Image.new("RGB", (size, size), (255, 255, 255)).save(buf, format="PNG")
+    return base64.b64encode(buf.getvalue()).decode("ascii")
+
+
+def fake_png_b64(size: int = 64, seed: int = 0) -> str:
+    """
+    seed로 정해지는 잡음 PNG (압축이 거의 안 돼 실제 생성 이미지처럼 size²×3 바이트 안팎).
+    같은 (size, seed)는 한 번만 만든다.
+    """
+    key = (size, seed)
+    if key not in _png_cache:
+        import base64
+        from io import BytesIO
+        from PIL import Image
+
+        rnd = random.Random(seed)
+        buf = BytesIO()
+        Image.frombytes("RGB", (size, size), rnd.randbytes(size * size * 3)).save(buf, format="PNG")
+        _png_cache[key] = base64.b64encode(buf.getvalue()).decode("ascii")
+    return _png_cache[key]
+
+
+class FakeAPIError(Exception):
+    """status_code를 가진 가짜 API 오류 (429/500 등)"""
+
+    def __init__(self, status_code: int, message: str = "fake api error"):
+        super().__init__(f"{status_code}: {message}")
+        self.status_code = status_code
+
+
+class FakeOpenAIClient:
+    """
+    OpenAI SDK의 chat.completions.create / images.generate 만 흉내 내는 오프라인 클라이언트.
+    - errors: 호출 순서대로 던질 예외 목록 (None이면 정상 응답)
+    - latency / image_latency: 아웃라인 / 이미지 호출당 지연(초), jitter: ±비율
+    - error_rate: 호출당 FakeAPIError(500 또는 429) 확률
+    - image_px: 응답 PNG 크기 (None이면 64px 흰 이미지)
+    - seed: 지연/오류/이미지를 정하는 난수 시드 (같은 시드·같은 호출 순서 → 같은 결과)
+    - calls / max_in_flight 로 호출 횟수·동시성을 검사할 수 있다.
+    """
+
+    def __init__(
+        self,
+        outline: Optional[List[Dict[str, Any]]] = None,
+        image_url: str = "https://example.com/fake.png",
+        b64_png: Optional[str] = None,
+        errors: Optional[List[Optional[BaseException]]] = None,
+        latency: float = 0.0,
+        image_latency: Optional[float] = None,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        image_px: Optional[int] = None,
+        seed: int = 0,
+    ):
+        import json
+
+        if b64_png is None:
+            b64_png = fake_png_b64(image_px, seed) if image_px else _blank_png_b64()
+        self._outline_json = json.dumps({"panels": outline or [
+            {"role": role, "scene": f"{role} scene", "caption": f"{role} caption", "emotion": "calm"}
+            for role in ("Hook", "Complication", "HighPoint", "Resolution")
+        ]})
+        self.image_url = image_url
+        self.b64_png = b64_png
+        self.errors = list(errors or [])
+        self.latency = latency
+        self.image_latency = latency if image_latency is None else image_latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self.calls: List[Dict[str, Any]] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._chat_create))
+        self.images = SimpleNamespace(generate=self._images_generate)
+
+    @classmethod
+    def from_settings(cls) -> "FakeOpenAIClient":
+        """OPENAI_PROVIDER=fake 일 때 FAKE_OPENAI_* 설정으로 생성"""
+        return cls(
+            image_url=str(setting("FAKE_OPENAI_IMAGE_URL")),
+            latency=float(setting("FAKE_OPENAI_LATENCY")),
+            image_latency=float(setting("FAKE_OPENAI_IMAGE_LATENCY")),
+            jitter=float(setting("FAKE_OPENAI_JITTER")),
+            error_rate=float(setting("FAKE_OPENAI_ERROR_RATE")),
+            image_px=int(setting("FAKE_OPENAI_IMAGE_PX")),
+            seed=int(setting("FAKE_OPENAI_SEED")),
+        )
+
+    def _enter(self, kind: str, kwargs: Dict[str, Any]) -> None:
+        with self._lock:
+            self.calls.append({"kind": kind, **kwargs})
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            error = self.errors.pop(0) if self.errors else None
+            # 난수는 잠금 안에서 뽑아 호출 순서가 같으면 결과도 같게
+            delay = self.image_latency if kind == "images" else self.latency
+            if delay and self.jitter:
+                delay *= 1 + self._random.uniform(-self.jitter, self.jitter)
+            if error is None and self.error_rate and self._random.random() < self.error_rate:
+                error = FakeAPIError(self._random.choice((500, 429)))
+        try:
+            if delay:
+                time.sleep(delay)
+            if error is not None:
+                raise error
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def _chat_create(self, **kwargs: Any) -> Any:
+        self._enter("chat", kwargs)
+        message = SimpleNamespace(content=self._outline_json)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    def _images_generate(self, **kwargs: Any) -> Any:
+        self._enter("images", kwargs)
+        if kwargs.get("response_format") == "b64_json":
+            data = SimpleNamespace(url=None, b64_json=self.b64_png)
+        else:
+            data = SimpleNamespace(url=self.image_url, b64_json=None)
+        return SimpleNamespace(data=[data])
@@ -0,0 +1,123 @@
+"""
+4개의 패널 이미지를 2x2 그리드로 합성 (Pillow).
+
+레이아웃(기본값, 픽셀):
+    GUTTER | PANEL | GUTTER | PANEL | GUTTER
+    각 패널 아래에 CAPTION_HEIGHT 높이의 캡션 띠
+"""
+
+from __future__ import annotations
+
+from io import BytesIO
+from typing import List, Optional, Sequence, Tuple, Union
+
+from PIL import Image, ImageDraw, ImageFont
+
+
+PANEL_SIZE = 512
+GUTTER = 24
+CAPTION_HEIGHT = 56
+BORDER = 3
+FONT_SIZE = 20
+BACKGROUND = (255, 255, 255)
+INK = (0, 0, 0)
+
+Box = Tuple[int, int, int, int]
+ImageSource = Union[bytes, Image.Image]
+
+
+def grid_size(panel_size: int = PANEL_SIZE, gutter: int = GUTTER, caption_height: int = CAPTION_HEIGHT) -> Tuple[int, int]:
+    """합성 결과 전체 크기 (width, height)"""
+    width = panel_size * 2 + gutter * 3
+    height = (panel_size + caption_height) * 2 + gutter * 3
+    return width, height
+
+
+def panel_boxes(panel_size: int = PANEL_SIZE, gutter: int = GUTTER, caption_height: int = CAPTION_HEIGHT) -> List[Box]:
+    """패널 1~4의 (left, top, right, bottom) 영역 (캡션 제외)"""
+    boxes = []
+    for idx in range(4):
+        row, col = divmod(idx, 2)
+        left = gutter + col * (panel_size + gutter)
+        top = gutter + row * (panel_size + caption_height + gutter)
+        boxes.append((left, top, left + panel_size, top + panel_size))
+    return boxes
+
+
+def _load_font(size: int):
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:  # FreeType 없는 Pillow
+        return ImageFont.load_default()
+
+
+def _wrap_caption(draw: ImageDraw.ImageDraw, text: str, font, max_width: int, max_lines: int = 2) -> List[str]:
+    words = (text or "").split()
+    lines: List[str] = []
+    current = ""
+    for word in words:
+        candidate = f"{current} {word}".strip()
+        if draw.textlength(candidate, font=font) <= max_width or not current:
+            current = candidate
+        else:
+            lines.append(current)
+            current = word
+    if current:
+        lines.append(current)
+    if len(lines) > max_lines:
+        lines = lines[:max_lines]
+        lines[-1] = lines[-1].rstrip(".") + "..."
+    return lines
+
+
+def _to_image(source: Optional[ImageSource], panel_size: int) -> Image.Image:
+    if source is None:
+        return Image.new("RGB", (panel_size, panel_size), BACKGROUND)
+    image = source if isinstance(source, Image.Image) else Image.open(BytesIO(source))
+    image = image.convert("RGB")
+    if image.size != (panel_size, panel_size):
+        image = image.resize((panel_size, panel_size), Image.LANCZOS)
+    return image
+
+
+def composite_2x2(
+    images: Sequence[Optional[ImageSource]],
+    captions: Optional[Sequence[str]] = None,
+    panel_size: int = PANEL_SIZE,
+    gutter: int = GUTTER,
+    caption_height: int = CAPTION_HEIGHT,
+) -> Image.Image:
+    """
+    패널 이미지 4장(bytes 또는 PIL Image)을 2x2 그리드로 합성한다.
+    images가 4장보다 적으면 빈 패널로 채우고, 많으면 앞의 4장만 사용.
+    """
+    images = list(images)[:4]
+    while len(images) < 4:
+        images.append(None)
+    captions = list(captions or [])[:4]
+    while len(captions) < 4:
+        captions.append("")
+
+    canvas = Image.new("RGB", grid_size(panel_size, gutter, caption_height), BACKGROUND)
+    draw = ImageDraw.Draw(canvas)
+    font = _load_font(FONT_SIZE)
+
+    for box, source, caption in zip(panel_boxes(panel_size, gutter, caption_height), images, captions):
+        left, top, right, bottom = box
+        canvas.paste(_to_image(source, panel_size), (left, top))
+        draw.rectangle((left, top, right - 1, bottom - 1), outline=INK, width=BORDER)
+
+        lines = _wrap_caption(draw, caption, font, panel_size - 8)
+        y = bottom + 6
+        for line in lines:
+            line_width = draw.textlength(line, font=font)
+            draw.text((left + (panel_size - line_width) / 2, y), line, fill=INK, font=font)
+            y += FONT_SIZE + 4
+
+    return canvas
+
+
+def to_png_bytes(image: Image.Image) -> bytes:
+    buf = BytesIO()
+    image.save(buf, format="PNG", optimize=True)
+    return buf.getvalue()
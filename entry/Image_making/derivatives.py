@@ -0,0 +1,114 @@
+"""
+저장된 4컷 이미지의 파생 이미지 생성.
+
+- thumb   : 캘린더/목록 카드용 작은 썸네일 (THUMBNAIL_SIZE)
+- preview : 상세/미리보기용 중간 크기 (PREVIEW_SIZE)
+- panel_N : 개별 컷 4장 (PANEL_SIZE)
+
+원본 PNG(1024px 이상) 대신 화면에 맞는 가장 작은 이미지를 내려주기 위함.
+"""
+
+from __future__ import annotations
+
+from io import BytesIO
+from typing import BinaryIO, Dict, List, Tuple, Union
+
+from PIL import Image
+
+from .client import setting
+from .compose import grid_size, panel_boxes
+
+
+THUMBNAIL_SIZE = 320
+PREVIEW_SIZE = 768
+PANEL_SIZE = 512
+QUALITY = 80
+
+# 설정 CARTOON_DERIVATIVE_FORMAT: 'WEBP'(기본) 또는 'JPEG'
+FORMATS = {
+    "WEBP": "webp",
+    "JPEG": "jpg",
+}
+
+Source = Union[str, bytes, BinaryIO]
+
+
+def _format() -> Tuple[str, str]:
+    """(Pillow 포맷 이름, 확장자)"""
+    fmt = str(setting("CARTOON_DERIVATIVE_FORMAT", "WEBP")).upper()
+    if fmt not in FORMATS:
+        fmt = "WEBP"
+    return fmt, FORMATS[fmt]
+
+
+def _encode(image: Image.Image, fmt: str) -> bytes:
+    buf = BytesIO()
+    if fmt == "WEBP":
+        image.save(buf, format=fmt, quality=QUALITY, method=4)
+    else:
+        image.save(buf, format=fmt, quality=QUALITY, optimize=True, progressive=True)
+    return buf.getvalue()
+
+
+def _fit(image: Image.Image, max_side: int) -> Image.Image:
+    copy = image.copy()
+    copy.thumbnail((max_side, max_side), Image.LANCZOS)
+    return copy
+
+
+def panel_crop_boxes(size: Tuple[int, int]) -> List[Tuple[int, int, int, int]]:
+    """
+    개별 컷 영역. 로컬 합성본(compose.grid_size)이면 정확한 패널 좌표,
+    그 외(DALL·E 한 장 2x2)는 4등분.
+    """
+    if size == grid_size():
+        return panel_boxes()
+    width, height = size
+    half_w, half_h = width // 2, height // 2
+    return [
+        (0, 0, half_w, half_h),
+        (half_w, 0, width, half_h),
+        (0, half_h, half_w, height),
+        (half_w, half_h, width, height),
+    ]
+
+
+def build_derivatives(source: Source) -> Dict[str, bytes]:
+    """원본 이미지(경로/bytes/파일 객체) → {'thumb', 'preview', 'panel_1'..'panel_4': 인코딩된 bytes}"""
+    fmt, _ = _format()
+    if isinstance(source, bytes):
+        source = BytesIO(source)
+    with Image.open(source) as opened:
+        image = opened.convert("RGB")
+
+    out = {
+        "thumb": _encode(_fit(image, THUMBNAIL_SIZE), fmt),
+        "preview": _encode(_fit(image, PREVIEW_SIZE), fmt),
+    }
+    for idx, box in enumerate(panel_crop_boxes(image.size), start=1):
+        out[f"panel_{idx}"] = _encode(_fit(image.crop(box), PANEL_SIZE), fmt)
+    return out
+
+
+def save_derivatives(storage, base_name: str, source: Source) -> Dict[str, object]:
+    """
+    파생 이미지를 원본과 같은 스토리지에 저장.
+    base_name: 원본 파일명(확장자 제외), 예) 원본 sha256
+    반환: {'thumbnail_url', 'preview_url', 'panel_urls': [4개], 'keys': [저장 이름 6개]}
+    """
+    from django.core.files.base import ContentFile
+
+    _, ext = _format()
+    urls: Dict[str, str] = {}
+    keys: List[str] = []
+    for key, data in build_derivatives(source).items():
+        saved = storage.save(f"{base_name}_{key}.{ext}", ContentFile(data))
+        urls[key] = storage.url(saved)
+        keys.append(saved)
+
+    return {
+        "thumbnail_url": urls["thumb"],
+        "preview_url": urls["preview"],
+        "panel_urls": [urls[f"panel_{i}"] for i in range(1, 5)],
+        "keys": keys,
+    }
@@ -0,0 +1,168 @@
+"""
+일기 → 4패널 아웃라인 캐시.
+
+제목/본문이 그대로면 스타일만 바꿔 재생성할 때 gpt-4o-mini 호출을 건너뛴다.
+키: sha256(일기 텍스트, 언어, 모델, temperature) — 스타일은 키에 포함하지 않음.
+
+백엔드 (설정 OUTLINE_CACHE_BACKEND):
+    'django' : Django 캐시 프레임워크 (OUTLINE_CACHE_ALIAS, 기본 'default')
+    'db'     : OutlineCache 테이블 (TTL + last_used_at 기준 LRU 정리)
+    'none'   : 캐시 사용 안 함
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from datetime import timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from .client import setting
+
+
+Panels = List[Dict[str, Any]]
+
+DEFAULTS = {
+    "OUTLINE_CACHE_BACKEND": "django",
+    "OUTLINE_CACHE_ALIAS": "default",
+    "OUTLINE_CACHE_TTL": 60 * 60 * 24 * 7,
+    "OUTLINE_CACHE_MAX_ENTRIES": 10000,
+}
+
+
+def _setting(name: str) -> Any:
+    return setting(name, DEFAULTS[name])
+
+
+def outline_cache_key(diary_text: str, language: str, model: str, temperature: float) -> str:
+    payload = json.dumps(
+        [(diary_text or "").strip(), (language or "").lower(), model, float(temperature)],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class NullBackend:
+    def get(self, key: str) -> Optional[Panels]:
+        return None
+
+    def set(self, key: str, panels: Panels) -> None:
+        return None
+
+
+class DjangoCacheBackend:
+    """Django 캐시 프레임워크 사용. TTL/용량 정리는 캐시 백엔드(LocMem: LRU) 설정을 따른다."""
+
+    prefix = "outline:"
+
+    def __init__(self, alias: Optional[str] = None, ttl: Optional[int] = None):
+        from django.core.cache import caches
+
+        self.cache = caches[alias or _setting("OUTLINE_CACHE_ALIAS")]
+        self.ttl = int(ttl if ttl is not None else _setting("OUTLINE_CACHE_TTL"))
+
+    def get(self, key: str) -> Optional[Panels]:
+        return self.cache.get(self.prefix + key)
+
+    def set(self, key: str, panels: Panels) -> None:
+        self.cache.set(self.prefix + key, panels, timeout=self.ttl)
+
+
+class DBBackend:
+    """OutlineCache 테이블 사용. 만료(TTL) 항목은 무시하고, 최대 개수를 넘으면 오래 안 쓴 것부터 삭제"""
+
+    def __init__(self, ttl: Optional[int] = None, max_entries: Optional[int] = None):
+        self.ttl = int(ttl if ttl is not None else _setting("OUTLINE_CACHE_TTL"))
+        self.max_entries = int(max_entries if max_entries is not None else _setting("OUTLINE_CACHE_MAX_ENTRIES"))
+
+    def get(self, key: str) -> Optional[Panels]:
+        from django.db.models import F
+        from django.utils import timezone
+        from entry.models import OutlineCache
+
+        now = timezone.now()
+        row = (
+            OutlineCache.objects.filter(key=key, created_at__gte=now - timedelta(seconds=self.ttl))
+            .values_list("panels", flat=True)
+            .first()
+        )
+        if row is None:
+            return None
+        OutlineCache.objects.filter(key=key).update(last_used_at=now, hits=F("hits") + 1)
+        return row
+
+    def set(self, key: str, panels: Panels) -> None:
+        from django.utils import timezone
+        from entry.models import OutlineCache
+
+        now = timezone.now()
+        OutlineCache.objects.update_or_create(
+            key=key, defaults={"panels": panels, "created_at": now, "last_used_at": now, "hits": 0}
+        )
+        self.evict()
+
+    def evict(self) -> int:
+        """만료 항목 + 최대 개수 초과분(LRU) 삭제. 반환: 삭제 수"""
+        from django.utils import timezone
+        from entry.models import OutlineCache
+
+        deleted, _ = OutlineCache.objects.filter(
+            created_at__lt=timezone.now() - timedelta(seconds=self.ttl)
+        ).delete()
+        overflow = OutlineCache.objects.count() - self.max_entries
+        if overflow > 0:
+            stale_ids = list(
+                OutlineCache.objects.order_by("last_used_at", "id").values_list("id", flat=True)[:overflow]
+            )
+            deleted += OutlineCache.objects.filter(id__in=stale_ids).delete()[0]
+        return deleted
+
+
+_BACKENDS = {
+    "django": DjangoCacheBackend,
+    "db": DBBackend,
+    "none": NullBackend,
+}
+
+
+def get_backend():
+    name = str(_setting("OUTLINE_CACHE_BACKEND")).lower()
+    try:
+        from django.conf import settings  # type: ignore
+        if not settings.configured:
+            return NullBackend()
+    except Exception:
+        return NullBackend()
+    return _BACKENDS.get(name, NullBackend)()
+
+
+def _is_usable(panels: Panels) -> bool:
+    # 폴백(빈 장면) 결과는 캐시하지 않는다
+    return any((p.get("scene") or "").strip() for p in panels)
+
+
+def get_or_compute(
+    diary_text: str,
+    language: str,
+    model: str,
+    temperature: float,
+    compute: Callable[[], Panels],
+    backend=None,
+) -> Panels:
+    """캐시에 있으면 반환, 없으면 compute() 결과를 저장 후 반환"""
+    backend = backend or get_backend()
+    key = outline_cache_key(diary_text, language, model, temperature)
+    try:
+        cached = backend.get(key)
+    except Exception:
+        cached = None
+    if cached is not None:
+        return cached
+
+    panels = compute()
+    if _is_usable(panels):
+        try:
+            backend.set(key, panels)
+        except Exception:
+            pass
+    return panels
@@ -14,116 +14,38 @@ OpenAI 기반 일기 → 프롬프트 변환 → 이미지 생성 파이프라
 from __future__ import annotations
 
 import base64
-import os
-import re
+import logging
 from pathlib import Path
-from typing import Optional, Tuple, Dict, Any, List
+from typing import Callable, Optional, Tuple, Dict, Any, List, Union
 
-try:
-    # OpenAI Python SDK v1
-    from openai import OpenAI  # type: ignore
-except Exception:  # pragma: no cover - optional import
-    OpenAI = None  # type: ignore
-
-try:
-    from dotenv import load_dotenv  # type: ignore
-except Exception:  # pragma: no cover
-    load_dotenv = None  # type: ignore
+from .. import metrics
+from . import client as openai_client
+from .client import setting as _setting
+from .prompt import GLOBAL_STYLE_BLOCK
+from .styles import StyleTemplate, as_template, template_for
 
 
 BASE_DIR = Path(__file__).resolve().parents[2]
 PROJECT_ROOT = BASE_DIR
 MEDIA_DIR = PROJECT_ROOT / "media" / "generated"
 
+logger = logging.getLogger(__name__)
+
 
 def _ensure_env_loaded() -> None:
-    """.env를 로드하고 OPENAI_API 키를 환경변수로 노출한다."""
-    if load_dotenv is not None:
-        env_path = PROJECT_ROOT / ".env"
-        if env_path.exists():
-            load_dotenv(dotenv_path=env_path)
-
-    api_key = (
-        os.getenv("OPENAI_API")
-        or os.getenv("OPENAI_API_KEY")
-        or os.getenv("OPENAI_API_TOKEN")
-    )
-    if api_key:
-        os.environ.setdefault("OPENAI_API_KEY", api_key)
+    """.env를 로드하고 OPENAI_API 키를 환경변수로 노출한다. (프로세스당 1회)"""
+    openai_client.ensure_env_loaded()
 
 
 # ───────────────────────────
-# 스타일 / 레이아웃 / 네거티브
+# 일기 → 4패널 구조화 (JSON)  → 프롬프트 렌더
 # ───────────────────────────
 
-def _doodle_global_style_block() -> str:
-    # '하찮은 그림' 고정 스타일 (말풍선/톤/음영 등 제거)
-    return (
-        "[GLOBAL STYLE]\n"
-        "Ultra-simple black-and-white doodle, childlike and amateurish.\n"
-        "Single-weight clean line art, minimal detail, white background.\n"
-        "Stick-figure-like proportions, naive faces, thin black frames.\n"
-        "Short caption under each panel; no speech balloons.\n"
-        "No color, no shading, no hatching, no gradients, no photorealism.\n"
-    )
+OUTLINE_MODEL = "gpt-4o-mini"
+OUTLINE_TEMPERATURE = 0.3
 
 
-def _force_2x2_layout_block() -> str:
-    # 2x2 고정 및 '정확히 4컷' 강조
-    return (
-        "[LAYOUT]\n"
-        "A comic strip with EXACTLY four panels in a 2x2 grid (no more than four).\n"
-        "Top-left: Panel 1, top-right: Panel 2, bottom-left: Panel 3, bottom-right: Panel 4.\n"
-        "Equal panel sizes, clear white gutters, thin visible borders.\n"
-        "Do NOT draw 3x2, 1x6, 3x3, collage, storyboard, or any extra frames.\n"
-    )
-
-
-def _ensure_negative_prompt(text: str) -> str:
-    multi_panel_block = (
-        "6-panel, 9-panel, 3x2 grid, 3x3 grid, storyboard, collage, thumbnail sheet, "
-        "comic page layout, more than four panels, extra frames, split panels, "
-        "speech balloons, manga tones, shading, gradients, color, photorealism"
-    )
-    if "[NEGATIVE PROMPT]" not in text:
-        return text.rstrip() + "\n\n[NEGATIVE PROMPT]\n" + multi_panel_block + "\n"
-    neg_re = re.compile(r"(\[NEGATIVE PROMPT\]\s*)([\s\S]*)\Z")
-    return neg_re.sub(lambda m: m.group(1) + (m.group(2).strip() + ", " if m.group(2).strip() else "") + multi_panel_block + "\n", text)
-
-
-def _normalize_layout_to_2x2(prompt_text: str) -> str:
-    """[LAYOUT] 섹션을 2x2 고정 블록으로 대체/추가"""
-    layout_re = re.compile(r"\[LAYOUT\][\s\S]*?(?=\n\[PANEL|\n\[NEGATIVE PROMPT|\Z)")
-    if layout_re.search(prompt_text):
-        prompt_text = layout_re.sub(_force_2x2_layout_block(), prompt_text)
-    else:
-        prompt_text = _force_2x2_layout_block() + "\n" + prompt_text
-    return prompt_text
-
-
-def _clamp_to_four_panels(prompt_text: str) -> str:
-    """[PANEL N] 블록을 최대 4개로 제한(5번째 이상 제거)"""
-    panel_re = re.compile(r"\n\[PANEL\s*\d+[^\]]*\][\s\S]*?(?=\n\[PANEL|\n\[NEGATIVE PROMPT|\Z)")
-    panels = panel_re.findall("\n" + prompt_text)
-    if not panels:
-        return prompt_text
-    kept = panels[:4]
-    prompt_wo_panels = panel_re.sub("", "\n" + prompt_text)
-    neg_re = re.compile(r"\n\[NEGATIVE PROMPT\]")
-    m = neg_re.search(prompt_wo_panels)
-    joined_panels = "".join(kept)
-    if m:
-        idx = m.start()
-        prompt_text = prompt_wo_panels[:idx] + joined_panels + prompt_wo_panels[idx:]
-    else:
-        prompt_text = prompt_wo_panels + joined_panels
-    return prompt_text.strip()
-
-
-# ───────────────────────────
-# 일기 → 4패널 구조화 (JSON)  → 프롬프트 렌더
-# ───────────────────────────
-
+@metrics.timed(metrics.STAGE_SECONDS, stage="outline")
 def _outline_diary_into_4_panels(diary_text: str, language: str = "en") -> List[Dict[str, Any]]:
     """
     일기를 정확히 4개의 장면으로 압축 (Hook / Complication / HighPoint / Resolution).
@@ -133,13 +55,13 @@ def _outline_diary_into_4_panels(diary_text: str, language: str = "en") -> List[
     if not text:
         return [{"scene":"", "caption":"", "emotion":""} for _ in range(4)]
 
-    if OpenAI is None:
+    client = openai_client.get_client()
+    if client is None:
         # 폴백: 텍스트 4등분
         lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
         chunks = [" ".join(lines[i::4]) for i in range(4)] or ["", "", "", ""]
         return [{"scene": c[:120], "caption": c[:40], "emotion": ""} for c in chunks]
 
-    client = OpenAI()
     lang = "English" if language.lower().startswith("en") else "Korean"
 
     system = (
@@ -162,9 +84,9 @@ DIARY:
 {text}
 """
     import json
-    resp = client.chat.completions.create(
-        model="gpt-4o-mini",
-        temperature=0.3,
+    resp = openai_client.chat_completion(
+        model=OUTLINE_MODEL,
+        temperature=OUTLINE_TEMPERATURE,
         response_format={"type": "json_object"},
         messages=[{"role": "system", "content": system}, {"role": "user", "content": user}],
     )
@@ -178,46 +100,35 @@ DIARY:
         return [{"scene":"", "caption":"", "emotion":""} for _ in range(4)]
 
 
-def _render_prompt(style_template: str, panels: List[Dict[str, Any]]) -> str:
-    """선택된 스타일 템플릿과 4패널 데이터를 결합해 최종 프롬프트를 생성."""
-    style_template = (style_template or "").strip()
-    # 스타일 템플릿이 주어지면 그대로 사용, 없으면 기본 '하찮은 그림' 스타일과 2x2 레이아웃 사용
-    if style_template:
-        header = style_template.rstrip() + "\n\n"
-    else:
-        header = _doodle_global_style_block() + "\n" + _force_2x2_layout_block() + "\n\n"
-
-    def ptext(idx: int, p: Dict[str, Any]) -> str:
-        scene = (p.get("scene") or "").strip()
-        emo   = (p.get("emotion") or "").strip()
-        cap   = (p.get("caption") or "").strip()
-        body = f"Scene: {scene}\n"
-        if emo:
-            body += f"Emotion: {emo}\n"
-        if cap:
-            body += f"Caption: {cap}\n"
-        return f"[PANEL {idx}]\n{body}"
-
-    # 정확히 4개만
-    p1 = ptext(1, panels[0] if len(panels) > 0 else {})
-    p2 = ptext(2, panels[1] if len(panels) > 1 else {})
-    p3 = ptext(3, panels[2] if len(panels) > 2 else {})
-    p4 = ptext(4, panels[3] if len(panels) > 3 else {})
-
-    prompt = header + "\n".join([p1, p2, p3, p4]) + "\n"
-    prompt = _ensure_negative_prompt(prompt)
-    prompt = _normalize_layout_to_2x2(prompt)
-    prompt = _clamp_to_four_panels(prompt)
-    return prompt
+def outline_diary(diary_text: str, language: str = "en") -> List[Dict[str, Any]]:
+    """
+    캐시 우선 아웃라인. 일기 텍스트/언어가 같으면 LLM을 다시 부르지 않는다
+    (스타일만 바꿔 재생성할 때 네트워크 왕복 없음).
+    """
+    from . import outline_cache
+
+    return outline_cache.get_or_compute(
+        diary_text,
+        language,
+        OUTLINE_MODEL,
+        OUTLINE_TEMPERATURE,
+        lambda: _outline_diary_into_4_panels(diary_text, language=language),
+    )
+
+
+def _render_prompt(style_template: Union[str, StyleTemplate, None], panels: List[Dict[str, Any]]) -> str:
+    """선택된 스타일 템플릿과 4패널 데이터를 결합해 최종 프롬프트를 생성 (2x2/네거티브 구조는 prompt.py 참고)."""
+    # 템플릿이 없으면 기본 '하찮은 그림' 스타일과 2x2 레이아웃 사용
+    return as_template(style_template).prompt.render(panels)
 
 
-def build_prompt_from_diary(diary_text: str, style_template: str, language: str = "en") -> str:
+def build_prompt_from_diary(diary_text: str, style_template: Union[str, StyleTemplate, None], language: str = "en") -> str:
     """
     일기를 sample_prompt 스타일로 변환하되, 반드시 2x2(4패널)만 생성되도록 강제.
     - style_template 인자로 뭐가 오든, 내부 '하찮은 그림' 스타일+2x2 레이아웃로 통일.
     """
     _ensure_env_loaded()
-    panels = _outline_diary_into_4_panels(diary_text, language=language)
+    panels = outline_diary(diary_text, language=language)
     prompt = _render_prompt(style_template=style_template, panels=panels)
     return prompt
 
@@ -226,6 +137,7 @@ def build_prompt_from_diary(diary_text: str, style_template: str, language: str
 # 이미지 생성 (URL 우선 반환)
 # ───────────────────────────
 
+@metrics.timed(metrics.STAGE_SECONDS, stage="image")
 def generate_image(prompt: str, size: str = "1024x1024") -> Tuple[Optional[str], Optional[Path]]:
     """
     DALL·E 3로 이미지를 생성한다.
@@ -235,13 +147,11 @@ def generate_image(prompt: str, size: str = "1024x1024") -> Tuple[Optional[str],
     """
     _ensure_env_loaded()
 
-    if OpenAI is None:
+    if openai_client.get_client() is None:
         return None, None
 
-    client = OpenAI()
-
     # size는 1024x1024 고정
-    resp = client.images.generate(
+    resp = openai_client.image_generation(
         model="dall-e-3",
         prompt=prompt,
         size=size,
@@ -265,30 +175,280 @@ def generate_image(prompt: str, size: str = "1024x1024") -> Tuple[Optional[str],
     return None, None
 
 
+@metrics.timed(metrics.STAGE_SECONDS, stage="panel_image")
+def generate_image_bytes(prompt: str, size: str = "1024x1024") -> Optional[bytes]:
+    """DALL·E 3 이미지를 base64로 받아 bytes로 반환 (임시 URL 다운로드 왕복 없음)"""
+    _ensure_env_loaded()
+
+    if openai_client.get_client() is None:
+        return None
+
+    resp = openai_client.image_generation(
+        model="dall-e-3",
+        prompt=prompt,
+        size=size,
+        n=1,
+        response_format="b64_json",
+    )
+    b64 = getattr(resp.data[0], "b64_json", None)
+    return base64.b64decode(b64) if b64 else None
+
+
+# ───────────────────────────
+# 패널별 병렬 생성 모드 (4컷을 각각 생성 → Pillow로 2x2 합성)
+# ───────────────────────────
+
+MODE_SINGLE = "single"   # 한 장에 2x2를 그리도록 프롬프트로 강제 (기존 방식)
+MODE_PANELS = "panels"   # 패널 4장을 동시에 생성해 로컬에서 합성
+
+ProgressCallback = Callable[..., None]
+
+
+def _emit(callback: Optional[ProgressCallback], stage: str, **data) -> None:
+    """진행 단계 알림 (콜백 실패가 생성 자체를 막지 않도록)"""
+    if callback is None:
+        return
+    try:
+        callback(stage, **data)
+    except Exception:
+        logger.warning("progress callback failed", extra={"stage": stage}, exc_info=True)
+
+
+def _single_panel_layout_block() -> str:
+    return (
+        "[LAYOUT]\n"
+        "A single comic panel: exactly one square frame, full-bleed composition.\n"
+        "No grid, no multiple panels, no borders, no captions or text inside the image.\n"
+    )
+
+
+def _render_panel_prompt(style_template: Union[str, StyleTemplate, None], panel: Dict[str, Any], index: int) -> str:
+    """패널 하나를 단독 이미지로 생성하기 위한 프롬프트 (섹션은 템플릿 로드 시 미리 나눠 둔 것 사용)"""
+    sections = as_template(style_template).sections
+    style = sections.get("GLOBAL STYLE")
+    style_block = f"[GLOBAL STYLE]\n{style}\n" if style else GLOBAL_STYLE_BLOCK
+
+    scene = (panel.get("scene") or "").strip()
+    emo = (panel.get("emotion") or "").strip()
+    body = f"Scene: {scene}\n"
+    if emo:
+        body += f"Emotion: {emo}\n"
+
+    negative = sections.get("NEGATIVE PROMPT", "").rstrip(", \n")
+    single_negative = "multiple panels, grid, collage, comic page layout, frames, borders, captions, text, speech balloons"
+    negative = f"{negative}, {single_negative}" if negative else single_negative
+
+    return (
+        style_block + "\n"
+        + _single_panel_layout_block() + "\n"
+        + f"[PANEL {index}]\n{body}\n"
+        + f"[NEGATIVE PROMPT]\n{negative}\n"
+    )
+
+
+def generate_panel_images(
+    style_template: Union[str, StyleTemplate, None],
+    panels: List[Dict[str, Any]],
+    size: str = "1024x1024",
+    only: Optional[List[int]] = None,
+    progress: Optional[ProgressCallback] = None,
+) -> Tuple[List[Optional[bytes]], List[str]]:
+    """
+    4개 패널을 스레드 풀에서 동시에 생성한다 (벽시계 시간 ≈ 이미지 1장).
+    only: 생성할 패널 번호(1~4) 목록. None이면 전체.
+    progress: 패널 하나가 도착할 때마다 image_received 이벤트 (호출 스레드에서)
+    패널 하나가 실패(API 오류/시간 초과)해도 나머지는 유지하고 그 자리는 None (나중에 그 패널만 재생성).
+    요청한 패널이 모두 실패하면 첫 오류를 그대로 올린다.
+    반환: (패널별 PNG bytes 또는 None, 패널별 프롬프트)
+    """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    panels = (list(panels) + [{}] * 4)[:4]
+    template = as_template(style_template)
+    prompts = [_render_panel_prompt(template, p, i + 1) for i, p in enumerate(panels)]
+    targets = [i for i in range(4) if only is None or (i + 1) in only]
+    _emit(progress, "prompt_rendered", panels=[i + 1 for i in targets])
+
+    results: List[Optional[bytes]] = [None] * 4
+    errors: List[BaseException] = []
+    with ThreadPoolExecutor(max_workers=max(1, len(targets))) as pool:
+        futures = {pool.submit(generate_image_bytes, prompts[i], size): i for i in targets}
+        _emit(progress, "image_requested", panels=[i + 1 for i in targets])
+        for done, future in enumerate(as_completed(futures), start=1):
+            i = futures[future]
+            error = future.exception()
+            if error is None:
+                results[i] = future.result()
+            else:
+                errors.append(error)
+                logger.warning("panel generation failed", extra={"panel": i + 1},
+                               exc_info=(type(error), error, error.__traceback__))
+            _emit(progress, "image_received", panel=i + 1, ok=results[i] is not None,
+                  progress=50 + 40 * done // len(targets))
+    if errors and all(results[i] is None for i in targets):
+        raise errors[0]
+    return results, prompts
+
+
+def panel_workdir(diary_id: int) -> Path:
+    """패널 모드 작업 파일 위치: 패널 PNG 4장, 아웃라인 JSON, 합성본"""
+    return MEDIA_DIR / f"diary_{diary_id}"
+
+
+def composite_path(diary_id: int) -> Path:
+    return panel_workdir(diary_id) / "composite.png"
+
+
+def _local_temp_url(diary_id: int) -> str:
+    """로컬 합성본을 내려주는 뷰 URL (캐시 무효화용 버전 쿼리 포함)"""
+    import time
+
+    try:
+        from django.urls import reverse  # type: ignore
+        base = reverse("temp_image", args=[diary_id])
+    except Exception:
+        base = str(composite_path(diary_id))
+    return f"{base}?v={int(time.time())}"
+
+
+@metrics.timed(metrics.STAGE_SECONDS, stage="composite")
+def _write_panels_and_composite(
+    diary_id: int,
+    panels: List[Dict[str, Any]],
+    images: List[Optional[bytes]],
+) -> Path:
+    """생성된 패널을 저장하고(기존 패널 유지) 2x2 합성본을 다시 만든다."""
+    import json
+    from .compose import composite_2x2, to_png_bytes
+
+    workdir = panel_workdir(diary_id)
+    workdir.mkdir(parents=True, exist_ok=True)
+    (workdir / "panels.json").write_text(json.dumps(panels, ensure_ascii=False), encoding="utf-8")
+
+    merged: List[Optional[bytes]] = []
+    for idx, data in enumerate(images, start=1):
+        panel_file = workdir / f"panel_{idx}.png"
+        if data:
+            panel_file.write_bytes(data)
+        elif panel_file.exists():
+            data = panel_file.read_bytes()
+        merged.append(data)
+
+    if not any(merged):
+        raise RuntimeError("패널 이미지 생성에 실패했습니다.")
+
+    captions = [(p.get("caption") or "").strip() for p in panels]
+    out = composite_path(diary_id)
+    out.write_bytes(to_png_bytes(composite_2x2(merged, captions)))
+    return out
+
+
+def _record_version(diary, prompt: str, **fields) -> None:
+    """생성 이력 기록 (실패해도 생성 결과는 유지)"""
+    try:
+        from entry.versions import record_generation
+
+        record_generation(diary, prompt, temp_image_url=diary.temp_image_url, **fields)
+    except Exception:
+        logger.warning("version record failed", extra={"diary_id": diary.id}, exc_info=True)
+
+
+def _generate_panels_for_diary(
+    diary,
+    template: StyleTemplate,
+    language: str,
+    only: Optional[List[int]] = None,
+    style: Optional[str] = None,
+    progress: Optional[ProgressCallback] = None,
+) -> str:
+    """패널 모드 생성 후 diary.temp_image_url/final_prompt 갱신. 반환: 저장한 프롬프트"""
+    import json
+
+    outline_file = panel_workdir(diary.id) / "panels.json"
+    if only and outline_file.exists():
+        # 일부 패널만 재생성: 기존 아웃라인 재사용 (LLM 호출 없음)
+        panels = json.loads(outline_file.read_text(encoding="utf-8"))
+        _emit(progress, "outline_done", reused=True)
+    else:
+        diary_text = f"Title: {diary.note}\nDate: {diary.posted_date}\n\n{diary.content}"
+        _ensure_env_loaded()
+        _emit(progress, "outline_started")
+        panels = outline_diary(diary_text, language=language)
+        _emit(progress, "outline_done", panels=len(panels))
+        only = None
+
+    images, prompts = generate_panel_images(template, panels, size="1024x1024", only=only, progress=progress)
+    _write_panels_and_composite(diary.id, panels, images)
+    # 실패한 패널은 빈 칸(또는 이전 그림)으로 합성 → 화면에서 그 패널만 재생성
+    failed = [i + 1 for i in range(4) if (only is None or (i + 1) in only) and images[i] is None]
+    _emit(progress, "composited", failed_panels=failed)
+
+    prompt = "\n\n".join(prompts)
+    diary.temp_image_url = _local_temp_url(diary.id)
+    diary.final_prompt = prompt
+    diary.save(update_fields=["temp_image_url", "final_prompt"])
+    _record_version(diary, prompt, style=style, mode=MODE_PANELS, panel=only[0] if only else None, outline=panels)
+    return prompt
+
+
+def regenerate_panel_for_diary(
+    diary_id: int,
+    panel_index: int,
+    style_path: Path = PROJECT_ROOT / "sample_prompt.txt",
+    language: str = "en",
+    style: Optional[str] = None,
+    progress: Optional[ProgressCallback] = None,
+) -> str:
+    """패널 모드로 생성된 일기의 패널 하나만 다시 생성하고 합성본을 갱신"""
+    from entry.models import DiaryModel  # 지연 import
+
+    if panel_index not in (1, 2, 3, 4):
+        raise ValueError("panel_index는 1~4 사이여야 합니다.")
+    diary = DiaryModel.objects.get(pk=diary_id)
+    return _generate_panels_for_diary(
+        diary, template_for(style, style_path), language, only=[panel_index], style=style, progress=progress,
+    )
+
+
 def generate_and_attach_image_to_diary(
     diary_id: int,
     style_path: Path = PROJECT_ROOT / "sample_prompt.txt",
     language: str = "en",
+    mode: Optional[str] = None,
+    style: Optional[str] = None,
+    progress: Optional[ProgressCallback] = None,
 ) -> Tuple[str, Optional[str], Optional[Path]]:
     """
     특정 DiaryModel(id)에 대해 프롬프트 생성 및 이미지 생성 후
     diary.image_url에 URL(또는 로컬 파일 경로)을 저장한다.
+    mode: 'single'(기본, 한 장에 2x2) 또는 'panels'(패널별 병렬 생성 후 합성).
+          None이면 설정 CARTOON_GENERATION_MODE 사용.
+    style: 생성 이력(CartoonVersion)에 남길 스타일 이름 (simple/ani/real)
+    progress: 단계 알림 콜백 progress(stage, **data) (outline_started → ... → image_received)
     """
     from entry.models import DiaryModel  # 지연 import
 
     diary = DiaryModel.objects.get(pk=diary_id)
-    diary_text = f"Title: {diary.note}\nDate: {diary.posted_date}\n\n{diary.content}"
+    template = template_for(style, style_path)
 
-    style_text = ""
-    try:
-        if style_path and Path(style_path).exists():
-            style_text = Path(style_path).read_text(encoding="utf-8")
-    except Exception:
-        style_text = ""
+    mode = mode or _setting("CARTOON_GENERATION_MODE", MODE_SINGLE)
+    if mode == MODE_PANELS:
+        prompt = _generate_panels_for_diary(diary, template, language, style=style, progress=progress)
+        return prompt, None, composite_path(diary.id)
 
-    prompt = build_prompt_from_diary(diary_text, style_template=style_text, language=language)
+    diary_text = f"Title: {diary.note}\nDate: {diary.posted_date}\n\n{diary.content}"
+
+    # build_prompt_from_diary와 같지만 아웃라인을 이력에 남기기 위해 풀어서 호출
+    _ensure_env_loaded()
+    _emit(progress, "outline_started")
+    panels = outline_diary(diary_text, language=language)
+    _emit(progress, "outline_done", panels=len(panels))
+    prompt = _render_prompt(style_template=template, panels=panels)
+    _emit(progress, "prompt_rendered", chars=len(prompt))
 
+    _emit(progress, "image_requested")
     url, local_path = generate_image(prompt, size="1024x1024")
+    _emit(progress, "image_received", ok=bool(url or local_path))
 
     if url:
         diary.temp_image_url = url
@@ -302,19 +462,24 @@ def generate_and_attach_image_to_diary(
     # 최종 프롬프트 저장
     diary.final_prompt = prompt
     diary.save(update_fields=["temp_image_url", "final_prompt"])
+    _record_version(diary, prompt, style=style, mode=MODE_SINGLE, outline=panels)
     return prompt, url, local_path
 
 
-def save_temp_image_to_s3(diary_id: int) -> Optional[str]:
+@metrics.timed(metrics.STAGE_SECONDS, stage="save")
+def save_temp_image_to_s3(diary_id: int, storage=None) -> Optional[str]:
     """
-    DiaryModel의 temp_image_url에서 이미지를 다운로드하고
-    S3에 업로드한 후 image_url에 저장
+    DiaryModel의 temp_image_url 이미지를 내용 주소(<sha256>.png)로 S3에 저장한 후 image_url에 기록
+    - 임시 URL은 청크 단위로 받으면서 해시 계산 (1MB 초과분은 임시 파일, 전체를 메모리에 올리지 않음)
+    - 같은 내용이 이미 저장돼 있으면 업로드/파생 이미지 생성 없이 기존 객체를 참조 (entry.blobs)
+    - 처음 저장하는 이미지면 썸네일/미리보기/개별 컷 파생 이미지도 같은 스토리지에 저장
+    storage: 테스트/벤치마크용 스토리지 주입 (기본 settings.CARTOON_STORAGE)
     반환: S3 URL (성공 시)
     """
     import requests
-    from io import BytesIO
-    from datetime import datetime
+    from entry import blobs
     from entry.models import DiaryModel
+    from .transfer import file_digest, spool_url
 
     try:
         # 1. DiaryModel 조회
@@ -323,42 +488,70 @@ def save_temp_image_to_s3(diary_id: int) -> Optional[str]:
         if not diary.temp_image_url:
             return None
 
-        # 2. temp_image_url에서 이미지 다운로드
-        response = requests.get(diary.temp_image_url, timeout=30)
-        response.raise_for_status()
-        image_data = BytesIO(response.content)
+        if storage is None:
+            from diary.storages import cartoon_storage
+            # 기본 CartoonStorage (media/cartoon/ 폴더에 저장), settings.CARTOON_STORAGE로 교체 가능
+            storage = cartoon_storage()
 
-        # 3. S3에 업로드
+        image_data = None
         try:
-            from django.conf import settings
-            from diary.storages import CartoonStorage
-
-            # 파일명 생성: diary_{id}_{timestamp}.png
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            file_name = f"diary_{diary_id}_{timestamp}.png"
-
-            # CartoonStorage 사용 (media/cartoon/ 폴더에 저장)
-            storage = CartoonStorage()
-            saved_path = storage.save(file_name, image_data)
-
-            # S3 URL 생성
-            s3_url = storage.url(saved_path)
-
-            # 4. image_url에 저장
-            diary.image_url = s3_url
-            diary.save(update_fields=["image_url"])
-
-            return s3_url
-
-        except Exception as e:
-            print(f"S3 upload failed: {e}")
+            # 2. temp 이미지 받기 + sha256: 패널 모드 합성본(로컬 파일) 또는 OpenAI 임시 URL
+            # 다운로드와 업로드(필요할 때만)를 한 구간으로 잰다
+            with metrics.timed(metrics.STAGE_SECONDS, stage="transfer"):
+                if not diary.temp_image_url.startswith(("http://", "https://")):
+                    local_file = composite_path(diary_id)
+                    if not local_file.exists():
+                        return None
+                    image_data = open(local_file, "rb")
+                    digest, size = file_digest(image_data)
+                else:
+                    image_data, digest, size = spool_url(diary.temp_image_url)
+
+                # 3. 같은 내용이 없을 때만 업로드 (멀티파트)
+                blob, _ = blobs.store(storage, image_data, digest, size)
+
+            # 4. 파생 이미지: blob을 처음 만들 때(또는 이전에 실패했을 때)만. 실패해도 원본 저장은 유지
+            if blob.derived is None:
+                try:
+                    from .derivatives import save_derivatives
+
+                    image_data.seek(0)
+                    with metrics.timed(metrics.STAGE_SECONDS, stage="derivatives"):
+                        blobs.set_derived(blob, save_derivatives(storage, digest, image_data))
+                except Exception:
+                    logger.warning("derivative generation failed", extra={"diary_id": diary.id}, exc_info=True)
+
+            # 5. image_url에 저장
+            derived = blob.derived or {}
+            diary.image_url = blob.url
+            diary.image_blob = blob
+            diary.thumbnail_url = derived.get("thumbnail_url")
+            diary.preview_url = derived.get("preview_url")
+            diary.panel_urls = derived.get("panel_urls")
+            diary.save(update_fields=["image_url", "image_blob", "thumbnail_url", "preview_url", "panel_urls", "updated_at"])
+
+            # 6. 생성 이력에 저장된 이미지 기록 (이 버전이 대표)
+            try:
+                from entry.versions import attach_saved_image
+
+                attach_saved_image(diary, blob.key, blob.url, derived, blob=blob)
+            except Exception:
+                logger.warning("version update failed", extra={"diary_id": diary.id}, exc_info=True)
+
+            return blob.url
+
+        except requests.RequestException as e:
+            logger.warning("image download failed", extra={"diary_id": diary.id, "error": str(e)})
+            return None
+        except Exception:
+            logger.exception("image upload failed", extra={"diary_id": diary.id})
             return None
+        finally:
+            if image_data is not None:
+                image_data.close()
 
     except DiaryModel.DoesNotExist:
         return None
-    except requests.RequestException as e:
-        print(f"Image download failed: {e}")
-        return None
 
 
 def run_sample(
@@ -371,13 +564,7 @@ def run_sample(
     반환: (prompt_text, url, local_path)
     """
     diary_text = diary_path.read_text(encoding="utf-8")
-    style_text = ""
-    try:
-        if style_path and Path(style_path).exists():
-            style_text = Path(style_path).read_text(encoding="utf-8")
-    except Exception:
-        style_text = ""
-    prompt = build_prompt_from_diary(diary_text, style_template=style_text, language=language)
+    prompt = build_prompt_from_diary(diary_text, style_template=template_for(path=style_path), language=language)
     url, local_path = generate_image(prompt, size="1024x1024")
     return prompt, url, local_path
 
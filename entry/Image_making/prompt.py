@@ -0,0 +1,132 @@
+"""
+스타일 템플릿 → 2x2 4컷 프롬프트 조립 (정규식 후처리 없이 한 번에).
+
+템플릿은 로드할 때 compile_prompt()로 한 번 조각을 나눠 두고(StyleTemplate.prompt),
+요청마다 CompiledPrompt.render(panels)가 패널 블록만 만들어 join 한 번으로 최종 프롬프트를 만든다.
+
+조립 규칙 (이전 _ensure_negative_prompt → _normalize_layout_to_2x2 → _clamp_to_four_panels 결과와 같음):
+- 첫 [PANEL n] / [NEGATIVE PROMPT] 앞(머리말)의 [LAYOUT] 섹션은 2x2 고정 블록으로 교체, 없으면 맨 앞에 추가
+- 템플릿에 적힌 [PANEL n] 블록이 먼저 오고, 남은 칸(합쳐서 4개까지)을 생성된 패널로 채움
+- [NEGATIVE PROMPT]는 항상 맨 끝. 템플릿에 없으면 다중 패널 금지 블록으로 만든다
+  (템플릿에 있으면 그 내용 그대로 두고, 다중 패널 금지 블록은 4번째 생성 패널 뒤에 붙는다)
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+
+# '하찮은 그림' 기본 스타일 (말풍선/톤/음영 등 제거)
+GLOBAL_STYLE_BLOCK = (
+    "[GLOBAL STYLE]\n"
+    "Ultra-simple black-and-white doodle, childlike and amateurish.\n"
+    "Single-weight clean line art, minimal detail, white background.\n"
+    "Stick-figure-like proportions, naive faces, thin black frames.\n"
+    "Short caption under each panel; no speech balloons.\n"
+    "No color, no shading, no hatching, no gradients, no photorealism.\n"
+)
+
+# 2x2 고정 및 '정확히 4컷' 강조
+LAYOUT_2X2_BLOCK = (
+    "[LAYOUT]\n"
+    "A comic strip with EXACTLY four panels in a 2x2 grid (no more than four).\n"
+    "Top-left: Panel 1, top-right: Panel 2, bottom-left: Panel 3, bottom-right: Panel 4.\n"
+    "Equal panel sizes, clear white gutters, thin visible borders.\n"
+    "Do NOT draw 3x2, 1x6, 3x3, collage, storyboard, or any extra frames.\n"
+)
+
+MULTI_PANEL_NEGATIVE = (
+    "6-panel, 9-panel, 3x2 grid, 3x3 grid, storyboard, collage, thumbnail sheet, "
+    "comic page layout, more than four panels, extra frames, split panels, "
+    "speech balloons, manga tones, shading, gradients, color, photorealism"
+)
+
+# 템플릿이 비어 있을 때 쓰는 기본 템플릿
+DEFAULT_TEMPLATE = (GLOBAL_STYLE_BLOCK + "\n" + LAYOUT_2X2_BLOCK).strip()
+
+MAX_PANELS = 4
+NEGATIVE_TAG = "NEGATIVE PROMPT"
+
+# 줄 맨 앞의 '[태그]' (템플릿 로드 시에만 사용)
+_HEADER_RE = re.compile(r"^\[([^\]\n]+)\]", re.MULTILINE)
+_PANEL_TAG_RE = re.compile(r"PANEL\s*\d")
+
+
+def panel_text(index: int, panel: Dict[str, Any]) -> str:
+    """생성된 패널 하나의 블록 ('[PANEL n]' + Scene/Emotion/Caption 줄)"""
+    scene = (panel.get("scene") or "").strip()
+    emo = (panel.get("emotion") or "").strip()
+    cap = (panel.get("caption") or "").strip()
+    body = f"Scene: {scene}\n"
+    if emo:
+        body += f"Emotion: {emo}\n"
+    if cap:
+        body += f"Caption: {cap}\n"
+    return f"[PANEL {index}]\n{body}"
+
+
+class CompiledPrompt:
+    """조각으로 나눠 둔 템플릿. render()는 패널 블록을 만들어 한 번에 이어 붙이기만 한다"""
+
+    __slots__ = ("head", "fixed_panels", "slots", "last_suffix", "negative")
+
+    def __init__(self, head: str, fixed_panels: Sequence[str], negative: Optional[str]):
+        self.head = head
+        self.fixed_panels: Tuple[str, ...] = tuple(fixed_panels[:MAX_PANELS])
+        self.slots = MAX_PANELS - len(self.fixed_panels)
+        if negative is None:
+            self.last_suffix = "\n"
+            self.negative = "\n[NEGATIVE PROMPT]\n" + MULTI_PANEL_NEGATIVE
+        else:
+            self.last_suffix = ", " + MULTI_PANEL_NEGATIVE + "\n"
+            self.negative = negative
+
+    def render(self, panels: Sequence[Dict[str, Any]]) -> str:
+        parts: List[str] = [self.head, *self.fixed_panels]
+        for i in range(self.slots):
+            text = panel_text(i + 1, panels[i] if i < len(panels) else {})
+            if i == MAX_PANELS - 1:
+                parts.append("\n" + text.rstrip() + self.last_suffix)
+            else:
+                parts.append("\n" + text)
+        parts.append(self.negative)
+        return "".join(parts)
+
+
+def compile_prompt(template: str) -> CompiledPrompt:
+    """템플릿 문자열 → CompiledPrompt (빈 템플릿이면 기본 '하찮은 그림' 스타일 + 2x2 레이아웃)"""
+    text = (template or "").strip() or DEFAULT_TEMPLATE
+    headers = [(m.start(), m.group(1)) for m in _HEADER_RE.finditer(text)]
+
+    negative_at = next((pos for pos, tag in headers if tag == NEGATIVE_TAG), None)
+    # 템플릿 뒤에 생성 패널이 빈 줄 하나를 두고 이어진다고 보고 위치를 잡는다
+    extended = text + "\n\n"
+    body_end = negative_at if negative_at is not None else len(extended)
+    panel_starts = [pos for pos, tag in headers if pos < body_end and _PANEL_TAG_RE.match(tag)]
+
+    # 패널 블록: 앞 줄바꿈 포함, 다음 블록 앞 줄바꿈 하나 전까지
+    bounds = panel_starts + [body_end]
+    fixed_panels = ["\n" + extended[start:end - 1] for start, end in zip(bounds, bounds[1:])]
+
+    head_end = bounds[0]
+    head = _replace_layout(extended[:head_end], [(pos, tag) for pos, tag in headers if pos < head_end])
+    negative = "\n" + text[negative_at:] if negative_at is not None else None
+    return CompiledPrompt(head[:-1], fixed_panels, negative)
+
+
+def _replace_layout(head: str, headers: List[Tuple[int, str]]) -> str:
+    """머리말의 [LAYOUT] 섹션을 2x2 고정 블록으로 (다음 섹션 앞 빈 줄은 유지). 없으면 맨 앞에 추가"""
+    layouts = [i for i, (_, tag) in enumerate(headers) if tag == "LAYOUT"]
+    if not layouts:
+        return LAYOUT_2X2_BLOCK + "\n" + head
+    parts = []
+    cursor = 0
+    for i in layouts:
+        start = headers[i][0]
+        end = headers[i + 1][0] if i + 1 < len(headers) else len(head)
+        parts.append(head[cursor:start])
+        parts.append(LAYOUT_2X2_BLOCK)
+        cursor = end - 1
+    parts.append(head[cursor:])
+    return "".join(parts)
@@ -0,0 +1,239 @@
+"""
+스타일 프롬프트 템플릿 레지스트리.
+
+- CARTOON_STYLE_DIR의 sample_prompt_<이름>.txt 를 앱 시작 시(EntryConfig.ready) 한 번 읽어
+  섹션 분리와 4컷 프롬프트 조립 준비(prompt.compile_prompt)까지 해 둔다 (요청마다 파일 I/O·정규식 없음)
+- 파일을 고치거나 새 파일을 넣으면 다음 조회 때 반영 (mtime 확인은 CARTOON_STYLE_RELOAD_SECONDS 간격)
+- 화면의 테마 값(Theme1~3)도 여기서 스타일 이름으로 바꾼다
+
+사용 예:
+    from entry.Image_making.styles import get_registry
+    template = get_registry().get('ani')      # 없는 이름이면 기본 스타일
+    template.sections['GLOBAL STYLE']
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from .client import setting as _setting
+from .prompt import CompiledPrompt, compile_prompt
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+logger = logging.getLogger(__name__)
+
+FILE_PREFIX = "sample_prompt_"
+FILE_SUFFIX = ".txt"
+DEFAULT_STYLE = "simple"
+
+# 작성 화면의 테마 버튼 값 → 스타일 이름
+THEME_ALIASES = {
+    "Theme1": "simple",
+    "Theme2": "ani",
+    "Theme3": "real",
+}
+
+_SECTION_RE = re.compile(r"^\[([^\]\n]+)\][ \t]*$", re.MULTILINE)
+
+
+def split_sections(template: str) -> Dict[str, str]:
+    """'[SECTION]' 헤더 기준으로 템플릿을 나눈다. 반환: {헤더: 본문}"""
+    sections: Dict[str, str] = {}
+    matches = list(_SECTION_RE.finditer(template or ""))
+    for i, m in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(template)
+        sections[m.group(1).strip().upper()] = template[m.end():end].strip()
+    return sections
+
+
+class StyleTemplate:
+    """파싱된 스타일 템플릿 (읽기 전용으로 공유)"""
+
+    __slots__ = ("name", "path", "mtime", "text", "sections", "prompt")
+
+    def __init__(self, name: str, text: str, path: Optional[Path] = None, mtime: float = 0.0):
+        self.name = name
+        self.path = path
+        self.mtime = mtime
+        self.text = (text or "").strip()
+        self.sections = split_sections(self.text)
+        # 2x2 4컷 프롬프트 조각 (빈 템플릿이면 기본 스타일)
+        self.prompt: CompiledPrompt = compile_prompt(self.text)
+
+    @classmethod
+    def from_file(cls, path: Path, name: Optional[str] = None) -> "StyleTemplate":
+        path = Path(path)
+        return cls(name or style_name(path), path.read_text(encoding="utf-8"), path=path, mtime=path.stat().st_mtime)
+
+    def __bool__(self) -> bool:
+        return bool(self.text)
+
+    def __repr__(self) -> str:
+        return f"<StyleTemplate {self.name}>"
+
+
+EMPTY = StyleTemplate("", "")
+
+
+def style_name(path: Path) -> str:
+    stem = Path(path).name[:-len(FILE_SUFFIX)] if Path(path).name.endswith(FILE_SUFFIX) else Path(path).stem
+    return stem[len(FILE_PREFIX):] if stem.startswith(FILE_PREFIX) else stem
+
+
+def as_template(value: Union[str, StyleTemplate, None]) -> StyleTemplate:
+    """템플릿 문자열/객체 → StyleTemplate (문자열은 그 자리에서 파싱)"""
+    if isinstance(value, StyleTemplate):
+        return value
+    return StyleTemplate("", value) if value else EMPTY
+
+
+class StyleRegistry:
+    """스타일 이름 → StyleTemplate. 디렉터리/파일 mtime이 바뀌면 바뀐 파일만 다시 읽는다"""
+
+    def __init__(self, directory: Union[str, Path], reload_interval: float = 2.0, clock=time.monotonic):
+        self.directory = Path(directory)
+        self.reload_interval = reload_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._templates: Dict[str, StyleTemplate] = {}
+        # 이름 지정 없이 경로로 읽은 템플릿 (CLI --style 파일 등)
+        self._by_path: Dict[Path, StyleTemplate] = {}
+        self._dir_mtime: Optional[float] = None
+        self._checked_at: Optional[float] = None
+
+    def _scan(self) -> List[Path]:
+        try:
+            return sorted(
+                p for p in self.directory.iterdir()
+                if p.name.startswith(FILE_PREFIX) and p.name.endswith(FILE_SUFFIX) and p.is_file()
+            )
+        except FileNotFoundError:
+            return []
+
+    def load(self) -> "StyleRegistry":
+        """디렉터리 전체 다시 읽기 (바뀌지 않은 파일은 기존 객체 유지)"""
+        with self._lock:
+            self._reload_locked()
+        return self
+
+    def _reload_locked(self) -> None:
+        templates: Dict[str, StyleTemplate] = {}
+        for path in self._scan():
+            name = style_name(path)
+            try:
+                mtime = path.stat().st_mtime
+                current = self._templates.get(name)
+                if current is not None and current.path == path and current.mtime == mtime:
+                    templates[name] = current
+                else:
+                    templates[name] = StyleTemplate.from_file(path, name)
+            except OSError as e:
+                logger.warning("style template load failed", extra={"path": str(path), "error": str(e)})
+                if name in self._templates:
+                    templates[name] = self._templates[name]
+        self._templates = templates
+        try:
+            self._dir_mtime = self.directory.stat().st_mtime
+        except OSError:
+            self._dir_mtime = None
+        self._checked_at = self._clock()
+
+    def _changed(self) -> bool:
+        try:
+            if self.directory.stat().st_mtime != self._dir_mtime:
+                return True  # 파일 추가/삭제
+        except OSError:
+            return bool(self._templates)
+        for template in self._templates.values():
+            try:
+                if template.path.stat().st_mtime != template.mtime:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    def _refresh(self) -> None:
+        if self._checked_at is not None and self._clock() - self._checked_at < self.reload_interval:
+            return
+        with self._lock:
+            if self._checked_at is None or self._changed():
+                self._reload_locked()
+            else:
+                self._checked_at = self._clock()
+
+    def names(self) -> List[str]:
+        self._refresh()
+        return sorted(self._templates)
+
+    def resolve(self, value: Optional[str]) -> Optional[str]:
+        """스타일 이름/테마 값 → 등록된 스타일 이름 (모르면 None)"""
+        if not value:
+            return None
+        self._refresh()
+        name = THEME_ALIASES.get(value, value)
+        return name if name in self._templates else None
+
+    def get(self, name: Optional[str] = None) -> StyleTemplate:
+        """스타일 템플릿 (없는 이름이면 기본 스타일, 그것도 없으면 빈 템플릿)"""
+        self._refresh()
+        resolved = self.resolve(name) or DEFAULT_STYLE
+        return self._templates.get(resolved, EMPTY)
+
+    def get_path(self, path: Union[str, Path]) -> StyleTemplate:
+        """임의 경로의 템플릿 (mtime 기준 캐시, 파일이 없으면 빈 템플릿)"""
+        path = Path(path)
+        try:
+            mtime = path.stat().st_mtime
+        except OSError:
+            return EMPTY
+        cached = self._by_path.get(path)
+        if cached is None or cached.mtime != mtime:
+            try:
+                cached = StyleTemplate.from_file(path)
+            except OSError:
+                return EMPTY
+            self._by_path[path] = cached
+        return cached
+
+
+_registry: Optional[StyleRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> StyleRegistry:
+    """프로세스 공용 레지스트리 (CARTOON_STYLE_DIR, 기본 프로젝트 루트)"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                directory = _setting("CARTOON_STYLE_DIR", str(PROJECT_ROOT)) or str(PROJECT_ROOT)
+                interval = float(_setting("CARTOON_STYLE_RELOAD_SECONDS", 2.0))
+                _registry = StyleRegistry(directory, reload_interval=interval).load()
+    return _registry
+
+
+def set_registry(registry: Optional[StyleRegistry]) -> None:
+    """레지스트리 교체 (테스트용). None이면 다음 조회 때 설정값으로 다시 생성"""
+    global _registry
+    with _registry_lock:
+        _registry = registry
+
+
+def resolve_style(value: Optional[str]) -> Optional[str]:
+    return get_registry().resolve(value)
+
+
+def template_for(style: Optional[str] = None, path: Union[str, Path, None] = None) -> StyleTemplate:
+    """경로가 있으면 그 파일, 아니면 스타일 이름으로. 둘 다 없으면 빈 템플릿(기본 '하찮은 그림' 블록 사용)"""
+    if path:
+        return get_registry().get_path(path)
+    if style:
+        return get_registry().get(style)
+    return EMPTY
@@ -0,0 +1,140 @@
+"""
+이미지 전송 유틸 (다운로드 → 스토리지 업로드 스트리밍).
+
+전체 이미지를 메모리에 올리지 않고 CHUNK_SIZE 단위로 받는다.
+만화 원본 저장은 내용 주소(sha256) 이름이 필요하므로 spool_url()로 받으면서 해시를 계산한 뒤
+blobs.store()가 스토리지(S3 멀티파트)로 올린다. 다운로드 프록시는 open_url_stream()을 그대로 흘려보낸다.
+HTTP 연결은 프로세스 공용 requests.Session 으로 재사용.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import tempfile
+import threading
+from typing import BinaryIO, Callable, Iterator, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+CHUNK_SIZE = 64 * 1024
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 30
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """프로세스 공용 requests.Session (커넥션 풀 재사용)"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+
+class StreamingBody(io.RawIOBase):
+    """
+    청크 이터레이터를 읽기 전용 파일 객체로 감싼다 (seek 불가).
+    storage.save()/boto3 upload_fileobj 가 read(n)으로 필요한 만큼만 당겨 간다.
+    on_chunk 콜백으로 전송 중 해시 계산 등을 할 수 있다.
+    """
+
+    def __init__(self, chunks: Iterator[bytes], on_chunk: Optional[List[Callable[[bytes], None]]] = None):
+        super().__init__()
+        self._chunks = chunks
+        self._buffer = b""
+        self._on_chunk = list(on_chunk or [])
+        self.bytes_read = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def _next_chunk(self) -> bytes:
+        for chunk in self._chunks:
+            if chunk:
+                for callback in self._on_chunk:
+                    callback(chunk)
+                self.bytes_read += len(chunk)
+                return chunk
+        return b""
+
+    def readinto(self, b) -> int:
+        if not self._buffer:
+            self._buffer = self._next_chunk()
+            if not self._buffer:
+                return 0
+        n = min(len(b), len(self._buffer))
+        b[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        return n
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            return self.readall()
+        parts = []
+        remaining = size
+        while remaining > 0:
+            if not self._buffer:
+                self._buffer = self._next_chunk()
+                if not self._buffer:
+                    break
+            part, self._buffer = self._buffer[:remaining], self._buffer[remaining:]
+            parts.append(part)
+            remaining -= len(part)
+        return b"".join(parts)
+
+
+def open_url_stream(
+    url: str,
+    session: Optional[requests.Session] = None,
+    chunk_size: int = CHUNK_SIZE,
+    on_chunk: Optional[List[Callable[[bytes], None]]] = None,
+):
+    """
+    URL을 스트리밍으로 연다. 반환: (response, StreamingBody)
+    호출 측에서 response.close() 필요.
+    """
+    session = session or get_http_session()
+    response = session.get(url, stream=True, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+    response.raise_for_status()
+    return response, StreamingBody(response.iter_content(chunk_size=chunk_size), on_chunk=on_chunk)
+
+
+def spool_url(url: str, session: Optional[requests.Session] = None, max_memory: int = 1024 * 1024):
+    """
+    URL 내용을 임시 파일(max_memory 초과분은 디스크)로 받으면서 sha256을 계산한다.
+    반환: (처음 위치로 되감은 파일 객체, sha256 hex, 바이트 수). 호출 측에서 close() 필요.
+    """
+    digest = hashlib.sha256()
+    spool = tempfile.SpooledTemporaryFile(max_size=max_memory)
+    response, body = open_url_stream(url, session=session, on_chunk=[digest.update, spool.write])
+    try:
+        while body.read(CHUNK_SIZE):
+            pass
+    except BaseException:
+        spool.close()
+        raise
+    finally:
+        response.close()
+    spool.seek(0)
+    return spool, digest.hexdigest(), body.bytes_read
+
+
+def file_digest(fileobj: BinaryIO, chunk_size: int = CHUNK_SIZE) -> Tuple[str, int]:
+    """파일 객체를 청크 단위로 읽어 (sha256 hex, 바이트 수). 읽은 뒤 처음 위치로 되감는다"""
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in iter(lambda: fileobj.read(chunk_size), b""):
+        digest.update(chunk)
+        size += len(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest(), size
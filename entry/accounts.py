@@ -0,0 +1,79 @@
+"""
+이메일 로그인 (대소문자 무시 이메일 조회 + 인증 백엔드 + 비밀번호 해시 비용 설정).
+
+- auth_user.email에는 Django 기본 인덱스가 없다 → 마이그레이션 0020에서
+  UNIQUE INDEX auth_user_email_ci_uniq ON auth_user (LOWER(email)) WHERE email <> '' 추가
+- 조회 SQL은 인덱스 식/조건과 글자 그대로 같아야 인덱스를 탄다 (email__iexact는 LIKE/UPPER라 전체 스캔)
+- 비밀번호 해시 반복 횟수는 settings.PASSWORD_HASH_ITERATIONS (0 = Django 기본값)
+  → 벤치마크/테스트에서 PBKDF2 비용을 낮춰 조회 성능만 측정
+
+settings:
+    AUTHENTICATION_BACKENDS = ['entry.accounts.EmailBackend', 'django.contrib.auth.backends.ModelBackend']
+    PASSWORD_HASHERS = ['entry.accounts.PBKDF2PasswordHasher', ...]
+"""
+
+from typing import Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import PBKDF2PasswordHasher as DjangoPBKDF2PasswordHasher
+from django.db.models import BooleanField
+from django.db.models.expressions import RawSQL
+
+
+EMAIL_INDEX = 'auth_user_email_ci_uniq'
+
+
+def normalize_email(email: Optional[str]) -> str:
+    return (email or '').strip().lower()
+
+
+def _email_condition(email: str) -> RawSQL:
+    """인덱스와 같은 식: LOWER(email) = %s AND email <> '' (빈 이메일 사용자는 인덱스에서 제외)"""
+    from django.db import connection
+
+    column = f'{connection.ops.quote_name(get_user_model()._meta.db_table)}.{connection.ops.quote_name("email")}'
+    return RawSQL(f"LOWER({column}) = %s AND {column} <> ''", [email], output_field=BooleanField())
+
+
+def users_with_email(email: Optional[str]):
+    """대소문자 무시 이메일 일치 사용자 QuerySet (LOWER(email) 인덱스 조회)"""
+    User = get_user_model()
+    email = normalize_email(email)
+    if not email:
+        return User.objects.none()
+    return User.objects.filter(_email_condition(email))
+
+
+def find_user_by_email(email: Optional[str]):
+    return users_with_email(email).first()
+
+
+def email_exists(email: Optional[str]) -> bool:
+    return users_with_email(email).exists()
+
+
+class EmailBackend(ModelBackend):
+    """이메일 + 비밀번호 인증 (username 자리에 이메일을 넣어도 됨)"""
+
+    def authenticate(self, request, username=None, password=None, email=None, **kwargs):
+        email = email or username
+        if not email or password is None or '@' not in email:
+            return None  # 이메일이 아니면 다음 백엔드(ModelBackend, username 로그인)로
+        user = find_user_by_email(email)
+        if user is None:
+            # 없는 이메일도 해시 한 번 만큼 시간을 써서 가입 여부가 응답 시간으로 드러나지 않게 (ModelBackend와 같음)
+            get_user_model()().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+
+class PBKDF2PasswordHasher(DjangoPBKDF2PasswordHasher):
+    """Django 기본 PBKDF2와 같은 형식. 반복 횟수만 settings.PASSWORD_HASH_ITERATIONS로 조정"""
+
+    @property
+    def iterations(self):
+        return getattr(settings, 'PASSWORD_HASH_ITERATIONS', 0) or DjangoPBKDF2PasswordHasher.iterations
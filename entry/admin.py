@@ -1,8 +1,35 @@
 from django.contrib import admin
-from .models import DiaryModel
+from .models import CartoonVersion, DiaryModel, GenerationJob, OutlineCache, ProductivityRollup
 
 # Register your models here.
 class DiaryModelAdmin(admin.ModelAdmin):
     list_display = ['note', 'posted_date', 'temp_image_url', 'image_url']
 
 admin.site.register(DiaryModel, DiaryModelAdmin)
+
+
+class GenerationJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'diary', 'status', 'style', 'attempts', 'created_at', 'finished_at']
+    list_filter = ['status']
+
+admin.site.register(GenerationJob, GenerationJobAdmin)
+
+
+class OutlineCacheAdmin(admin.ModelAdmin):
+    list_display = ['key', 'hits', 'created_at', 'last_used_at']
+
+admin.site.register(OutlineCache, OutlineCacheAdmin)
+
+
+class ProductivityRollupAdmin(admin.ModelAdmin):
+    list_display = ['author', 'period', 'start', 'count', 'total', 'streak']
+    list_filter = ['period']
+
+admin.site.register(ProductivityRollup, ProductivityRollupAdmin)
+
+
+class CartoonVersionAdmin(admin.ModelAdmin):
+    list_display = ['diary', 'number', 'style', 'mode', 'panel', 'is_pinned', 'created_at']
+    list_filter = ['mode', 'is_pinned']
+
+admin.site.register(CartoonVersion, CartoonVersionAdmin)
@@ -0,0 +1,263 @@
+"""
+생산성 집계 (ProductivityRollup) 갱신/조회.
+
+갱신: 일기 저장/삭제 시 (entry.signals) 그 일기의 날짜 버킷만 다시 계산
+    - day   : 그날 일기들 (author, posted_date 인덱스 범위, 보통 1건)
+    - week/month : 해당 기간의 day 행 합산 (최대 31행)
+    - 이후 날짜들의 누적합(cum_*)은 UPDATE 한 번, 연속 작성(streak)은 이어지는 날까지만 보정
+조회: 일기 테이블은 읽지 않고 집계 행만 사용
+    - 구간 평균/개수: day 행 누적합 2개로 계산 (구간 길이와 무관)
+    - 차트 시리즈: 요청 단위(day/week/month) 행 + 이동평균
+"""
+
+from bisect import bisect_left
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, Sum
+
+from .dates import day_filter, local_day
+from .models import DiaryModel, ProductivityRollup
+
+
+DAY = ProductivityRollup.PERIOD_DAY
+WEEK = ProductivityRollup.PERIOD_WEEK
+MONTH = ProductivityRollup.PERIOD_MONTH
+PERIODS = (DAY, WEEK, MONTH)
+
+# 이동평균 창 크기 (버킷 수)
+MOVING_WINDOWS = {DAY: 7, WEEK: 4, MONTH: 3}
+
+
+def period_start(day: date, period: str) -> date:
+    if period == WEEK:
+        return day - timedelta(days=day.weekday())
+    if period == MONTH:
+        return day.replace(day=1)
+    return day
+
+
+def period_end(start: date, period: str) -> date:
+    """버킷 끝 (다음 버킷 시작일, 미포함)"""
+    if period == WEEK:
+        return start + timedelta(days=7)
+    if period == MONTH:
+        return date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    return start + timedelta(days=1)
+
+
+def _rollups(author_id: int, period: str):
+    return ProductivityRollup.objects.filter(author_id=author_id, period=period)
+
+
+# ---------------------------------------------------------------------------
+# 갱신
+# ---------------------------------------------------------------------------
+
+def refresh_day(author_id: int, day: date) -> None:
+    """author의 day 날짜 버킷(일/주/월) 재계산"""
+    with transaction.atomic():
+        _refresh_day_row(author_id, day)
+        for period in (WEEK, MONTH):
+            _refresh_period_row(author_id, period, period_start(day, period))
+
+
+def refresh_for_diary(diary: DiaryModel) -> None:
+    if diary.author_id and diary.posted_date:
+        refresh_day(diary.author_id, local_day(diary.posted_date))
+
+
+def _refresh_day_row(author_id: int, day: date) -> None:
+    stats = DiaryModel.objects.filter(author_id=author_id, **day_filter(day)).aggregate(
+        count=Count('id'), total=Sum('productivity'), min_value=Min('productivity'), max_value=Max('productivity'),
+    )
+    count = stats['count'] or 0
+    total = stats['total'] or 0
+
+    days = _rollups(author_id, DAY)
+    row = days.select_for_update().filter(start=day).first()
+    old_count, old_total = (row.count, row.total) if row else (0, 0)
+
+    # 이후 날짜들의 누적합 보정 (UPDATE 1회)
+    if count != old_count or total != old_total:
+        days.filter(start__gt=day).update(
+            cum_count=F('cum_count') + (count - old_count),
+            cum_total=F('cum_total') + (total - old_total),
+        )
+
+    if count:
+        previous = days.filter(start__lt=day).order_by('-start').values('start', 'streak', 'cum_count', 'cum_total').first()
+        streak = previous['streak'] + 1 if previous and previous['start'] == day - timedelta(days=1) else 1
+        ProductivityRollup.objects.update_or_create(
+            author_id=author_id, period=DAY, start=day,
+            defaults={
+                'count': count,
+                'total': total,
+                'min_value': stats['min_value'],
+                'max_value': stats['max_value'],
+                'streak': streak,
+                'cum_count': (previous['cum_count'] if previous else 0) + count,
+                'cum_total': (previous['cum_total'] if previous else 0) + total,
+            },
+        )
+    else:
+        streak = 0
+        if row:
+            row.delete()
+
+    if (row is None) != (count == 0):
+        # 그날이 새로 생기거나 사라졌으면 이어지는 날들의 연속 일수만 다시 매김
+        _reflow_streaks(author_id, day, streak)
+
+
+def _reflow_streaks(author_id: int, day: date, streak: int) -> None:
+    following = _rollups(author_id, DAY).filter(start__gt=day).order_by('start').only('id', 'start', 'streak')
+    changed = []
+    expected = day + timedelta(days=1)
+    for row in following.iterator():
+        if row.start != expected:
+            break
+        streak += 1
+        if row.streak == streak:
+            break
+        row.streak = streak
+        changed.append(row)
+        expected += timedelta(days=1)
+    if changed:
+        ProductivityRollup.objects.bulk_update(changed, ['streak'])
+        # 연속 일수가 바뀐 기간의 최대값 갱신
+        touched = {(period, period_start(r.start, period)) for r in changed for period in (WEEK, MONTH)}
+        for period, start in sorted(touched):
+            _refresh_period_row(author_id, period, start)
+
+
+def _refresh_period_row(author_id: int, period: str, start: date) -> None:
+    stats = _rollups(author_id, DAY).filter(start__gte=start, start__lt=period_end(start, period)).aggregate(
+        count=Sum('count'), total=Sum('total'),
+        min_value=Min('min_value'), max_value=Max('max_value'), streak=Max('streak'),
+    )
+    if not stats['count']:
+        _rollups(author_id, period).filter(start=start).delete()
+        return
+    ProductivityRollup.objects.update_or_create(
+        author_id=author_id, period=period, start=start,
+        defaults={
+            'count': stats['count'],
+            'total': stats['total'],
+            'min_value': stats['min_value'],
+            'max_value': stats['max_value'],
+            'streak': stats['streak'],
+        },
+    )
+
+
+def rebuild(author_id: int) -> int:
+    """author의 집계를 처음부터 다시 만든다 (기존 데이터 백필용). 반환: day 행 수"""
+    rows: Dict[date, Dict[str, int]] = {}
+    for posted_date, value in (
+        DiaryModel.objects.filter(author_id=author_id).order_by('posted_date').values_list('posted_date', 'productivity')
+    ):
+        bucket = rows.setdefault(local_day(posted_date), {'count': 0, 'total': 0, 'min': value, 'max': value})
+        bucket['count'] += 1
+        bucket['total'] += value
+        bucket['min'] = min(bucket['min'], value)
+        bucket['max'] = max(bucket['max'], value)
+
+    day_rows = []
+    cum_count = cum_total = streak = 0
+    previous = None
+    for day in sorted(rows):
+        bucket = rows[day]
+        cum_count += bucket['count']
+        cum_total += bucket['total']
+        streak = streak + 1 if previous == day - timedelta(days=1) else 1
+        previous = day
+        day_rows.append(ProductivityRollup(
+            author_id=author_id, period=DAY, start=day,
+            count=bucket['count'], total=bucket['total'], min_value=bucket['min'], max_value=bucket['max'],
+            streak=streak, cum_count=cum_count, cum_total=cum_total,
+        ))
+
+    with transaction.atomic():
+        ProductivityRollup.objects.filter(author_id=author_id).delete()
+        ProductivityRollup.objects.bulk_create(day_rows, batch_size=500)
+        for period in (WEEK, MONTH):
+            for start in sorted({period_start(row.start, period) for row in day_rows}):
+                _refresh_period_row(author_id, period, start)
+    return len(day_rows)
+
+
+# ---------------------------------------------------------------------------
+# 조회
+# ---------------------------------------------------------------------------
+
+def _cumulative_before(author_id: int, day: date):
+    """day 이전(미포함) 마지막 day 행의 누적합 (count, total)"""
+    row = _rollups(author_id, DAY).filter(start__lt=day).order_by('-start').values('cum_count', 'cum_total').first()
+    return (row['cum_count'], row['cum_total']) if row else (0, 0)
+
+
+def range_summary(author_id: int, start: date, end: date) -> Dict[str, Optional[float]]:
+    """[start, end] 구간 요약. 평균/개수는 누적합 차이로 계산 (일기 테이블 미사용)"""
+    end_excl = end + timedelta(days=1)
+    count_before, total_before = _cumulative_before(author_id, start)
+    count_upto, total_upto = _cumulative_before(author_id, end_excl)
+    count = count_upto - count_before
+    total = total_upto - total_before
+
+    extremes = _rollups(author_id, DAY).filter(start__gte=start, start__lt=end_excl).aggregate(
+        min_value=Min('min_value'), max_value=Max('max_value'), longest_streak=Max('streak'),
+    )
+    last = _rollups(author_id, DAY).filter(start__lte=end).order_by('-start').values('start', 'streak').first()
+    current_streak = last['streak'] if last and last['start'] == end else 0
+    return {
+        'count': count,
+        'mean': round(total / count, 2) if count else None,
+        'min': extremes['min_value'],
+        'max': extremes['max_value'],
+        # 구간 시작 이전부터 이어진 연속 일수도 포함
+        'longest_streak': extremes['longest_streak'] or 0,
+        'current_streak': current_streak,
+    }
+
+
+def series(author_id: int, period: str, start: date, end: date) -> List[Dict[str, object]]:
+    """[start, end] 구간의 버킷별 포인트 (+ 이동평균: 최근 MOVING_WINDOWS[period] 버킷)"""
+    window = MOVING_WINDOWS[period]
+    first = period_start(start, period)
+    # 이동평균용으로 앞쪽 window-1 버킷만큼 더 읽는다
+    padded = first
+    for _ in range(window - 1):
+        padded = period_start(padded - timedelta(days=1), period)
+
+    rows = list(
+        _rollups(author_id, period).filter(start__gte=padded, start__lte=end).order_by('start')
+        .values('start', 'count', 'total', 'min_value', 'max_value', 'streak')
+    )
+    starts = [row['start'] for row in rows]
+
+    points = []
+    for i, row in enumerate(rows):
+        if row['start'] < first:
+            continue
+        # 창: [window-1 버킷 전 시작일, 현재]
+        window_start = row['start']
+        for _ in range(window - 1):
+            window_start = period_start(window_start - timedelta(days=1), period)
+        in_window = rows[bisect_left(starts, window_start):i + 1]
+        window_count = sum(r['count'] for r in in_window)
+        points.append({
+            'start': row['start'].isoformat(),
+            'count': row['count'],
+            'mean': round(row['total'] / row['count'], 2),
+            'min': row['min_value'],
+            'max': row['max_value'],
+            'streak': row['streak'],
+            'moving_avg': round(sum(r['total'] for r in in_window) / window_count, 2),
+        })
+    return points
+
+
+def has_data(author_id: int) -> bool:
+    return _rollups(author_id, DAY).exists()
@@ -3,3 +3,10 @@ from django.apps import AppConfig
 
 class EntryConfig(AppConfig):
     name = 'entry'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .Image_making.styles import get_registry
+
+        # 스타일 템플릿은 시작 시 한 번 읽어 둔다 (이후 변경분만 다시 읽음)
+        get_registry()
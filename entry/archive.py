@@ -0,0 +1,391 @@
+"""
+사용자 일기 전체 내보내기/가져오기 (NDJSON, 선택적으로 만화 PNG를 묶은 ZIP).
+
+내보내기
+- 한 줄에 일기 하나 (EXPORT_FIELDS + image_sha256), posted_date 순
+- QuerySet.values().iterator(chunk_size)로 읽어 기록 수와 관계없이 메모리 일정
+- ZIP: images/<날짜>_<id>.png 를 먼저 쓰고 마지막에 diaries.ndjson (각 줄 image_file = ZIP 안 경로)
+  ZIP 자체도 청크 단위로 흘려보낸다 (seek 없는 스트림에 쓰기, PNG라 압축 없이 저장)
+
+가져오기
+- 날짜(사용자 타임존 기준 하루)당 일기 하나: entry 화면에서 같은 날짜로 다시 저장할 때와 같은 규칙
+  있으면 제목/본문/생산성을 덮어쓰고, 스타일/이미지는 값이 있을 때만 바꾼다. 없으면 새로 만든다
+- batch_size 줄씩 bulk_create/bulk_update (배치마다 트랜잭션). 같은 파일을 다시 가져와도 결과가 같아서
+  중간에 실패하면 그대로 다시 실행하면 된다
+- bulk_* 는 시그널이 없으므로 끝나면 analytics.rebuild(), search.reindex_author(), diary_cache.invalidate_user()
+- ZIP이면 diaries.ndjson을 읽고, 들어 있는 PNG는 내용 주소(blobs.store)로 다시 저장해 image_url을 바꾼다
+
+    python manage.py export_diaries --user a@test.com --output diaries.ndjson
+    python manage.py import_diaries --user b@test.com diaries.ndjson
+"""
+
+import io
+import json
+import logging
+import zipfile
+from datetime import datetime
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Set
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import analytics, diary_cache, search
+from .dates import day_range, local_day
+from .models import CartoonBlob, DiaryModel
+
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FIELDS = (
+    'id', 'note', 'content', 'posted_date', 'productivity', 'style', 'final_prompt',
+    'image_url', 'thumbnail_url', 'preview_url', 'panel_urls', 'updated_at',
+)
+# 가져올 때 값이 있을 때만 덮어쓰는 필드 (entry 화면의 스타일/이미지 처리와 같음)
+OPTIONAL_FIELDS = ('style', 'final_prompt', 'image_url', 'thumbnail_url', 'preview_url', 'panel_urls')
+
+NDJSON_NAME = 'diaries.ndjson'
+IMAGE_DIR = 'images'
+DEFAULT_CHUNK_SIZE = 500
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_PRODUCTIVITY = 5
+
+
+class ArchiveError(ValueError):
+    """가져올 수 없는 줄 (line: 1부터 시작하는 줄 번호)"""
+
+    def __init__(self, line: int, message: str):
+        super().__init__(f'{line}번째 줄: {message}')
+        self.line = line
+
+
+def find_user(value: str):
+    """사용자 id 또는 이메일 → User (없으면 None)"""
+    from django.contrib.auth.models import User
+
+    from .accounts import find_user_by_email
+
+    if value.isdigit():
+        return User.objects.filter(pk=int(value)).first()
+    return find_user_by_email(value)
+
+
+# ---------------------------------------------------------------------------
+# 내보내기
+# ---------------------------------------------------------------------------
+
+def export_rows(user, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    """사용자의 일기를 posted_date 순으로 (모델 객체 없이 dict로, chunk_size 단위 서버 측 커서)"""
+    rows = (
+        DiaryModel.objects.filter(author=user)
+        .order_by('posted_date', 'id')
+        .values(*EXPORT_FIELDS, 'image_blob__sha256', 'image_blob__key')
+    )
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield row
+
+
+def _record(row: Dict[str, Any]) -> Dict[str, Any]:
+    record = {field: row[field] for field in EXPORT_FIELDS}
+    record['date'] = local_day(row['posted_date']).isoformat()
+    record['posted_date'] = timezone.localtime(row['posted_date']).isoformat()
+    record['updated_at'] = row['updated_at'].isoformat() if row['updated_at'] else None
+    record['image_sha256'] = row['image_blob__sha256']
+    return record
+
+
+def _line(record: Dict[str, Any]) -> bytes:
+    return (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+
+
+def iter_ndjson(user, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """NDJSON 줄(bytes) 단위로"""
+    for row in export_rows(user, chunk_size):
+        yield _line(_record(row))
+
+
+def image_file_name(row: Dict[str, Any]) -> str:
+    return f"{IMAGE_DIR}/{local_day(row['posted_date']).isoformat()}_{row['id']}.png"
+
+
+def _image_chunks(storage, row: Dict[str, Any]) -> Optional[Iterator[bytes]]:
+    """원본 이미지 청크 (blob이면 스토리지에서, 아니면 image_url을 HTTP로). 없으면 None"""
+    from .Image_making.transfer import CHUNK_SIZE, open_url_stream
+
+    if row['image_blob__key']:
+        handle = storage.open(row['image_blob__key'], 'rb')
+
+        def from_storage():
+            with handle:
+                yield from iter(lambda: handle.read(CHUNK_SIZE), b'')
+
+        return from_storage()
+    if (row['image_url'] or '').startswith(('http://', 'https://')):
+        response, body = open_url_stream(row['image_url'])
+
+        def from_url():
+            try:
+                yield from iter(lambda: body.read(CHUNK_SIZE), b'')
+            finally:
+                response.close()
+
+        return from_url()
+    return None
+
+
+class _Sink(io.RawIOBase):
+    """ZipFile이 쓴 바이트를 모아 두는 seek 불가 스트림 (drain()으로 꺼냄)"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_zip(user, storage=None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """이미지 + diaries.ndjson ZIP을 청크(bytes) 단위로. 가져오지 못한 이미지는 건너뛰고 image_file=None"""
+    return (chunk for chunk in _zip_chunks(user, storage, chunk_size) if chunk)
+
+
+def _zip_chunks(user, storage, chunk_size: int) -> Iterator[bytes]:
+    if storage is None:
+        from diary.storages import cartoon_storage
+
+        storage = cartoon_storage()
+
+    sink = _Sink()
+    missing: Set[int] = set()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_STORED) as zf:
+        for row in export_rows(user, chunk_size):
+            if not row['image_url']:
+                continue
+            try:
+                chunks = _image_chunks(storage, row)
+                if chunks is None:
+                    missing.add(row['id'])
+                    continue
+                with zf.open(image_file_name(row), 'w') as out:
+                    for chunk in chunks:
+                        out.write(chunk)
+                        yield sink.drain()
+            except Exception:
+                # 이미 쓰기 시작한 항목은 ZIP에 남는다 (diaries.ndjson에서는 image_file=None)
+                logger.warning('archive image export failed', extra={'diary_id': row['id']}, exc_info=True)
+                missing.add(row['id'])
+            yield sink.drain()
+
+        with zf.open(NDJSON_NAME, 'w') as out:
+            for row in export_rows(user, chunk_size):
+                record = _record(row)
+                has_image = row['image_url'] and row['id'] not in missing
+                record['image_file'] = image_file_name(row) if has_image else None
+                out.write(_line(record))
+                yield sink.drain()
+    yield sink.drain()
+
+
+# ---------------------------------------------------------------------------
+# 가져오기
+# ---------------------------------------------------------------------------
+
+def _parse_datetime(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value)
+    return parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed)
+
+
+def parse_record(line: str, lineno: int) -> Dict[str, Any]:
+    """NDJSON 한 줄 → 가져오기용 dict (note/content 필수, 날짜는 posted_date 또는 date)"""
+    try:
+        data = json.loads(line)
+    except ValueError as e:
+        raise ArchiveError(lineno, f'JSON 형식이 아닙니다 ({e})')
+    if not isinstance(data, dict):
+        raise ArchiveError(lineno, '객체가 아닙니다')
+    for field in ('note', 'content'):
+        if not isinstance(data.get(field), str):
+            raise ArchiveError(lineno, f'{field}가 없습니다')
+    if not data.get('posted_date') and not data.get('date'):
+        raise ArchiveError(lineno, '날짜(posted_date/date)가 없습니다')
+    try:
+        if data.get('posted_date'):
+            posted_date = _parse_datetime(data['posted_date'])
+        else:
+            # entry 화면에서 날짜만 고른 경우와 같이 그날 00:00
+            posted_date = timezone.make_aware(datetime.strptime(data['date'], '%Y-%m-%d'))
+        productivity = int(data.get('productivity') or DEFAULT_PRODUCTIVITY)
+    except (TypeError, ValueError) as e:
+        raise ArchiveError(lineno, str(e))
+
+    record = {
+        'note': data['note'][:DiaryModel._meta.get_field('note').max_length],
+        'content': data['content'],
+        'posted_date': posted_date,
+        'productivity': productivity,
+        'image_sha256': data.get('image_sha256') or None,
+        'image_file': data.get('image_file') or None,
+    }
+    for field in OPTIONAL_FIELDS:
+        record[field] = data.get(field) or None
+    return record
+
+
+def _merge(target: Dict[str, Any], record: Dict[str, Any]) -> None:
+    """같은 날짜의 두 번째 기록: 제목/본문/생산성은 덮어쓰고 나머지는 값이 있을 때만 (날짜는 처음 것 유지)"""
+    for field in ('note', 'content', 'productivity'):
+        target[field] = record[field]
+    for field in (*OPTIONAL_FIELDS, 'image_sha256', 'image_file'):
+        if record[field]:
+            target[field] = record[field]
+
+
+def _restore_image(storage, zf: zipfile.ZipFile, member: str) -> Optional[CartoonBlob]:
+    """ZIP 안의 PNG를 내용 주소로 저장 (처음 보는 이미지면 파생 이미지도). 없거나 실패하면 None"""
+    import tempfile
+
+    from . import blobs
+    from .Image_making.transfer import CHUNK_SIZE, file_digest
+
+    try:
+        source = zf.open(member)
+    except KeyError:
+        return None
+    with source, tempfile.SpooledTemporaryFile(max_size=1024 * 1024) as spool:
+        for chunk in iter(lambda: source.read(CHUNK_SIZE), b''):
+            spool.write(chunk)
+        spool.seek(0)
+        digest, size = file_digest(spool)
+        blob, _ = blobs.store(storage, spool, digest, size)
+        if blob.derived is None:
+            try:
+                from .Image_making.derivatives import save_derivatives
+
+                spool.seek(0)
+                blobs.set_derived(blob, save_derivatives(storage, digest, spool))
+            except Exception:
+                logger.warning('derivative generation failed', extra={'blob': blob.key}, exc_info=True)
+    return blob
+
+
+def _apply_batch(user, records: List[Dict[str, Any]], result: Dict[str, int], zf=None, storage=None) -> None:
+    by_day: Dict[Any, Dict[str, Any]] = {}
+    for record in records:
+        day = local_day(record['posted_date'])
+        if day in by_day:
+            _merge(by_day[day], record)
+            result['merged'] += 1
+        else:
+            by_day[day] = record
+
+    # 배치 날짜 구간의 기존 일기 (하루에 여러 개면 entry 화면처럼 가장 최근 것을 고침)
+    start, _ = day_range(min(by_day))
+    _, end = day_range(max(by_day))
+    existing: Dict[Any, DiaryModel] = {}
+    for diary in DiaryModel.objects.filter(author=user, posted_date__gte=start, posted_date__lt=end).order_by('posted_date', 'id'):
+        existing[local_day(diary.posted_date)] = diary
+
+    blob_by_sha = CartoonBlob.objects.in_bulk(
+        {r['image_sha256'] for r in by_day.values() if r['image_sha256']}, field_name='sha256',
+    )
+    for record in by_day.values():
+        blob = None
+        if zf is not None and record['image_file']:
+            blob = _restore_image(storage, zf, record['image_file'])
+            if blob is not None:
+                derived = blob.derived or {}
+                record.update(
+                    image_url=blob.url, thumbnail_url=derived.get('thumbnail_url'),
+                    preview_url=derived.get('preview_url'), panel_urls=derived.get('panel_urls'),
+                )
+        # 같은 배포로 복원하면 남아 있는 blob에 다시 연결 (GC 대상에서 빠지도록)
+        record['image_blob'] = blob or blob_by_sha.get(record['image_sha256'])
+
+    now = timezone.now()
+    created, updated = [], []
+    fields: Set[str] = set()
+    for day, record in by_day.items():
+        values = {field: record[field] for field in ('note', 'content', 'productivity')}
+        values.update({field: record[field] for field in OPTIONAL_FIELDS if record[field]})
+        if record['image_blob'] is not None and record['image_url'] == record['image_blob'].url:
+            values['image_blob_id'] = record['image_blob'].pk
+
+        diary = existing.get(day)
+        if diary is None:
+            # bulk_create는 save()를 거치지 않으므로 diary_date도 직접
+            diary = DiaryModel(author=user, posted_date=record['posted_date'], diary_date=day, **values)
+            created.append(diary)
+            continue
+        changes = {field: value for field, value in values.items() if getattr(diary, field) != value}
+        if not changes:
+            # 같은 파일을 다시 가져온 경우 등 (bulk_update는 CASE 식이라 바뀐 행/필드만 보낸다)
+            result['unchanged'] += 1
+            continue
+        for field, value in changes.items():
+            setattr(diary, field, value)
+        diary.updated_at = now  # bulk_update는 auto_now를 채우지 않음
+        fields.update('image_blob' if field == 'image_blob_id' else field for field in changes)
+        updated.append(diary)
+
+    with transaction.atomic():
+        DiaryModel.objects.bulk_create(created, batch_size=500)
+        if updated:
+            DiaryModel.objects.bulk_update(updated, sorted(fields) + ['updated_at'], batch_size=100)
+    result['created'] += len(created)
+    result['updated'] += len(updated)
+
+
+def import_lines(user, lines: Iterable, batch_size: int = DEFAULT_BATCH_SIZE, zf=None, storage=None) -> Dict[str, int]:
+    """
+    NDJSON 줄들을 가져온다. 반환: {'lines', 'created', 'updated', 'unchanged', 'merged'(파일 안 같은 날짜)}
+    잘못된 줄이 있으면 ArchiveError (그 앞 배치까지는 반영, 집계/색인/캐시는 항상 갱신)
+    """
+    result = {'lines': 0, 'created': 0, 'updated': 0, 'unchanged': 0, 'merged': 0}
+    batch: List[Dict[str, Any]] = []
+    try:
+        for lineno, line in enumerate(lines, start=1):
+            if isinstance(line, bytes):
+                line = line.decode('utf-8')
+            if not line.strip():
+                continue
+            batch.append(parse_record(line, lineno))
+            result['lines'] += 1
+            if len(batch) >= batch_size:
+                _apply_batch(user, batch, result, zf, storage)
+                batch = []
+        if batch:
+            _apply_batch(user, batch, result, zf, storage)
+    finally:
+        if result['created'] or result['updated']:
+            analytics.rebuild(user.id)
+            search.reindex_author(user.id)
+            diary_cache.invalidate_user(user.id)
+    return result
+
+
+def import_file(user, fileobj: BinaryIO, batch_size: int = DEFAULT_BATCH_SIZE, storage=None) -> Dict[str, int]:
+    """NDJSON 또는 ZIP(diaries.ndjson + images/) 파일 객체에서 가져오기"""
+    head = fileobj.read(4)
+    fileobj.seek(0)
+    if head != b'PK\x03\x04':
+        return import_lines(user, fileobj, batch_size)
+
+    if storage is None:
+        from diary.storages import cartoon_storage
+
+        storage = cartoon_storage()
+    with zipfile.ZipFile(fileobj) as zf:
+        try:
+            source = zf.open(NDJSON_NAME)
+        except KeyError:
+            raise ArchiveError(0, f'ZIP에 {NDJSON_NAME}이 없습니다')
+        with source:
+            return import_lines(user, source, batch_size, zf=zf, storage=storage)
@@ -0,0 +1,187 @@
+"""
+벤치마크 공용 도구 (bench_* 관리 커맨드에서 사용).
+
+- 로컬 HTTP 서버로 바이트 응답 흉내 (OpenAI 임시 URL 대체)
+- 백분위수 / 메모리 측정 (자식 프로세스는 reset_peak_rss() 후 peak_rss_kb())
+- 결과는 JSON으로 출력해 릴리스 간 비교
+"""
+
+from __future__ import annotations
+
+import json
+import platform
+import resource
+import sys
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+
+@contextmanager
+def serve_bytes(payload: bytes, content_type: str = "image/png") -> Iterator[str]:
+    """payload를 돌려주는 로컬 HTTP 서버를 띄우고 URL을 반환"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):  # noqa: N802
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            view = memoryview(payload)
+            for start in range(0, len(payload), 256 * 1024):
+                self.wfile.write(view[start:start + 256 * 1024])
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/image.png"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def percentile(samples: Sequence[float], pct: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    k = (len(ordered) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def summarize(samples: Sequence[float]) -> Dict[str, Any]:
+    """지연 시간 목록(초) → ms 단위 요약"""
+    def ms(v):
+        return None if v is None else round(v * 1000, 3)
+
+    return {
+        "count": len(samples),
+        "mean_ms": ms(sum(samples) / len(samples)) if samples else None,
+        "p50_ms": ms(percentile(samples, 50)),
+        "p90_ms": ms(percentile(samples, 90)),
+        "p99_ms": ms(percentile(samples, 99)),
+        "max_ms": ms(max(samples)) if samples else None,
+    }
+
+
+def max_rss_kb() -> int:
+    """프로세스 최대 RSS (KB). macOS는 바이트 단위라 변환"""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def reset_peak_rss() -> bool:
+    """
+    최대 RSS 기록(VmHWM)을 현재 RSS로 되돌림 (Linux /proc/self/clear_refs).
+    ru_maxrss는 fork/exec 때 부모 값을 물려받아 되돌릴 수 없으므로 자식 프로세스 측정에는 이것을 쓴다.
+    반환: 지원 여부 (False면 peak_rss_kb()는 max_rss_kb()와 같음)
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        return False
+    return _proc_status_kb("VmHWM") is not None
+
+
+def peak_rss_kb() -> int:
+    """reset_peak_rss() 이후 최대 RSS (KB). /proc이 없으면 max_rss_kb()"""
+    hwm = _proc_status_kb("VmHWM")
+    return hwm if hwm is not None else max_rss_kb()
+
+
+def _proc_status_kb(field: str) -> Optional[int]:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def report(name: str, results: Dict[str, Any], params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    return {
+        "benchmark": name,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": params or {},
+        "results": results,
+    }
+
+
+def write_report(data: Dict[str, Any], stdout, output: Optional[str] = None) -> None:
+    text = json.dumps(data, ensure_ascii=False, indent=2)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    stdout.write(text)
+
+
+def random_png_like(size_bytes: int, seed: int = 0) -> bytes:
+    """PNG 시그니처로 시작하는 임의 바이트 (전송 벤치마크용, 디코딩은 하지 않음)"""
+    import random
+
+    rnd = random.Random(seed)
+    header = b"\x89PNG\r\n\x1a\n"
+    return header + rnd.randbytes(max(0, size_bytes - len(header)))
+
+
+def chunked(items: List[Any], size: int) -> Iterator[List[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+@contextmanager
+def temporary_database(alias: str = "default") -> Iterator[None]:
+    """
+    벤치마크용 임시 DB (테스트 DB 생성 방식, 끝나면 삭제).
+    SQLite는 메모리 대신 임시 파일을 써서 실제 디스크 I/O에 가깝게 측정.
+    """
+    import os
+    import tempfile
+
+    from django.db import connections
+
+    connection = connections[alias]
+    test_settings = connection.settings_dict.setdefault("TEST", {})
+    previous_name = test_settings.get("NAME")
+    tmpdir = None
+    if connection.vendor == "sqlite":
+        tmpdir = tempfile.mkdtemp(prefix="bench_db_")
+        test_settings["NAME"] = os.path.join(tmpdir, "bench.sqlite3")
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        test_settings["NAME"] = previous_name
+        if tmpdir:
+            import shutil
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+WORDS_KO = (
+    "오늘 아침 공원 산책 친구 커피 회사 회의 점심 저녁 운동 독서 영화 음악 비 날씨 햇살 "
+    "바다 여행 가족 고양이 강아지 요리 빵 케이크 공부 시험 발표 버스 지하철 자전거 도서관 "
+    "카페 노래 그림 사진 꽃 나무 하늘 구름 바람 눈 겨울 여름 봄 가을 주말 휴가 청소 빨래"
+).split()
+
+
+def synthetic_diary_text(rnd, words: int = 60) -> str:
+    """임의 일기 본문 (지프 분포로 흔한 단어/드문 단어 섞음)"""
+    weights = [1.0 / (rank + 1) for rank in range(len(WORDS_KO))]
+    picked = rnd.choices(WORDS_KO, weights=weights, k=words)
+    particles = ("", "에서", "을", "를", "이", "가", "와", "도")
+    return " ".join(word + rnd.choice(particles) for word in picked) + "."
@@ -0,0 +1,126 @@
+"""
+만화 원본 이미지 내용 주소 저장 (CartoonBlob).
+
+- 저장 이름 = <sha256>.png (CartoonStorage 기준 media/cartoon/<sha256>.png)
+  → 저장을 여러 번 누르거나 같은 임시 URL을 다시 저장해도 스토리지 객체는 하나
+- 이미 있는 내용이면 업로드/파생 이미지 생성을 건너뜀: CartoonBlob 행 → 없으면 스토리지 HEAD(exists)
+- 참조: DiaryModel.image_blob, CartoonVersion.blob (PROTECT). 참조가 없고 GC_MIN_AGE가 지난 blob은
+  collect_garbage() (`python manage.py gc_cartoon_blobs`)가 스토리지 객체와 함께 삭제
+"""
+
+import logging
+from datetime import timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import CartoonBlob
+
+
+logger = logging.getLogger(__name__)
+
+# 저장 직후 아직 일기에 연결되기 전인 blob을 지우지 않도록 두는 유예 기간
+GC_MIN_AGE = timedelta(hours=24)
+
+
+def blob_name(digest: str) -> str:
+    return f"{digest}.png"
+
+
+def _save_exact(storage, name: str, content) -> bool:
+    """name 그대로 저장 (이미 있으면 건너뜀). 반환: 업로드 여부"""
+    if storage.exists(name):
+        return False
+    saved = storage.save(name, content)
+    if saved != name:
+        # 같은 내용을 동시에 올린 다른 요청이 먼저 저장함 → 이름이 바뀐 사본은 지우고 원래 이름 사용
+        storage.delete(saved)
+        return False
+    return True
+
+
+def _touch(digest: str) -> Optional[CartoonBlob]:
+    """
+    기존 blob의 사용 시각 갱신 (같은 blob을 지우려는 GC와 경합 방지: GC는 삭제 직전 last_used_at을 다시 확인).
+    조회 후 저장하면 SQLite에서 쓰기 잠금으로 올리지 못해 바로 실패하므로 UPDATE 한 번으로
+    """
+    if not CartoonBlob.objects.filter(sha256=digest).update(last_used_at=timezone.now()):
+        return None
+    return CartoonBlob.objects.filter(sha256=digest).first()
+
+
+def store(storage, content, digest: str, size: int) -> Tuple[CartoonBlob, bool]:
+    """
+    content(처음 위치의 파일 객체)를 내용 주소로 저장. 반환: (blob, 업로드 여부)
+    파생 이미지는 blob.derived가 비어 있을 때 호출 측에서 만들어 set_derived()로 기록
+    """
+    blob = _touch(digest)
+    if blob is not None:
+        return blob, False
+
+    name = blob_name(digest)
+    uploaded = _save_exact(storage, name, content)
+    try:
+        with transaction.atomic():
+            blob = CartoonBlob.objects.create(
+                sha256=digest, key=name, url=storage.url(name), size=size, last_used_at=timezone.now(),
+            )
+    except IntegrityError:
+        # 다른 요청이 먼저 행을 만든 경우
+        blob = _touch(digest)
+    return blob, uploaded
+
+
+def set_derived(blob: CartoonBlob, derived: Dict[str, Any]) -> None:
+    """파생 이미지 기록 (동시에 저장한 다른 요청이 먼저 기록했으면 그것을 유지)"""
+    if CartoonBlob.objects.filter(pk=blob.pk, derived__isnull=True).update(derived=derived):
+        blob.derived = derived
+    else:
+        blob.refresh_from_db(fields=['derived'])
+
+
+def orphans(min_age: timedelta = GC_MIN_AGE):
+    """참조(일기/생성 이력)가 없고 min_age 동안 쓰이지 않은 blob"""
+    return (
+        CartoonBlob.objects
+        .filter(last_used_at__lt=timezone.now() - min_age)
+        .annotate(ref_count=Count('diaries', distinct=True) + Count('versions', distinct=True))
+        .filter(ref_count=0)
+        .order_by('id')
+    )
+
+
+def collect_garbage(storage, min_age: timedelta = GC_MIN_AGE, dry_run: bool = False, limit: int = 0) -> Dict[str, int]:
+    """
+    참조가 없는 blob의 스토리지 객체(원본 + 파생 이미지)와 행을 삭제.
+    스토리지 삭제가 실패한 blob은 행을 남겨 다음 실행 때 다시 시도한다.
+    """
+    result = {'candidates': 0, 'deleted': 0, 'bytes': 0, 'errors': 0}
+    candidates = orphans(min_age)
+    if limit:
+        candidates = candidates[:limit]
+    for blob in candidates:
+        result['candidates'] += 1
+        if dry_run:
+            result['bytes'] += blob.size
+            continue
+        try:
+            with transaction.atomic():
+                # 조회 후 다시 참조/사용됐으면 건너뜀
+                locked = CartoonBlob.objects.select_for_update().filter(
+                    pk=blob.pk, last_used_at__lt=timezone.now() - min_age,
+                ).first()
+                if locked is None or locked.diaries.exists() or locked.versions.exists():
+                    continue
+                for key in [locked.key, *(locked.derived or {}).get('keys', [])]:
+                    storage.delete(key)
+                locked.delete()
+        except Exception:
+            logger.warning('blob gc failed', extra={'blob': blob.key}, exc_info=True)
+            result['errors'] += 1
+            continue
+        result['deleted'] += 1
+        result['bytes'] += blob.size
+    return result
@@ -0,0 +1,49 @@
+"""
+날짜 → posted_date 범위 변환.
+
+posted_date__date=... 는 컬럼에 날짜 변환(타임존 변환 포함)을 걸어 인덱스를 못 탄다.
+대신 사용자 타임존 기준 [시작, 끝) 반열린 구간으로 바꿔서
+(author, posted_date) 복합 인덱스 범위 스캔이 되도록 한다.
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Optional, Tuple
+
+from django.utils import timezone
+
+
+def _tz(tz=None):
+    # 사용자별 타임존이 활성화돼 있으면 그 값, 아니면 settings.TIME_ZONE
+    return tz or timezone.get_current_timezone()
+
+
+def _start_of(day: date, tz) -> datetime:
+    return timezone.make_aware(datetime(day.year, day.month, day.day), tz)
+
+
+def day_range(day: date, tz=None) -> Tuple[datetime, datetime]:
+    """하루 구간 [00:00, 다음날 00:00)"""
+    tz = _tz(tz)
+    return _start_of(day, tz), _start_of(day + timedelta(days=1), tz)
+
+
+def month_range(year: int, month: int, tz=None) -> Tuple[datetime, datetime]:
+    """한 달 구간 [1일 00:00, 다음달 1일 00:00)"""
+    tz = _tz(tz)
+    return _start_of(date(year, month, 1), tz), _start_of(date(year + month // 12, month % 12 + 1, 1), tz)
+
+
+def day_filter(day: date, tz=None, field: str = 'posted_date') -> dict:
+    """QuerySet.filter(**day_filter(d)) 용 kwargs"""
+    start, end = day_range(day, tz)
+    return {f'{field}__gte': start, f'{field}__lt': end}
+
+
+def parse_day(value: str) -> date:
+    """'YYYY-MM-DD' → date (형식이 틀리면 ValueError)"""
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def local_day(value: Optional[datetime] = None, tz=None) -> date:
+    """aware datetime → 사용자 타임존 기준 날짜 (None이면 오늘)"""
+    return timezone.localtime(value or timezone.now(), _tz(tz)).date()
@@ -0,0 +1,85 @@
+"""
+하루 일기 하나 저장 (일기 작성 화면의 쓰기 경로).
+
+- (author, diary_date) 고유 제약에 INSERT ... ON CONFLICT DO UPDATE 한 문장으로 새로 만들거나 덮어쓴다
+  → 같은 날짜 중복 제출이 동시에 와도 일기는 하나 (조회 후 저장 사이의 경합 없음)
+- 덮어쓸 때: 제목/본문/생산성은 항상, 스타일/이미지 URL은 값이 있을 때만 바꾸고 posted_date는 처음 값 유지
+- bulk_create라 시그널이 없으므로 검색 색인/생산성 집계/조회 캐시는 여기서 직접 갱신
+- SQLite에서 busy timeout을 넘겨 잠금 오류가 나면 몇 번 다시 시도 (같은 값으로 다시 써도 결과가 같음)
+"""
+
+import time
+from datetime import datetime
+from typing import Optional
+
+from django.db import OperationalError, connection, transaction
+
+from . import analytics, diary_cache, search
+from .dates import local_day
+from .models import DiaryModel
+
+
+# 잠금 오류 재시도 횟수/간격(초, 시도마다 두 배)
+LOCK_RETRIES = 3
+LOCK_RETRY_DELAY = 0.05
+
+
+def is_lock_error(exc: Exception) -> bool:
+    """SQLite 'database is locked' / 'database table is locked'"""
+    return isinstance(exc, OperationalError) and 'locked' in str(exc)
+
+
+def retry_on_lock(func, *args, **kwargs):
+    """
+    func(트랜잭션 하나)를 실행하고 잠금 오류면 잠시 뒤 다시 실행.
+    바깥 트랜잭션 안이면 재시도할 수 없으므로 한 번만
+    """
+    attempts = 1 if connection.in_atomic_block else LOCK_RETRIES + 1
+    for attempt in range(attempts):
+        try:
+            return func(*args, **kwargs)
+        except OperationalError as e:
+            if not is_lock_error(e) or attempt == attempts - 1:
+                raise
+            time.sleep(LOCK_RETRY_DELAY * (2 ** attempt))
+
+
+def upsert_day_entry(
+    author,
+    posted_date: datetime,
+    note: str,
+    content: str,
+    productivity: int,
+    style: Optional[str] = None,
+    image_url: Optional[str] = None,
+) -> DiaryModel:
+    """posted_date 날짜의 일기를 만들거나 덮어쓴다. 반환: 저장된 일기 (DB 값 그대로)"""
+    diary = DiaryModel(
+        author=author, posted_date=posted_date, diary_date=local_day(posted_date),
+        note=note, content=content, productivity=productivity,
+        style=style or None, image_url=image_url or None,
+    )
+    update_fields = ['note', 'content', 'productivity', 'updated_at']
+    if style:
+        update_fields.append('style')
+    if image_url:
+        update_fields.append('image_url')
+
+    saved = retry_on_lock(_upsert, diary, update_fields)
+    diary_cache.invalidate_on_commit(author.id)
+    return saved
+
+
+def _upsert(diary: DiaryModel, update_fields) -> DiaryModel:
+    with transaction.atomic():
+        DiaryModel.objects.bulk_create(
+            [diary], update_conflicts=True, unique_fields=['author', 'diary_date'], update_fields=update_fields,
+        )
+        if diary.pk is None:
+            # Django 4.2는 ON CONFLICT일 때 pk를 채우지 않는다 (5.0부터 RETURNING으로 채움) → 고유 키로 다시 읽기
+            saved = DiaryModel.objects.get(author_id=diary.author_id, diary_date=diary.diary_date)
+        else:
+            saved = diary
+        search.index_diary(saved)
+        analytics.refresh_day(saved.author_id, saved.diary_date)
+    return saved
@@ -0,0 +1,122 @@
+"""
+일기 조회 응답 캐시 (사용자별, 저장/삭제 시 무효화).
+
+- 대상: diary_by_date_api(날짜), get_diary_detail(id), detail_view(그 날짜의 일기 목록)
+- 키: diary:<사용자 id>:<세대>:<종류>:<날짜/id>
+  세대(generation)는 사용자별 임의 토큰. DiaryModel 저장/삭제 시그널(signals.py)이 새 토큰으로 바꾸면
+  그 사용자의 이전 항목은 더 이상 조회되지 않고 TTL로 사라진다 (날짜를 옮긴 수정도 옛 키를 몰라도 됨)
+- 백엔드: settings.CACHES[DIARY_CACHE_ALIAS] (DIARY_CACHE_BACKEND)
+    'locmem' : 프로세스 메모리 (기본, 워커 하나일 때)
+    'file'   : DIARY_CACHE_DIR (같은 서버의 여러 워커가 세대 토큰까지 공유)
+    'none'   : 캐시 안 함 (DummyCache)
+  locmem으로 워커를 여러 개 띄우면 다른 워커에서 고친 내용이 최대 DIARY_CACHE_TTL 동안 안 보일 수 있다
+- JSON 응답은 내용 ETag/Last-Modified를 항목에 같이 넣어 두고, 조건부 GET이면 본문 없이 304
+
+주의: QuerySet.update()/bulk_create()는 시그널이 없으므로 호출 측에서 invalidate_user()를 불러야 한다.
+"""
+
+import hashlib
+import json
+import uuid
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+Payload = Dict[str, Any]
+
+
+def _cache():
+    from django.core.cache import caches
+
+    return caches[getattr(settings, 'DIARY_CACHE_ALIAS', 'default')]
+
+
+def _generation_key(user_id: int) -> str:
+    return f'diary:{user_id}:gen'
+
+
+def generation(user_id: int) -> str:
+    """사용자의 현재 세대 토큰 (없거나 캐시에서 밀려났으면 새로 만듦)"""
+    cache = _cache()
+    key = _generation_key(user_id)
+    token = cache.get(key)
+    if token is None:
+        # 밀려난 뒤 예전 값으로 돌아가지 않도록 카운터 대신 임의 토큰
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+        token = cache.get(key)
+    return token
+
+
+def invalidate_user(user_id: Optional[int]) -> None:
+    """사용자의 캐시 항목을 모두 무효화 (새 세대 토큰)"""
+    if user_id is None:
+        return
+    _cache().set(_generation_key(user_id), uuid.uuid4().hex, timeout=None)
+
+
+def invalidate_on_commit(user_id: Optional[int]) -> None:
+    """
+    지금 한 번 + 커밋 직후 한 번 무효화.
+    커밋 전에 다른 요청이 새 세대로 옛 데이터를 읽어 넣는 경우를 커밋 후 무효화가 덮는다.
+    """
+    if user_id is None:
+        return
+    invalidate_user(user_id)
+    transaction.on_commit(lambda: invalidate_user(user_id))
+
+
+def _key(user_id: int, kind: str, ident: Any) -> str:
+    return f'diary:{user_id}:{generation(user_id)}:{kind}:{ident}'
+
+
+def get_or_build(user_id: int, kind: str, ident: Any, build: Callable[[], Any]) -> Any:
+    """캐시 값, 없으면 build() 결과를 저장 후 반환 (build가 예외를 내면 저장하지 않음)"""
+    cache = _cache()
+    key = _key(user_id, kind, ident)
+    value = cache.get(key)
+    if value is None:
+        value = build()
+        cache.set(key, value)
+    return value
+
+
+def json_etag(payload: Payload) -> str:
+    return quote_etag(hashlib.sha1(
+        json.dumps(payload, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    ).hexdigest())
+
+
+def conditional_json(request, payload: Payload, etag: str, last_modified: Optional[int] = None):
+    """ETag/Last-Modified가 맞으면 304, 아니면 JsonResponse (브라우저는 매번 재검증)"""
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    response = JsonResponse(payload)
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def cached_json(request, kind: str, ident: Any, build: Callable[[], Tuple[Payload, Any]]):
+    """
+    사용자별 캐시를 거치는 JSON 응답.
+    build() → (payload, updated_at). ETag/Last-Modified도 채울 때 한 번만 계산해 같이 저장
+    """
+    def fill():
+        payload, updated_at = build()
+        return {
+            'payload': payload,
+            'etag': json_etag(payload),
+            'last_modified': int(updated_at.timestamp()) if updated_at else None,
+        }
+
+    entry = get_or_build(request.user.id, kind, ident, fill)
+    return conditional_json(request, entry['payload'], entry['etag'], entry['last_modified'])
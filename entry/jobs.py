@@ -0,0 +1,301 @@
+"""
+DB 기반 이미지 생성 작업 큐.
+
+- 웹 요청: enqueue_generation() 으로 작업만 등록하고 job id 반환
+- 워커: `python manage.py generation_worker` 가 claim_next_job() → run_job() 반복
+- 외부 브로커(Redis 등) 없이 DB 조건부 UPDATE로 작업을 선점한다.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import socket
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import metrics
+from .diaries import retry_on_lock
+from .Image_making.styles import DEFAULT_STYLE
+from .models import DiaryModel, GenerationJob
+
+
+logger = logging.getLogger(__name__)
+
+
+# 상태 → 진행률(%) (add.html 진행바용, 단계 이벤트가 없을 때)
+PROGRESS_BY_STATUS = {
+    GenerationJob.STATUS_QUEUED: 10,
+    GenerationJob.STATUS_RUNNING: 50,
+    GenerationJob.STATUS_SUCCEEDED: 100,
+    GenerationJob.STATUS_FAILED: 100,
+}
+
+# 진행 단계 이벤트 → 진행률(%). 파이프라인이 progress 콜백으로 단계를 알린다
+STAGE_PROGRESS = {
+    'queued': 5,
+    'started': 10,
+    'outline_started': 15,
+    'outline_done': 35,
+    'prompt_rendered': 45,
+    'image_requested': 50,
+    'image_received': 90,
+    'composited': 95,
+    'succeeded': 100,
+    'failed': 100,
+    'uploaded': 100,
+}
+TERMINAL_STAGES = ('succeeded', 'failed')
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class GenerationBusy(Exception):
+    """같은 일기에 다른 조건(스타일/패널/언어)의 작업이 이미 대기/실행 중"""
+
+    def __init__(self, active: GenerationJob):
+        super().__init__('이미 다른 이미지 생성 작업이 진행 중입니다.')
+        self.active = active
+
+
+def _matches(job: GenerationJob, style: str, language: str, panel: Optional[int]) -> bool:
+    return job.style == style and job.language == language and job.panel == panel
+
+
+def _create_job(diary: DiaryModel, style: str, language: str, panel: Optional[int]) -> GenerationJob:
+    # 블록 안에서 읽기가 먼저 나가면(FK 지연 로딩 등) SQLite가 쓰기 잠금으로 올리지 못하고 바로 실패하므로 id만 넘김
+    with transaction.atomic():
+        return GenerationJob.objects.create(
+            diary_id=diary.pk,
+            author_id=diary.author_id,
+            style=style,
+            language=language,
+            panel=panel,
+            events=[make_event('queued')],
+        )
+
+
+def enqueue_generation(
+    diary: DiaryModel,
+    style: Optional[str] = None,
+    language: str = 'en',
+    panel: Optional[int] = None,
+) -> GenerationJob:
+    """
+    생성 작업 등록. 일기당 대기/실행 중인 작업은 하나 (조건부 고유 제약 entry_job_one_active_per_diary).
+    - 같은 조건(스타일/언어/패널)의 작업이 이미 있으면 그 작업을 반환 (더블 클릭, 탭 두 개)
+    - 다른 조건의 작업이 있으면 GenerationBusy (화면은 409, 일괄 생성은 끝난 뒤 다시 등록)
+    panel: 패널 모드에서 해당 패널(1~4)만 재생성
+    """
+    style = style or diary.style or DEFAULT_STYLE
+    active = GenerationJob.objects.filter(diary=diary, status__in=GenerationJob.ACTIVE_STATUSES).first()
+    if active is None:
+        try:
+            job = retry_on_lock(_create_job, diary, style, language, panel)
+        except IntegrityError:
+            # 동시에 등록한 다른 요청이 먼저 만듦
+            active = GenerationJob.objects.filter(diary=diary, status__in=GenerationJob.ACTIVE_STATUSES).first()
+            if active is None:
+                raise
+        else:
+            if getattr(settings, 'GENERATION_QUEUE_EAGER', False):
+                # 워커 없이 개발할 때: 요청 안에서 바로 실행
+                run_job(job)
+            return job
+
+    if not _matches(active, style, language, panel):
+        raise GenerationBusy(active)
+    return active
+
+
+def claim_next_job(worker_id: Optional[str] = None) -> Optional[GenerationJob]:
+    """
+    가장 오래된 queued 작업을 하나 선점한다.
+    status='queued' 조건부 UPDATE가 1행을 바꾼 워커만 작업을 가져간다(SQLite/Postgres 공통).
+    """
+    worker_id = worker_id or default_worker_id()
+    while True:
+        candidate = (
+            GenerationJob.objects.filter(status=GenerationJob.STATUS_QUEUED)
+            .order_by('created_at', 'id')
+            .values_list('id', flat=True)
+            .first()
+        )
+        if candidate is None:
+            return None
+        job = claim_job(candidate, worker_id)
+        if job is not None:
+            return job
+        # 다른 워커가 먼저 가져감 → 다음 후보
+
+
+def claim_job(job_id: int, worker_id: Optional[str] = None) -> Optional[GenerationJob]:
+    """특정 queued 작업 선점 (다른 워커가 먼저 가져갔으면 None)"""
+    claimed = GenerationJob.objects.filter(
+        pk=job_id, status=GenerationJob.STATUS_QUEUED
+    ).update(
+        status=GenerationJob.STATUS_RUNNING,
+        started_at=timezone.now(),
+        worker=worker_id or default_worker_id(),
+        attempts=F('attempts') + 1,
+    )
+    return GenerationJob.objects.get(pk=job_id) if claimed else None
+
+
+def run_job(job: GenerationJob) -> GenerationJob:
+    """작업 하나를 실행하고 결과(succeeded/failed)를 기록"""
+    from .Image_making.pipeline import generate_and_attach_image_to_diary, regenerate_panel_for_diary
+
+    if job.status != GenerationJob.STATUS_RUNNING:
+        job.status = GenerationJob.STATUS_RUNNING
+        job.started_at = timezone.now()
+        job.attempts += 1
+        job.save(update_fields=['status', 'started_at', 'attempts'])
+    record_event(job, 'started', attempt=job.attempts)
+
+    def progress(stage, **data):
+        record_event(job, stage, **data)
+
+    try:
+        if job.panel:
+            regenerate_panel_for_diary(
+                job.diary_id,
+                job.panel,
+                style_path=None,
+                language=job.language,
+                style=job.style,
+                progress=progress,
+            )
+        else:
+            generate_and_attach_image_to_diary(
+                job.diary_id,
+                style_path=None,
+                language=job.language,
+                style=job.style,
+                progress=progress,
+            )
+        temp_image_url = (
+            DiaryModel.objects.filter(pk=job.diary_id).values_list('temp_image_url', flat=True).first()
+        )
+        if not temp_image_url:
+            raise RuntimeError('이미지 생성 결과가 없습니다.')
+        job.status = GenerationJob.STATUS_SUCCEEDED
+        job.temp_image_url = temp_image_url
+        job.error = None
+    except Exception as e:
+        job.status = GenerationJob.STATUS_FAILED
+        job.error = str(e)
+        logger.warning('generation job failed', extra={'job_id': job.id, 'diary_id': job.diary_id}, exc_info=True)
+
+    job.finished_at = timezone.now()
+    final_event = make_event(job.status, error=job.error) if job.error else make_event(job.status)
+    append_event(job, final_event, update_fields=['status', 'temp_image_url', 'error', 'finished_at'])
+    logger.info('generation job finished', extra={
+        'job_id': job.id,
+        'diary_id': job.diary_id,
+        'status': job.status,
+        'duration_ms': round((job.finished_at - job.started_at).total_seconds() * 1000, 1) if job.started_at else None,
+        'queue_ms': round((job.started_at - job.created_at).total_seconds() * 1000, 1) if job.started_at and job.created_at else None,
+    })
+    _observe_job(job)
+    return job
+
+
+def _observe_job(job: GenerationJob) -> None:
+    """등록→완료 시간(T90 대상)과 큐 대기 시간 기록 후 워커의 관측값을 DB에 반영"""
+    kind = 'panel' if job.panel else 'full'
+    if job.created_at and job.finished_at:
+        metrics.observe(
+            metrics.GENERATION_SECONDS, (job.finished_at - job.created_at).total_seconds(),
+            status=job.status, kind=kind,
+        )
+    if job.created_at and job.started_at:
+        metrics.observe(
+            metrics.STAGE_SECONDS, (job.started_at - job.created_at).total_seconds(),
+            stage='queue_wait', outcome='ok',
+        )
+    metrics.flush_pending()
+
+
+def requeue_stale_jobs(timeout_seconds: Optional[int] = None, max_attempts: int = 2) -> int:
+    """
+    워커가 죽어서 running 상태로 남은 작업을 되살린다.
+    시도 횟수가 max_attempts 이상이면 failed 처리. 반환: 처리한 작업 수
+    """
+    if timeout_seconds is None:
+        timeout_seconds = getattr(settings, 'GENERATION_JOB_TIMEOUT', 300)
+    cutoff = timezone.now() - timedelta(seconds=timeout_seconds)
+    stale = GenerationJob.objects.filter(status=GenerationJob.STATUS_RUNNING, started_at__lt=cutoff)
+
+    failed = stale.filter(attempts__gte=max_attempts).update(
+        status=GenerationJob.STATUS_FAILED,
+        error='작업 시간이 초과되었습니다.',
+        finished_at=timezone.now(),
+    )
+    requeued = stale.filter(attempts__lt=max_attempts).update(
+        status=GenerationJob.STATUS_QUEUED,
+        worker=None,
+    )
+    return failed + requeued
+
+
+def make_event(stage: str, **data) -> dict:
+    now = timezone.now()
+    event = {'stage': stage, 'at': now.isoformat(), 'ts': round(now.timestamp(), 3)}
+    if stage in STAGE_PROGRESS:
+        event['progress'] = STAGE_PROGRESS[stage]
+    event.update(data)
+    return event
+
+
+def record_event(job: GenerationJob, stage: str, **data) -> dict:
+    """작업에 진행 단계 이벤트 추가 (워커와 저장 요청이 동시에 쓸 수 있음)"""
+    event = make_event(stage, **data)
+    append_event(job, event)
+    return event
+
+
+def append_event(job: GenerationJob, event: dict, update_fields=()) -> None:
+    """
+    행을 잠그고 DB의 최신 events 뒤에 붙여 저장 (들고 있던 목록으로 덮어쓰면 동시 기록이 사라짐).
+    update_fields에 적은 job 필드도 같은 UPDATE로 저장. job.events는 저장된 목록으로 바뀐다
+    """
+    retry_on_lock(_append_event, job, event, update_fields)
+
+
+def _append_event(job: GenerationJob, event: dict, update_fields) -> None:
+    with transaction.atomic():
+        events = (
+            GenerationJob.objects.select_for_update()
+            .filter(pk=job.pk).values_list('events', flat=True).get()
+        )
+        job.events = (events or []) + [event]
+        job.save(update_fields=[*update_fields, 'events'])
+
+
+def job_progress(job: GenerationJob) -> int:
+    for event in reversed(job.events or []):
+        if 'progress' in event:
+            return event['progress']
+    return PROGRESS_BY_STATUS.get(job.status, 0)
+
+
+def job_payload(job: GenerationJob) -> dict:
+    """상태 조회 API 응답용"""
+    return {
+        'id': job.id,
+        'diary_id': job.diary_id,
+        'job_status': job.status,
+        'panel': job.panel,
+        'progress': job_progress(job),
+        'temp_image_url': job.temp_image_url,
+        'error': job.error,
+        'events': job.events or [],
+    }
@@ -0,0 +1,68 @@
+"""
+일기 목록(show) 키셋 페이지네이션.
+
+OFFSET 대신 마지막 카드의 (posted_date, id)를 커서로 넘겨
+"그보다 오래된 것" 만 (author, posted_date) 인덱스로 읽는다.
+목록 카드에는 본문 전체가 필요 없으므로 content는 DB에서 앞부분만 잘라 온다.
+"""
+
+import base64
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from django.db.models import Q
+from django.db.models.functions import Substr
+
+from .models import DiaryModel
+
+
+PAGE_SIZE = 24
+
+# 카드에 필요한 컬럼만 (content 제외)
+CARD_FIELDS = ('id', 'note', 'posted_date', 'image_url', 'thumbnail_url', 'preview_url')
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(diary: DiaryModel) -> str:
+    raw = f"{diary.posted_date.isoformat()}|{diary.id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        posted, diary_id = base64.urlsafe_b64decode(padded).decode('utf-8').split('|')
+        posted_date = datetime.fromisoformat(posted)
+        if posted_date.tzinfo is None:
+            raise ValueError('naive datetime')
+        return posted_date, int(diary_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursor(str(e)) from e
+
+
+def card_queryset(user):
+    """목록 카드용 쿼리셋 (최신순, content는 summary() 판단에 필요한 만큼만)"""
+    return (
+        DiaryModel.objects.filter(author=user)
+        .only(*CARD_FIELDS)
+        .annotate(content_head=Substr('content', 1, DiaryModel.SUMMARY_LENGTH + 1))
+        .order_by('-posted_date', '-id')
+    )
+
+
+def diary_page(user, cursor: Optional[str] = None, limit: int = PAGE_SIZE) -> Tuple[List[DiaryModel], Optional[str]]:
+    """반환: (카드 목록, 다음 페이지 커서 또는 None)"""
+    qs = card_queryset(user)
+    if cursor:
+        posted_date, diary_id = decode_cursor(cursor)
+        qs = qs.filter(Q(posted_date__lt=posted_date) | Q(posted_date=posted_date, id__lt=diary_id))
+
+    # 한 개 더 읽어서 다음 페이지 존재 여부 판단
+    rows = list(qs[:limit + 1])
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1])
+    return rows, None
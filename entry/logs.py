@@ -0,0 +1,153 @@
+"""
+구조화 로그 (JSON 한 줄, 요청 경로에서 I/O 없음).
+
+- BackgroundHandler: QueueHandler. 요청 스레드는 레코드를 큐에 넣기만 하고
+  QueueListener 스레드가 JSON으로 직렬화해 stderr/파일에 쓴다.
+  큐가 가득 차면 기다리지 않고 버린다 (버린 수는 dropped(), 다음 기록에 dropped 필드로 남김)
+- ContextFilter: 요청 id / 사용자 id를 레코드에 붙인다 (middleware.request_context_middleware가 설정)
+- SampleFilter: 자주 호출되는 API 로그를 요청 단위로 표본 추출 (WARNING 이상은 항상 남김)
+- JsonFormatter: {"ts", "level", "logger", "msg", "request_id", "user_id", ...extra}
+
+설정은 settings.LOGGING (LOG_LEVEL, LOG_LEVELS, LOG_FILE, LOG_API_SAMPLE_RATE).
+
+사용 예:
+    logger = logging.getLogger(__name__)
+    logger.info('diary saved', extra={'diary_id': diary.id, 'duration_ms': 12.5})
+"""
+
+from __future__ import annotations
+
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+import zlib
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+
+request_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('request_id', default=None)
+user_id_var: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar('user_id', default=None)
+
+# LogRecord 기본 속성 (이 외의 속성은 extra로 보고 JSON에 그대로 넣음)
+_RESERVED = frozenset(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+
+class ContextFilter(logging.Filter):
+    """현재 요청의 request_id / user_id를 레코드에 붙임 (이미 extra로 넘겼으면 그대로)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, 'request_id'):
+            record.request_id = request_id_var.get()
+        if not hasattr(record, 'user_id'):
+            record.user_id = user_id_var.get()
+        return True
+
+
+class SampleFilter(logging.Filter):
+    """
+    rate 비율의 요청만 남김 (0~1). 같은 요청의 로그는 함께 남거나 함께 빠지도록 request_id 해시로 고름.
+    views를 주면 레코드의 view 속성이 그 안에 있을 때만 표본 추출 (접근 로그용)
+    """
+
+    def __init__(self, rate: float = 1.0, views=None, name: str = ''):
+        super().__init__(name)
+        self.rate = max(0.0, min(1.0, float(rate)))
+        self.views = frozenset(views) if views else None
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate >= 1.0 or record.levelno >= logging.WARNING:
+            return True
+        if self.views is not None and getattr(record, 'view', None) not in self.views:
+            return True
+        request_id = getattr(record, 'request_id', None) or request_id_var.get()
+        if request_id is None:
+            return random.random() < self.rate
+        return zlib.crc32(request_id.encode()) % 10000 < self.rate * 10000
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+            'request_id': getattr(record, 'request_id', None),
+            'user_id': getattr(record, 'user_id', None),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED and key not in data:
+                data[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data['exc'] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class BackgroundHandler(QueueHandler):
+    """
+    큐에 넣기만 하는 핸들러. 실제 쓰기는 QueueListener 스레드가 한다.
+    filename이 비어 있으면 stderr (gunicorn/컨테이너 로그 수집).
+    """
+
+    def __init__(self, filename: str = '', stream=None, queue_size: int = 10000, level=logging.NOTSET):
+        super().__init__(queue.Queue(maxsize=queue_size))
+        self.setLevel(level)
+        if filename:
+            target = logging.FileHandler(filename, encoding='utf-8', delay=True)
+        else:
+            target = logging.StreamHandler(stream or sys.stderr)
+        target.setFormatter(JsonFormatter())
+        self.target = target
+        self._dropped = 0
+        self._dropped_lock = threading.Lock()
+        self._listener = QueueListener(self.queue, target, respect_handler_level=False)
+        self._listener.start()
+        atexit.register(self.close)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 직렬화는 리스너 스레드에서. 여기서는 메시지/예외만 문자열로 고정 (이후 객체가 바뀌어도 안전)
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        record.stack_info = None
+        with self._dropped_lock:
+            if self._dropped:
+                record.dropped = self._dropped
+                self._dropped = 0
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self._dropped += 1 + getattr(record, 'dropped', 0)
+
+    def dropped(self) -> int:
+        with self._dropped_lock:
+            return self._dropped
+
+    def flush(self) -> None:
+        """큐에 쌓인 기록을 모두 쓸 때까지 대기 (테스트/종료 시)"""
+        if self._listener is not None:
+            self.queue.join()
+            self.target.flush()
+
+    def close(self) -> None:
+        listener, self._listener = self._listener, None
+        if listener is not None:
+            listener.stop()
+            self.target.close()
+        super().close()
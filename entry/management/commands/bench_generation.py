@@ -0,0 +1,214 @@
+"""
+작성 → 생성 → 저장 → 캘린더 → 상세 종단 간 벤치마크 (OpenAI/S3 호출 없음)
+
+    python manage.py bench_generation --users 8 --diaries 3 --workers 4 \
+        --latency 0.8 --image-latency 6 --jitter 0.3 --error-rate 0.02 --output bench_generation.json
+
+- 임시 DB(테스트 DB 방식, 끝나면 삭제)
+- OpenAI 대신 FakeOpenAIClient (지연/오류율/PNG 크기 지정, 시드 고정)
+- OpenAI 임시 URL 대신 로컬 HTTP 서버, S3 대신 임시 디렉터리 FileSystemStorage
+- 사용자 N명이 스레드로 동시에 화면 흐름을 실행하고, 생성 작업은 --workers 개 워커 스레드가 처리
+- 단계별 p50/p90/p99, 흐름 처리량, 최대 RSS를 JSON으로 출력 (릴리스 간 비교용)
+- --error-rate 0인데 실패한 단계가 있으면 결과를 출력한 뒤 종료 코드 1
+"""
+
+import base64
+import random
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from entry.bench import max_rss_kb, report, serve_bytes, summarize, synthetic_diary_text, temporary_database, write_report
+
+
+STEPS = ('write', 'generate', 'save', 'calendar', 'detail')
+
+
+class Command(BaseCommand):
+    help = '가짜 OpenAI/로컬 스토리지로 일기 작성~상세 조회 흐름을 동시 사용자 N명으로 측정합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=8, help='동시 사용자 수')
+        parser.add_argument('--diaries', type=int, default=3, help='사용자당 작성할 일기 수 (흐름 반복 횟수)')
+        parser.add_argument('--workers', type=int, default=4, help='생성 워커 스레드 수')
+        parser.add_argument('--mode', choices=('single', 'panels'), default='single', help='CARTOON_GENERATION_MODE')
+        parser.add_argument('--latency', type=float, default=0.05, help='가짜 아웃라인 호출 지연(초)')
+        parser.add_argument('--image-latency', type=float, default=0.2, help='가짜 이미지 호출 지연(초)')
+        parser.add_argument('--jitter', type=float, default=0.2, help='지연 ±비율')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='가짜 API 호출당 오류 확률')
+        parser.add_argument('--image-px', type=int, default=512, help='가짜 이미지 한 변(px)')
+        parser.add_argument('--rate', type=float, default=0.0, help='OpenAI 초당 요청 제한 (0 = 제한 없음)')
+        parser.add_argument('--poll-interval', type=float, default=0.05, help='작업 상태 폴링 간격(초)')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', type=str, default='', help='결과 JSON 파일 경로')
+
+    def handle(self, *args, **options):
+        from entry.Image_making import client as openai_client
+
+        fake = openai_client.FakeOpenAIClient(
+            latency=options['latency'],
+            image_latency=options['image_latency'],
+            jitter=options['jitter'],
+            error_rate=options['error_rate'],
+            image_px=options['image_px'],
+            seed=options['seed'],
+        )
+        payload = base64.b64decode(fake.b64_png)
+        limiter = openai_client.RateLimiter(
+            max_in_flight=max(8, options['workers'] * 4), rate=options['rate'], burst=max(1, options['workers']),
+        )
+
+        with serve_bytes(payload) as url, tempfile.TemporaryDirectory(prefix='bench_media_') as media, \
+                temporary_database(), override_settings(
+                    ALLOWED_HOSTS=['testserver'],
+                    CARTOON_STORAGE='django.core.files.storage.FileSystemStorage',
+                    MEDIA_ROOT=media,
+                    MEDIA_URL='/media/',
+                    CARTOON_GENERATION_MODE=options['mode'],
+                    GENERATION_QUEUE_EAGER=False,
+                ):
+            fake.image_url = url
+            openai_client.set_client(fake)
+            openai_client.set_limiter(limiter)
+            try:
+                results = self._run(options)
+            finally:
+                openai_client.set_client(None)
+                openai_client.set_limiter(None)
+            results['fake_api_calls'] = len(fake.calls)
+            results['fake_api_max_in_flight'] = fake.max_in_flight
+
+        params = {key: options[key] for key in (
+            'users', 'diaries', 'workers', 'mode', 'latency', 'image_latency', 'jitter',
+            'error_rate', 'image_px', 'rate', 'seed',
+        )}
+        params['image_bytes'] = len(payload)
+        params['vendor'] = connection.vendor
+        write_report(report('generation_flow', results, params), self.stdout, options['output'])
+
+        # 오류를 주입하지 않았는데 실패한 단계가 있으면 결과는 남기되 종료 코드로 알림 (회귀 확인용)
+        failed = {step: n for step, n in results['step_errors'].items() if n}
+        if failed and not options['error_rate']:
+            raise CommandError('오류 주입 없이 실패한 단계가 있습니다: ' + ', '.join(
+                f'{step}={n}' for step, n in failed.items()
+            ))
+
+    def _run(self, options):
+        from entry.jobs import claim_next_job, run_job
+
+        users = [
+            User.objects.create_user(username=f'bench{i}@test.com', email=f'bench{i}@test.com', password='x')
+            for i in range(options['users'])
+        ]
+        timings = {step: [] for step in STEPS}
+        errors = {step: 0 for step in STEPS}
+        flows = []
+        lock = threading.Lock()
+        stop = threading.Event()
+
+        def worker(index):
+            try:
+                while not stop.is_set():
+                    job = claim_next_job(f'bench-worker-{index}')
+                    if job is None:
+                        time.sleep(options['poll_interval'])
+                        continue
+                    run_job(job)
+            finally:
+                connection.close()
+
+        def user_flow(index, user):
+            rnd = random.Random(options['seed'] * 1000 + index)
+            client = Client()
+            client.force_login(user)
+            try:
+                for n in range(options['diaries']):
+                    started = time.perf_counter()
+                    ok = self._one_flow(client, user, date(2025, 1, 1) + timedelta(days=n), rnd, options, timings, errors, lock)
+                    with lock:
+                        flows.append((ok, time.perf_counter() - started))
+            finally:
+                close_old_connections()
+                connection.close()
+
+        baseline_kb = max_rss_kb()
+        workers = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(options['workers'])]
+        clients = [threading.Thread(target=user_flow, args=(i, u)) for i, u in enumerate(users)]
+        started = time.perf_counter()
+        for thread in workers + clients:
+            thread.start()
+        for thread in clients:
+            thread.join()
+        stop.set()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        completed = [seconds for ok, seconds in flows if ok]
+        return {
+            'elapsed_s': round(elapsed, 3),
+            'flows': len(flows),
+            'flows_failed': len(flows) - len(completed),
+            'throughput_flows_per_s': round(len(completed) / elapsed, 3) if elapsed else None,
+            'flow': summarize(completed),
+            'steps': {step: summarize(timings[step]) for step in STEPS},
+            'step_errors': errors,
+            'max_rss_kb': max_rss_kb(),
+            'rss_increase_kb': max_rss_kb() - baseline_kb,
+        }
+
+    def _one_flow(self, client, user, day, rnd, options, timings, errors, lock):
+        """한 사용자의 한 일기 흐름. 실패한 단계에서 멈추고 False"""
+        from entry.models import DiaryModel
+
+        def step(name, call, check):
+            t0 = time.perf_counter()
+            try:
+                result = call()
+                ok = check(result)
+            except Exception:
+                ok, result = False, None
+            with lock:
+                if ok:
+                    timings[name].append(time.perf_counter() - t0)
+                else:
+                    errors[name] += 1
+            return result if ok else None
+
+        resp = step('write', lambda: client.post(reverse('entry'), {
+            'note': f'벤치 {day.isoformat()}',
+            'content': synthetic_diary_text(rnd),
+            'productivity': rnd.randint(1, 10),
+            'selected_date': day.isoformat(),
+            'theme': rnd.choice(('Theme1', 'Theme2', 'Theme3')),
+        }), lambda r: r.status_code == 200)
+        if resp is None:
+            return False
+        diary_id = DiaryModel.objects.filter(author=user).order_by('-id').values_list('id', flat=True).first()
+
+        def generate():
+            submitted = client.post(reverse('generate_image', args=[diary_id])).json()
+            status_url = reverse('generation_job_status', args=[submitted['job_id']])
+            while True:
+                job = client.get(status_url).json()['job']
+                if job['job_status'] in ('succeeded', 'failed'):
+                    return job
+                time.sleep(options['poll_interval'])
+
+        if step('generate', generate, lambda job: job['job_status'] == 'succeeded') is None:
+            return False
+        if step('save', lambda: client.post(reverse('save_image', args=[diary_id])),
+                lambda r: r.status_code == 200 and r.json().get('status') == 'ok') is None:
+            return False
+        if step('calendar', lambda: client.get(reverse('diary_month_api', args=[day.year, day.month])),
+                lambda r: r.status_code == 200) is None:
+            return False
+        return step('detail', lambda: client.get(reverse('detail', args=[diary_id])),
+                    lambda r: r.status_code == 200) is not None
@@ -0,0 +1,215 @@
+"""
+로그 쓰기 방식별 요청 지연 시간 벤치마크
+
+    python manage.py bench_logging --requests 500 --rounds 3 --sink-latency-ms 2 --output bench_logging.json
+
+임시 DB(테스트 DB 방식, 끝나면 삭제)에서 일기 작성 POST와 날짜별/월별 조회 API를 번갈아 호출하며
+entry.* 로그 핸들러만 바꿔 같은 요청을 측정한다.
+- off   : 로그 끔 (logging.disable, 기준선)
+- sync  : 요청 스레드에서 바로 JSON 한 줄 쓰기 (StreamHandler, 이전 print와 같은 동기 I/O)
+- queue : entry.logs.BackgroundHandler (큐에 넣고 리스너 스레드가 쓰기, 운영 설정)
+--sink-latency-ms로 쓰기 한 번마다 지연을 넣어 느린 stdout/파이프(로그 수집기 밀림)를 흉내 낸다.
+라운드마다 방식 순서를 돌려 캐시/DB 상태 차이를 섞는다.
+"""
+
+import io
+import logging
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from entry.bench import report, summarize, temporary_database, write_report
+from entry.logs import BackgroundHandler, ContextFilter, JsonFormatter, SampleFilter
+
+
+MODES = ('off', 'sync', 'queue')
+SAMPLED_LOGGERS = ('entry.api', 'entry.request')
+
+
+class SlowSink(io.TextIOBase):
+    """쓰기마다 delay초 멈추는 파일 (느린 로그 수집기)"""
+
+    def __init__(self, path: str, delay: float):
+        self._file = open(path, 'a', encoding='utf-8')
+        self.delay = delay
+        self.lines = 0
+
+    def write(self, text: str) -> int:
+        if self.delay:
+            time.sleep(self.delay)
+        self.lines += text.count('\n')
+        return self._file.write(text)
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        super().close()  # flush 후 닫힘 표시
+        self._file.close()
+
+
+class Command(BaseCommand):
+    help = '로그 쓰기 방식(off/sync/queue)별 요청 지연 시간을 측정합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='방식·라운드마다 보내는 요청 수')
+        parser.add_argument('--rounds', type=int, default=3)
+        parser.add_argument('--sink-latency-ms', type=float, default=0.0, help='로그 쓰기 한 번의 지연 (ms)')
+        parser.add_argument('--sample-rate', type=float, default=None,
+                            help='조회 API 로그 표본 비율 (기본: settings.LOG_API_SAMPLE_RATE)')
+        parser.add_argument('--modes', type=str, default=','.join(MODES))
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', type=str, default='', help='결과 JSON 파일 경로')
+
+    def handle(self, *args, **options):
+        modes = [m.strip() for m in options['modes'].split(',') if m.strip()]
+        unknown = set(modes) - set(MODES)
+        if unknown:
+            self.stderr.write(f'알 수 없는 방식: {", ".join(sorted(unknown))}')
+            return
+
+        tmpdir = tempfile.mkdtemp(prefix='bench_logging_')
+        sink = SlowSink(os.path.join(tmpdir, 'app.log'), options['sink_latency_ms'] / 1000)
+        try:
+            with temporary_database(), override_settings(ALLOWED_HOSTS=['testserver']), \
+                    _sample_rate(options['sample_rate']):
+                results = self._run(options, modes, sink)
+        finally:
+            sink.close()
+            import shutil
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+        params = {key: options[key] for key in ('requests', 'rounds', 'sink_latency_ms', 'sample_rate', 'seed')}
+        params['modes'] = modes
+        write_report(report('logging', results, params), self.stdout, options['output'])
+
+    def _run(self, options, modes, sink):
+        rnd = random.Random(options['seed'])
+        user = User.objects.create_user(username='bench@test.com', email='bench@test.com', password='bench-password')
+        client = Client()
+        client.force_login(user)
+        start_day = date(2025, 1, 1)
+        days = [start_day + timedelta(days=i) for i in range(60)]
+
+        def one_request():
+            """작성 1 : 날짜별 조회 3 : 월별 조회 1 비율"""
+            roll = rnd.random()
+            day = rnd.choice(days)
+            if roll < 0.2:
+                return 'entry', client.post(reverse('entry'), {
+                    'note': f'벤치 {day}', 'content': '오늘은 ' * 40, 'productivity': rnd.randint(1, 10),
+                    'selected_date': day.isoformat(),
+                })
+            if roll < 0.8:
+                return 'diary_by_date_api', client.get(reverse('diary_by_date_api', args=[day.isoformat()]))
+            return 'diary_month_api', client.get(reverse('diary_month_api', args=[day.year, day.month]))
+
+        # 예열 (첫 요청의 URL/템플릿 로딩 등은 측정에서 뺌)
+        with _handler('off', sink):
+            for _ in range(20):
+                one_request()
+
+        samples = {mode: {} for mode in modes}
+        lines = {mode: 0 for mode in modes}
+        dropped = {mode: 0 for mode in modes}
+        for round_no in range(options['rounds']):
+            order = modes[round_no % len(modes):] + modes[:round_no % len(modes)]
+            for mode in order:
+                before = sink.lines
+                with _handler(mode, sink) as handler:
+                    for _ in range(options['requests']):
+                        t0 = time.perf_counter()
+                        view, response = one_request()
+                        elapsed = time.perf_counter() - t0
+                        if response.status_code >= 400:
+                            raise RuntimeError(f'{view} returned {response.status_code}')
+                        samples[mode].setdefault(view, []).append(elapsed)
+                    # 큐 방식은 측정이 끝난 뒤 남은 기록을 모두 쓸 때까지 기다림 (측정 시간에는 포함하지 않음)
+                    if isinstance(handler, BackgroundHandler):
+                        dropped[mode] += handler.dropped()
+                        handler.flush()
+                lines[mode] += sink.lines - before
+            self.stderr.write(f'round {round_no + 1}/{options["rounds"]} done')
+
+        results = {}
+        for mode in modes:
+            everything = [s for view_samples in samples[mode].values() for s in view_samples]
+            results[mode] = {
+                'all': summarize(everything),
+                'views': {view: summarize(s) for view, s in sorted(samples[mode].items())},
+                'log_lines': lines[mode],
+                'dropped': dropped[mode],
+            }
+        if 'off' in results:
+            base = results['off']['all']['mean_ms']
+            for mode in modes:
+                mean = results[mode]['all']['mean_ms']
+                results[mode]['overhead_mean_ms'] = round(mean - base, 3) if mean is not None and base else None
+        self.stderr.write(' '.join(
+            f"{mode}: p50={results[mode]['all']['p50_ms']}ms p99={results[mode]['all']['p99_ms']}ms" for mode in modes
+        ))
+        return results
+
+
+class _handler:
+    """entry 로거의 핸들러를 mode에 맞게 잠시 바꿈 (끝나면 settings.LOGGING 핸들러로 복구)"""
+
+    def __init__(self, mode: str, sink):
+        self.mode = mode
+        self.sink = sink
+        self.logger = logging.getLogger('entry')
+
+    def __enter__(self):
+        self.saved = self.logger.handlers[:]
+        for h in self.saved:
+            self.logger.removeHandler(h)
+        if self.mode == 'off':
+            logging.disable(logging.CRITICAL)
+            self.handler = None
+            return None
+        if self.mode == 'sync':
+            self.handler = logging.StreamHandler(self.sink)
+            self.handler.setFormatter(JsonFormatter())
+        else:
+            self.handler = BackgroundHandler(stream=self.sink)
+        self.handler.addFilter(ContextFilter())
+        self.logger.addHandler(self.handler)
+        return self.handler
+
+    def __exit__(self, *exc):
+        logging.disable(logging.NOTSET)
+        if self.handler is not None:
+            self.logger.removeHandler(self.handler)
+            self.handler.close()
+        for h in self.saved:
+            self.logger.addHandler(h)
+        return False
+
+
+class _sample_rate:
+    """조회 API/접근 로그 표본 비율을 잠시 바꿈 (None이면 그대로)"""
+
+    def __init__(self, rate):
+        self.rate = rate
+
+    def __enter__(self):
+        self.saved = []
+        if self.rate is None:
+            return
+        for name in SAMPLED_LOGGERS:
+            for f in logging.getLogger(name).filters:
+                if isinstance(f, SampleFilter):
+                    self.saved.append((f, f.rate))
+                    f.rate = self.rate
+
+    def __exit__(self, *exc):
+        for f, rate in self.saved:
+            f.rate = rate
+        return False
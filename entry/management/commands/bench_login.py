@@ -0,0 +1,120 @@
+"""
+이메일 로그인 조회 벤치마크
+
+    python manage.py bench_login --users 1000000 --logins 2000 --output bench_login.json
+
+임시 DB(테스트 DB 방식, 끝나면 삭제)에 합성 사용자 N명을 넣고 다음을 측정한다.
+- lookup: accounts.find_user_by_email (LOWER(email) 인덱스, 입력은 대소문자 섞음)
+- authenticate: EmailBackend 인증 (비밀번호 해시 반복 횟수는 --iterations, 조회 비용만 보려면 1)
+- login_view: 로그인 화면 POST 전체 (세션 생성 포함, --view-logins 회)
+- legacy_scan: 이전 방식 User.objects.filter(email=...) (인덱스 없음, --legacy-lookups 회)
+결과 JSON에는 두 조회의 실행 계획(EXPLAIN)도 넣는다.
+"""
+
+import random
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from entry.bench import chunked, report, summarize, temporary_database, write_report
+
+
+PASSWORD = 'bench-password'
+
+
+def _email(i: int) -> str:
+    return f'bench{i}@test.com'
+
+
+def _variant(rnd, email: str) -> str:
+    """사용자가 대소문자를 섞어 입력한 이메일"""
+    return ''.join(c.upper() if rnd.random() < 0.3 else c for c in email)
+
+
+class Command(BaseCommand):
+    help = '합성 사용자 N명에서 이메일 로그인 조회/인증 지연 시간을 측정합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000000, help='합성 사용자 수')
+        parser.add_argument('--logins', type=int, default=2000, help='조회/인증 측정 횟수')
+        parser.add_argument('--view-logins', type=int, default=200, help='로그인 화면 POST 측정 횟수 (0이면 생략)')
+        parser.add_argument('--legacy-lookups', type=int, default=20, help='이전 방식(인덱스 없는 email=) 조회 횟수 (0이면 생략)')
+        parser.add_argument('--iterations', type=int, default=1, help='PBKDF2 반복 횟수 (0 = Django 기본값)')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', type=str, default='', help='결과 JSON 파일 경로')
+
+    def handle(self, *args, **options):
+        with temporary_database(), override_settings(
+            ALLOWED_HOSTS=['testserver'], PASSWORD_HASH_ITERATIONS=options['iterations'],
+        ):
+            results = self._run(options)
+        params = {key: options[key] for key in ('users', 'logins', 'view_logins', 'legacy_lookups', 'iterations', 'seed')}
+        params['vendor'] = connection.vendor
+        write_report(report('login', results, params), self.stdout, options['output'])
+
+    def _run(self, options):
+        from entry import accounts
+
+        rnd = random.Random(options['seed'])
+        total = options['users']
+
+        started = time.perf_counter()
+        # 해시는 한 번만 만들어 모든 사용자에 사용 (N번 PBKDF2를 돌리지 않음)
+        password_hash = make_password(PASSWORD)
+        for batch in chunked(range(total), 5000):
+            User.objects.bulk_create(
+                User(username=_email(i), email=_email(i), password=password_hash) for i in batch
+            )
+        load_seconds = time.perf_counter() - started
+        self.stderr.write(f'{total} users loaded in {load_seconds:.1f}s')
+
+        def pick():
+            return _variant(rnd, _email(rnd.randrange(total)))
+
+        def timed(fn, count):
+            samples = []
+            for _ in range(count):
+                email = pick()
+                t0 = time.perf_counter()
+                ok = fn(email)
+                samples.append(time.perf_counter() - t0)
+                if not ok:
+                    raise RuntimeError(f'login failed for {email}')
+            return summarize(samples)
+
+        results = {'load_seconds': round(load_seconds, 2)}
+        results['lookup'] = timed(lambda email: accounts.find_user_by_email(email) is not None, options['logins'])
+        results['authenticate'] = timed(
+            lambda email: accounts.EmailBackend().authenticate(None, email=email, password=PASSWORD) is not None,
+            options['logins'],
+        )
+
+        if options['view_logins']:
+            client = Client()
+            url = reverse('login')
+
+            def post(email):
+                response = client.post(url, {'username': email, 'password': PASSWORD})
+                client.logout()
+                return response.status_code == 302
+
+            results['login_view'] = timed(post, options['view_logins'])
+
+        sample = _email(0)
+        results['plan'] = {'lookup': accounts.users_with_email(sample).explain()}
+        if options['legacy_lookups']:
+            results['legacy_scan'] = timed(
+                lambda email: User.objects.filter(email=email.lower()).first() is not None,
+                options['legacy_lookups'],
+            )
+            results['plan']['legacy_scan'] = User.objects.filter(email=sample).explain()
+
+        self.stderr.write(
+            f"lookup p99={results['lookup']['p99_ms']}ms authenticate p99={results['authenticate']['p99_ms']}ms"
+        )
+        return results
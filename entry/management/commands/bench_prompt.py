@@ -0,0 +1,69 @@
+"""
+스타일 템플릿 + 4패널 → 최종 프롬프트 렌더링 마이크로 벤치마크 (DB/OpenAI 호출 없음)
+
+    python manage.py bench_prompt --renders 20000 --output bench_prompt.json
+
+- 등록된 스타일(sample_prompt_<이름>.txt), 기본 '하찮은 그림' 템플릿, sample_prompt.txt 각각을 측정
+- 패널 내용은 합성 일기 문장으로 미리 만들어 두고 _render_prompt만 반복 호출
+- 렌더 1회당 지연(배치 평균)의 p50/p99와 초당 렌더 수를 JSON으로 출력 (일괄 백필 규모 추정용)
+"""
+
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from entry.bench import report, summarize, synthetic_diary_text, write_report
+
+
+class Command(BaseCommand):
+    help = '스타일 템플릿별 프롬프트 렌더링 속도를 측정합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--renders', type=int, default=20000, help='템플릿당 렌더 횟수')
+        parser.add_argument('--batch', type=int, default=200, help='한 번에 시간을 잴 렌더 수 (지연은 배치 평균)')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', type=str, default='', help='결과 JSON 파일 경로')
+
+    def handle(self, *args, **options):
+        from entry.Image_making.pipeline import PROJECT_ROOT, _render_prompt
+        from entry.Image_making.styles import EMPTY, get_registry, template_for
+
+        registry = get_registry()
+        templates = {name: registry.get(name) for name in registry.names()}
+        templates['default'] = EMPTY
+        templates['sample_prompt.txt'] = template_for(path=PROJECT_ROOT / 'sample_prompt.txt')
+
+        rnd = random.Random(options['seed'])
+        panel_sets = [
+            [
+                {'scene': synthetic_diary_text(rnd, words=12), 'caption': synthetic_diary_text(rnd, words=4),
+                 'emotion': rnd.choice(('', 'happy', 'tired', 'calm'))}
+                for _ in range(4)
+            ]
+            for _ in range(64)
+        ]
+
+        batch = max(1, options['batch'])
+        results = {}
+        for name, template in templates.items():
+            samples = []
+            done = 0
+            started = time.perf_counter()
+            while done < options['renders']:
+                n = min(batch, options['renders'] - done)
+                t0 = time.perf_counter()
+                for i in range(done, done + n):
+                    _render_prompt(template, panel_sets[i % len(panel_sets)])
+                samples.append((time.perf_counter() - t0) / n)
+                done += n
+            elapsed = time.perf_counter() - started
+            results[name] = {
+                'per_render': summarize(samples),
+                'renders_per_s': round(done / elapsed, 1) if elapsed else None,
+                'prompt_chars': len(_render_prompt(template, panel_sets[0])),
+            }
+            self.stderr.write(f"{name}: {results[name]['renders_per_s']} renders/s")
+
+        params = {key: options[key] for key in ('renders', 'batch', 'seed')}
+        write_report(report('prompt_render', results, params), self.stdout, options['output'])
@@ -0,0 +1,128 @@
+"""
+임시 이미지 → 스토리지 저장 경로의 메모리 벤치마크
+
+    python manage.py bench_s3_transfer --size-mb 4 --saves 5 --output bench_s3.json
+
+로컬 HTTP 서버(OpenAI 임시 URL 대체)와 파일시스템 스토리지(S3 대체)를 사용한다.
+모드별로 별도 프로세스에서 실행해 저장 중 최대 RSS 증가량을 비교 (Linux: VmHWM을 저장 직전에 되돌려 측정.
+ru_maxrss는 부모 값을 물려받아 0으로 보이므로 /proc이 없을 때만 쓰고 rss_source로 표시):
+    buffered  : 기존 방식 (response.content → BytesIO → storage.save)
+    streaming : 운영 경로 save_temp_image_to_s3와 같은 순서
+                (transfer.spool_url로 받으며 sha256 → blobs.store로 내용 주소 저장)
+streaming은 임시 DB(CartoonBlob)를 쓰고, 매 저장 전 이전 blob을 지워 매번 실제 업로드를 측정한다
+(같은 내용 재사용으로 업로드를 건너뛰지 않도록, 정리 시간은 측정에서 제외).
+"""
+
+import json
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from io import BytesIO
+
+from django.core.files.storage import FileSystemStorage
+from django.core.management.base import BaseCommand
+
+from entry.bench import (
+    peak_rss_kb, random_png_like, report, reset_peak_rss, serve_bytes, summarize, temporary_database, write_report,
+)
+
+
+MODES = ('buffered', 'streaming')
+
+
+def _save_buffered(url, storage, name):
+    import requests
+
+    response = requests.get(url, timeout=30)
+    response.raise_for_status()
+    return storage.save(name, BytesIO(response.content))
+
+
+def _save_streaming(url, storage, name):
+    from entry import blobs
+    from entry.Image_making.transfer import spool_url
+
+    spool, digest, size = spool_url(url)
+    try:
+        blob, _ = blobs.store(storage, spool, digest, size)
+    finally:
+        spool.close()
+    return blob.key
+
+
+def _reset_streaming(storage):
+    from entry.models import CartoonBlob
+
+    for key in CartoonBlob.objects.values_list('key', flat=True):
+        storage.delete(key)
+    CartoonBlob.objects.all().delete()
+
+
+class Command(BaseCommand):
+    help = '임시 이미지 저장 경로(버퍼링 vs 스트리밍)의 저장당 최대 RSS/지연 시간을 측정합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size-mb', type=float, default=4.0, help='이미지 크기(MB)')
+        parser.add_argument('--saves', type=int, default=5, help='모드별 저장 횟수')
+        parser.add_argument('--output', type=str, default='', help='결과 JSON 파일 경로')
+        # 내부용: 자식 프로세스에서 한 모드만 측정
+        parser.add_argument('--child', choices=MODES, help='(내부용)')
+        parser.add_argument('--url', type=str, default='', help='(내부용)')
+
+    def handle(self, *args, **options):
+        if options['child']:
+            self._run_child(options['child'], options['url'], options['saves'])
+            return
+
+        size = int(options['size_mb'] * 1024 * 1024)
+        payload = random_png_like(size)
+        results = {}
+        with serve_bytes(payload) as url:
+            for mode in MODES:
+                proc = subprocess.run(
+                    [sys.executable, sys.argv[0], 'bench_s3_transfer',
+                     '--child', mode, '--url', url, '--saves', str(options['saves'])],
+                    capture_output=True, text=True, check=True,
+                )
+                results[mode] = json.loads(proc.stdout.strip().splitlines()[-1])
+
+        data = report('s3_transfer', results, {'size_bytes': size, 'saves': options['saves']})
+        write_report(data, self.stdout, options['output'])
+
+    def _run_child(self, mode, url, saves):
+        if mode == 'streaming':
+            with temporary_database():
+                self._measure(_save_streaming, _reset_streaming, url, saves)
+        else:
+            self._measure(_save_buffered, None, url, saves)
+
+    def _measure(self, save, reset, url, saves):
+        with tempfile.TemporaryDirectory() as tmp:
+            storage = FileSystemStorage(location=tmp)
+            # 임포트 비용은 기준선에서 제외 (저장 전에 미리 로드)
+            import requests  # noqa: F401
+            from entry import blobs  # noqa: F401
+            from entry.Image_making import transfer  # noqa: F401
+            # 부모(페이로드/HTTP 서버)의 최대 RSS를 물려받으므로 기록을 지금 RSS로 되돌리고 시작
+            rss_source = 'VmHWM' if reset_peak_rss() else 'ru_maxrss'
+            baseline_kb = peak_rss_kb()
+
+            tracemalloc.start()
+            timings = []
+            for i in range(saves):
+                if reset is not None:
+                    reset(storage)
+                started = time.perf_counter()
+                save(url, storage, f'diary_{i}.png')
+                timings.append(time.perf_counter() - started)
+            _, traced_peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        self.stdout.write(json.dumps({
+            'peak_rss_increase_kb': peak_rss_kb() - baseline_kb,
+            'rss_source': rss_source,
+            'peak_python_alloc_kb': traced_peak // 1024,
+            'latency': summarize(timings),
+        }))
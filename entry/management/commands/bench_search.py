@@ -0,0 +1,88 @@
+"""
+일기 전문 검색 벤치마크
+
+    python manage.py bench_search --diaries 100000 --queries 200 --output bench_search.json
+
+임시 DB(테스트 DB 방식, 끝나면 삭제)에 합성 일기를 넣고 search.search()의 지연 시간을 측정한다.
+흔한 단어(결과 多)와 드문 단어, 2단어 AND 검색을 섞어서 질의.
+"""
+
+import random
+import time
+from datetime import datetime, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from entry.bench import (
+    WORDS_KO, chunked, report, summarize, synthetic_diary_text, temporary_database, write_report,
+)
+
+
+TARGET_P99_MS = 50
+
+
+class Command(BaseCommand):
+    help = '합성 일기 N건에서 전문 검색 지연 시간(p50/p99)을 측정합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--diaries', type=int, default=100000, help='합성 일기 수')
+        parser.add_argument('--users', type=int, default=100, help='일기를 나눠 가질 사용자 수 (검색은 항상 한 사용자 범위)')
+        parser.add_argument('--queries', type=int, default=200, help='측정할 검색 횟수')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', type=str, default='', help='결과 JSON 파일 경로')
+
+    def handle(self, *args, **options):
+        with temporary_database():
+            results = self._run(options)
+        data = report('search', results, {
+            'diaries': options['diaries'], 'users': options['users'], 'queries': options['queries'],
+            'vendor': connection.vendor,
+        })
+        write_report(data, self.stdout, options['output'])
+
+    def _run(self, options):
+        from entry import search
+        from entry.models import DiaryModel
+
+        rnd = random.Random(options['seed'])
+        users = [User.objects.create_user(username=f'bench{i}@test.com', password='x') for i in range(options['users'])]
+        base = timezone.make_aware(datetime(2020, 1, 1, 9, 0))
+
+        started = time.perf_counter()
+        # bulk_create는 시그널이 없으므로 색인은 마지막에 한 번에 재생성
+        rows = (
+            DiaryModel(
+                author=users[i % len(users)],
+                note=' '.join(rnd.sample(WORDS_KO, 2)),
+                content=synthetic_diary_text(rnd),
+                posted_date=base + timedelta(hours=i),
+                productivity=rnd.randint(1, 10),
+            )
+            for i in range(options['diaries'])
+        )
+        for batch in chunked(list(rows), 2000):
+            DiaryModel.objects.bulk_create(batch)
+        search.rebuild_index()
+        load_seconds = time.perf_counter() - started
+
+        common, rare = WORDS_KO[:5], WORDS_KO[-10:]
+        kinds = {
+            'common_word': lambda: rnd.choice(common),
+            'rare_word': lambda: rnd.choice(rare),
+            'two_words': lambda: ' '.join(rnd.sample(WORDS_KO, 2)),
+        }
+        results = {'backend': search.get_backend().name, 'load_seconds': round(load_seconds, 2)}
+        for kind, make_query in kinds.items():
+            timings = []
+            for _ in range(options['queries']):
+                user = rnd.choice(users)
+                query = make_query()
+                t0 = time.perf_counter()
+                search.search(user.id, query, page=rnd.choice((1, 1, 1, 2)))
+                timings.append(time.perf_counter() - t0)
+            results[kind] = summarize(timings)
+            results[kind]['under_target'] = results[kind]['p99_ms'] < TARGET_P99_MS
+        return results
@@ -0,0 +1,48 @@
+"""
+사용자 일기 전체를 NDJSON(한 줄에 일기 하나) 또는 만화 PNG를 포함한 ZIP으로 내보내기
+
+    python manage.py export_diaries --user a@test.com --output diaries.ndjson
+    python manage.py export_diaries --user 3 --zip --output diaries.zip
+    python manage.py export_diaries --user a@test.com > diaries.ndjson
+
+- DB는 --chunk-size 건씩 서버 측 커서로 읽어 기록 수와 관계없이 메모리 일정 (entry/archive.py)
+- ZIP은 images/<날짜>_<id>.png + diaries.ndjson (이미지는 스토리지/URL에서 청크 단위로 복사)
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from entry import archive
+
+
+class Command(BaseCommand):
+    help = '사용자의 일기 전체를 NDJSON/ZIP으로 내보냅니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', required=True, help='사용자 id 또는 이메일')
+        parser.add_argument('--output', type=str, default='', help='출력 파일 경로 (없으면 표준 출력, ZIP은 필수)')
+        parser.add_argument('--zip', action='store_true', help='만화 PNG를 포함한 ZIP으로')
+        parser.add_argument('--chunk-size', type=int, default=archive.DEFAULT_CHUNK_SIZE, help='DB에서 한 번에 읽을 일기 수')
+
+    def handle(self, *args, **options):
+        user = archive.find_user(options['user'])
+        if user is None:
+            raise CommandError(f"존재하지 않는 사용자입니다: {options['user']}")
+        if options['zip'] and not options['output']:
+            raise CommandError('ZIP은 --output 경로가 필요합니다.')
+
+        if options['zip']:
+            chunks = archive.iter_zip(user, chunk_size=options['chunk_size'])
+        else:
+            chunks = archive.iter_ndjson(user, chunk_size=options['chunk_size'])
+
+        if not options['output']:
+            for chunk in chunks:
+                self.stdout.write(chunk.decode('utf-8'), ending='')
+            return
+
+        written = 0
+        with open(options['output'], 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+                written += len(chunk)
+        self.stderr.write(f"{user.email or user.username}: {written} bytes → {options['output']}")
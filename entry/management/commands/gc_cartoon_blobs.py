@@ -0,0 +1,43 @@
+"""
+참조가 없는 만화 원본 이미지(CartoonBlob)와 스토리지 객체 정리
+
+    python manage.py gc_cartoon_blobs --dry-run            # 삭제 대상 수/용량만 출력
+    python manage.py gc_cartoon_blobs --min-age-hours 24 --limit 1000
+
+- 일기(image_blob)와 생성 이력(CartoonVersion.blob) 어디에서도 참조하지 않는 blob이 대상
+- 저장 직후 아직 연결되지 않은 blob을 지우지 않도록 마지막 사용 후 --min-age-hours가 지난 것만
+- 원본(<sha256>.png)과 파생 이미지(썸네일/미리보기/개별 컷)를 함께 삭제
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from entry import blobs
+
+
+class Command(BaseCommand):
+    help = '참조가 없는 만화 이미지 blob과 스토리지 객체를 삭제합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-age-hours', type=float, default=blobs.GC_MIN_AGE.total_seconds() / 3600,
+                            help='마지막 사용 후 이 시간이 지난 blob만 삭제')
+        parser.add_argument('--limit', type=int, default=0, help='최대 삭제 수 (0 = 전부)')
+        parser.add_argument('--dry-run', action='store_true', help='삭제하지 않고 대상만 집계')
+
+    def handle(self, *args, **options):
+        from diary.storages import cartoon_storage
+
+        result = blobs.collect_garbage(
+            cartoon_storage(),
+            min_age=timedelta(hours=options['min_age_hours']),
+            dry_run=options['dry_run'],
+            limit=options['limit'],
+        )
+        megabytes = result['bytes'] / (1024 * 1024)
+        if options['dry_run']:
+            self.stdout.write(f"삭제 대상 {result['candidates']}건 ({megabytes:.1f}MB)")
+            return
+        self.stdout.write(f"삭제 {result['deleted']}건 / 대상 {result['candidates']}건 ({megabytes:.1f}MB), 실패 {result['errors']}건")
+        if result['errors']:
+            self.stdout.write(self.style.WARNING('실패한 blob은 남겨 두었습니다. 다시 실행하면 재시도합니다.'))
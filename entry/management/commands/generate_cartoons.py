@@ -0,0 +1,222 @@
+"""
+일기 여러 건의 만화를 한 번에 생성 (이미지 없는 일기 백필 / 스타일 템플릿 변경 후 재생성)
+
+    python manage.py generate_cartoons --missing-image --save
+    python manage.py generate_cartoons --user a@test.com --since 2025-01-01 --until 2025-03-31 --style ani
+    python manage.py generate_cartoons --missing-image --concurrency 8 --rate 1.5 --save --output report.json
+
+- 일기마다 GenerationJob을 만들어 직접 선점·실행 (웹 요청과 같은 이력/이벤트/계측이 남음)
+- 동시 실행 수는 --concurrency, OpenAI 호출은 프로세스 공용 제한기(--rate로 조정)를 함께 쓴다
+- 진행 상황은 체크포인트 파일(JSON Lines)에 한 줄씩 기록 → 중단 후 다시 실행하면 끝난 일기는 건너뜀
+"""
+
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Q
+
+from entry.bench import report, summarize, write_report
+from entry.dates import day_range, parse_day
+from entry.Image_making.styles import get_registry
+from entry.jobs import GenerationBusy, claim_job, default_worker_id, enqueue_generation, record_event, run_job
+from entry.models import DiaryModel, GenerationJob
+
+
+DEFAULT_CHECKPOINT = 'generate_cartoons.checkpoint.jsonl'
+
+
+def load_checkpoint(path):
+    """체크포인트 파일 → {diary_id: 마지막 기록}"""
+    done = {}
+    if not path or not os.path.exists(path):
+        return done
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # 기록 도중 중단된 마지막 줄
+            done[entry['diary_id']] = entry
+    return done
+
+
+class Command(BaseCommand):
+    help = '조건에 맞는 일기들의 만화를 일괄 생성합니다 (체크포인트로 이어서 실행 가능).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', action='append', default=[], help='대상 사용자 id 또는 이메일 (여러 번 지정 가능)')
+        parser.add_argument('--since', type=str, default='', help='이 날짜(YYYY-MM-DD)부터')
+        parser.add_argument('--until', type=str, default='', help='이 날짜(YYYY-MM-DD)까지 (포함)')
+        parser.add_argument('--missing-image', action='store_true', help='저장된 이미지(image_url)가 없는 일기만')
+        parser.add_argument('--style', choices=get_registry().names(), help='스타일 지정 (기본: 일기에 저장된 스타일)')
+        parser.add_argument('--language', type=str, default='en')
+        parser.add_argument('--limit', type=int, default=0, help='최대 처리 일기 수 (0 = 전부)')
+        parser.add_argument('--save', action='store_true', help='생성 후 S3 저장까지 진행')
+        parser.add_argument('--concurrency', type=int, default=4, help='동시에 생성할 일기 수')
+        parser.add_argument('--rate', type=float, default=None, help='OpenAI 초당 요청 제한 (기본: OPENAI_REQUESTS_PER_SECOND)')
+        parser.add_argument('--checkpoint', type=str, default=DEFAULT_CHECKPOINT, help='체크포인트 파일 경로')
+        parser.add_argument('--restart', action='store_true', help='체크포인트를 무시하고 처음부터')
+        parser.add_argument('--retry-failed', action='store_true', help='체크포인트에서 실패한 일기도 다시 시도')
+        parser.add_argument('--dry-run', action='store_true', help='대상 일기 수만 출력')
+        parser.add_argument('--output', type=str, default='', help='결과 보고서 JSON 파일 경로')
+
+    def handle(self, *args, **options):
+        diary_ids = list(self._select(options).values_list('id', flat=True))
+
+        checkpoint = options['checkpoint']
+        if options['restart'] and checkpoint and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        previous = load_checkpoint(checkpoint)
+        finished = {
+            diary_id for diary_id, entry in previous.items()
+            if entry['status'] == 'succeeded' or not options['retry_failed']
+        }
+        pending = [diary_id for diary_id in diary_ids if diary_id not in finished]
+        if options['limit']:
+            pending = pending[:options['limit']]
+
+        self.stdout.write(f'대상 {len(diary_ids)}건, 체크포인트로 건너뜀 {len(diary_ids) - len(pending)}건, 실행 {len(pending)}건')
+        if options['dry_run'] or not pending:
+            return
+
+        if options['rate'] is not None:
+            from entry.Image_making import client as openai_client
+            openai_client.set_limiter(openai_client.RateLimiter(
+                max_in_flight=max(1, options['concurrency']), rate=options['rate'],
+                burst=max(1, options['concurrency']),
+            ))
+
+        worker_id = f'batch:{default_worker_id()}'
+        results = []
+        started = time.perf_counter()
+        with open(checkpoint or os.devnull, 'a', encoding='utf-8') as log:
+            def record(entry):
+                results.append(entry)
+                log.write(json.dumps(entry, ensure_ascii=False) + '\n')
+                log.flush()
+                os.fsync(log.fileno())
+                done = len(results)
+                if done % 10 == 0 or done == len(pending):
+                    self.stdout.write(f'  {done}/{len(pending)} ({time.perf_counter() - started:.1f}s)')
+
+            try:
+                if options['concurrency'] <= 1:
+                    for diary_id in pending:
+                        record(self._process(diary_id, worker_id, options))
+                else:
+                    with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+                        futures = [pool.submit(self._process_in_thread, diary_id, worker_id, options) for diary_id in pending]
+                        try:
+                            for future in as_completed(futures):
+                                record(future.result())
+                        except KeyboardInterrupt:
+                            for future in futures:
+                                future.cancel()
+                            raise
+            except KeyboardInterrupt:
+                self.stdout.write(self.style.WARNING('중단됨: 다시 실행하면 체크포인트 이후부터 이어서 처리합니다.'))
+
+        self._report(results, time.perf_counter() - started, options)
+
+    def _select(self, options):
+        qs = DiaryModel.objects.all()
+        if options['user']:
+            ids = [value for value in options['user'] if value.isdigit()]
+            emails = [value for value in options['user'] if not value.isdigit()]
+            users = list(User.objects.filter(Q(pk__in=ids) | Q(email__in=emails)).values_list('id', flat=True))
+            if len(users) < len(options['user']):
+                raise CommandError('존재하지 않는 사용자가 있습니다: ' + ', '.join(options['user']))
+            qs = qs.filter(author_id__in=users)
+        try:
+            if options['since']:
+                qs = qs.filter(posted_date__gte=day_range(parse_day(options['since']))[0])
+            if options['until']:
+                qs = qs.filter(posted_date__lt=day_range(parse_day(options['until']))[1])
+        except ValueError:
+            raise CommandError('날짜는 YYYY-MM-DD 형식이어야 합니다.')
+        if options['missing_image']:
+            qs = qs.filter(Q(image_url__isnull=True) | Q(image_url=''))
+        return qs.order_by('id')
+
+    def _process_in_thread(self, diary_id, worker_id, options):
+        try:
+            return self._process(diary_id, worker_id, options)
+        finally:
+            # 스레드마다 열린 DB 연결 정리
+            connection.close()
+
+    def _process(self, diary_id, worker_id, options):
+        """일기 하나 생성(+저장). 반환: 체크포인트 기록"""
+        from entry.Image_making.pipeline import save_temp_image_to_s3
+
+        started = time.perf_counter()
+        entry = {'diary_id': diary_id, 'status': 'failed', 'job_id': None, 'saved': False, 'error': None}
+        try:
+            diary = DiaryModel.objects.get(pk=diary_id)
+            try:
+                job = enqueue_generation(diary, style=options['style'], language=options['language'])
+            except GenerationBusy as busy:
+                # 다른 스타일/패널 작업이 진행 중 → 끝난 뒤 요청한 스타일로 다시 등록
+                self._wait(busy.active)
+                job = enqueue_generation(diary, style=options['style'], language=options['language'])
+            claimed = claim_job(job.pk, worker_id)
+            if claimed is not None:
+                job = run_job(claimed)
+            else:
+                # 이미 다른 워커가 실행 중인 작업 → 끝날 때까지 기다린다
+                job = self._wait(job)
+            entry['job_id'] = job.pk
+            entry['status'] = job.status
+            entry['error'] = job.error
+
+            if job.status == GenerationJob.STATUS_SUCCEEDED and options['save']:
+                image_url = save_temp_image_to_s3(diary_id)
+                if image_url:
+                    record_event(job, 'uploaded', image_url=image_url)
+                    entry['saved'] = True
+                else:
+                    entry['status'] = 'save_failed'
+                    entry['error'] = 'S3 upload failed'
+        except Exception as e:
+            entry['error'] = str(e)
+        entry['seconds'] = round(time.perf_counter() - started, 3)
+        return entry
+
+    def _wait(self, job, poll_interval=1.0):
+        from django.conf import settings
+
+        deadline = time.monotonic() + getattr(settings, 'GENERATION_JOB_TIMEOUT', 300)
+        while not job.is_finished and time.monotonic() < deadline:
+            time.sleep(poll_interval)
+            job.refresh_from_db()
+        return job
+
+    def _report(self, results, elapsed, options):
+        statuses = Counter(entry['status'] for entry in results)
+        errors = Counter(entry['error'] for entry in results if entry['error'])
+        summary = {
+            'processed': len(results),
+            'succeeded': statuses.get(GenerationJob.STATUS_SUCCEEDED, 0),
+            'failed': statuses.get(GenerationJob.STATUS_FAILED, 0),
+            'save_failed': statuses.get('save_failed', 0),
+            'saved': sum(1 for entry in results if entry['saved']),
+            'elapsed_s': round(elapsed, 3),
+            'throughput_per_min': round(len(results) / elapsed * 60, 2) if elapsed else None,
+            'latency': summarize([entry['seconds'] for entry in results]),
+            'top_errors': errors.most_common(5),
+        }
+        self.stdout.write(
+            f"완료 {summary['succeeded']} / 실패 {summary['failed']} / 저장 실패 {summary['save_failed']} "
+            f"(저장 {summary['saved']}건, {summary['elapsed_s']}s, 분당 {summary['throughput_per_min']}건)"
+        )
+        for message, count in summary['top_errors']:
+            self.stdout.write(self.style.WARNING(f'  {count}× {message}'))
+        if options['output']:
+            params = {key: options[key] for key in ('user', 'since', 'until', 'missing_image', 'style', 'save', 'concurrency', 'rate')}
+            write_report(report('generate_cartoons', summary, params), self.stdout, options['output'])
@@ -0,0 +1,53 @@
+"""
+이미지 생성 워커
+
+    python manage.py generation_worker              # 계속 실행
+    python manage.py generation_worker --once       # 대기 작업을 모두 처리하고 종료
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from entry.jobs import claim_next_job, default_worker_id, requeue_stale_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = 'DB 큐에 등록된 이미지 생성 작업을 처리합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='대기 중인 작업이 없으면 종료')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='작업이 없을 때 대기 시간(초)')
+        parser.add_argument('--max-jobs', type=int, default=0, help='처리할 최대 작업 수 (0 = 무제한)')
+        parser.add_argument('--worker-id', type=str, default='', help='워커 식별자 (기본: host:pid)')
+
+    def handle(self, *args, **options):
+        worker_id = options['worker_id'] or default_worker_id()
+        poll_interval = options['poll_interval']
+        max_jobs = options['max_jobs']
+        processed = 0
+
+        self.stdout.write(f"[WORKER] 시작: {worker_id}")
+        try:
+            while True:
+                close_old_connections()
+                requeue_stale_jobs()
+
+                job = claim_next_job(worker_id)
+                if job is None:
+                    if options['once']:
+                        break
+                    time.sleep(poll_interval)
+                    continue
+
+                job = run_job(job)
+                processed += 1
+                self.stdout.write(f"[WORKER] {job}")
+
+                if max_jobs and processed >= max_jobs:
+                    break
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(f"[WORKER] 종료: {processed}건 처리")
@@ -0,0 +1,41 @@
+"""
+export_diaries로 만든 NDJSON/ZIP을 사용자 계정으로 가져오기
+
+    python manage.py import_diaries --user b@test.com diaries.ndjson
+    python manage.py import_diaries --user b@test.com diaries.zip --batch-size 2000
+
+- 같은 날짜에 일기가 있으면 일기 작성 화면에서 다시 저장한 것처럼 덮어쓰고, 없으면 새로 만든다
+- --batch-size 줄씩 bulk_create/bulk_update, 끝나면 생산성 집계/검색 색인/조회 캐시 갱신
+- 중간에 실패해도 같은 파일로 다시 실행하면 된다 (결과가 같음)
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from entry import archive
+
+
+class Command(BaseCommand):
+    help = 'NDJSON/ZIP 일기 보관 파일을 사용자 계정으로 가져옵니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='export_diaries로 만든 .ndjson 또는 .zip 파일')
+        parser.add_argument('--user', required=True, help='가져올 사용자 id 또는 이메일')
+        parser.add_argument('--batch-size', type=int, default=archive.DEFAULT_BATCH_SIZE, help='한 번에 쓸 일기 수')
+
+    def handle(self, *args, **options):
+        user = archive.find_user(options['user'])
+        if user is None:
+            raise CommandError(f"존재하지 않는 사용자입니다: {options['user']}")
+
+        try:
+            with open(options['path'], 'rb') as f:
+                result = archive.import_file(user, f, batch_size=max(1, options['batch_size']))
+        except OSError as e:
+            raise CommandError(str(e))
+        except archive.ArchiveError as e:
+            raise CommandError(f'가져오기 중단 ({e}). 앞 배치까지는 반영됨, 고친 뒤 다시 실행하세요.')
+
+        self.stdout.write(
+            f"{result['lines']}줄: 새 일기 {result['created']}건, 수정 {result['updated']}건, "
+            f"변경 없음 {result['unchanged']}건, 파일 안 같은 날짜 합침 {result['merged']}건"
+        )
@@ -0,0 +1,27 @@
+"""
+생산성 집계(ProductivityRollup) 재생성 (기존 일기 백필 / 일괄 가져오기 이후)
+
+    python manage.py rebuild_productivity_rollups            # 전체 사용자
+    python manage.py rebuild_productivity_rollups --user 3   # 특정 사용자
+"""
+
+from django.core.management.base import BaseCommand
+
+from entry import analytics
+from entry.models import DiaryModel
+
+
+class Command(BaseCommand):
+    help = '일기 데이터로 사용자별 일/주/월 생산성 집계를 다시 만듭니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', default=[], help='대상 사용자 id (여러 번 지정 가능)')
+
+    def handle(self, *args, **options):
+        user_ids = options['user'] or list(
+            DiaryModel.objects.filter(author__isnull=False).values_list('author_id', flat=True).distinct()
+        )
+        for user_id in user_ids:
+            days = analytics.rebuild(user_id)
+            self.stdout.write(f'user {user_id}: {days} days')
+        self.stdout.write(self.style.SUCCESS(f'{len(user_ids)} users rebuilt'))
@@ -0,0 +1,183 @@
+"""
+소요 시간 계측 (Prometheus 히스토그램).
+
+- timed(name, **labels): 컨텍스트 매니저/데코레이터. 끝나면 outcome="ok"|"error" 라벨로 기록
+- 관측값은 프로세스 메모리에 모았다가 MetricHistogram 테이블에 더한다
+  (웹 워커/생성 워커가 여러 프로세스·서버로 떠 있어도 /metrics 하나로 합산).
+  DB 반영은 요청 끝(미들웨어, METRICS_FLUSH_SECONDS마다)과 생성 작업 끝에서만 한다
+  → 파이프라인 스레드 풀 안에서는 DB 연결을 열지 않음
+- render(): Prometheus 텍스트 형식
+
+사용 예:
+    with metrics.timed(metrics.STAGE_SECONDS, stage='outline'):
+        ...
+
+    @metrics.timed(metrics.STAGE_SECONDS, stage='image')
+    def generate_image(...): ...
+
+PRD T90 ≤ 90초 확인 (PromQL):
+    histogram_quantile(0.9, sum by (le) (rate(diary_generation_duration_seconds_bucket[1h])))
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from contextlib import ContextDecorator
+from typing import Dict, Tuple
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+
+logger = logging.getLogger(__name__)
+
+STAGE_SECONDS = 'diary_stage_duration_seconds'
+HTTP_SECONDS = 'diary_http_request_duration_seconds'
+GENERATION_SECONDS = 'diary_generation_duration_seconds'
+
+HELP = {
+    STAGE_SECONDS: '이미지 생성 파이프라인 단계별 소요 시간 (outline/image/composite/transfer/derivatives/save)',
+    HTTP_SECONDS: '뷰별 요청 처리 시간',
+    GENERATION_SECONDS: '생성 작업 등록부터 완료까지 (큐 대기 포함, PRD T90 대상)',
+}
+
+# 버킷 상한(초). T90 목표(90초) 전후가 잘 갈리도록 60/90/120을 둔다
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 45, 60, 90, 120, 180, 300)
+INF = '+Inf'
+BUCKET_KEYS = tuple(repr(float(b)) for b in BUCKETS) + (INF,)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_lock = threading.Lock()
+# (name, labels) → [버킷별 관측 수 dict, count, total]
+_pending: Dict[Tuple[str, str], list] = {}
+_last_flush = time.monotonic()
+
+
+def format_labels(labels: Dict[str, object]) -> str:
+    def escape(value) -> str:
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+    return ','.join(f'{key}="{escape(value)}"' for key, value in sorted(labels.items()))
+
+
+def bucket_key(seconds: float) -> str:
+    for bound, key in zip(BUCKETS, BUCKET_KEYS):
+        if seconds <= bound:
+            return key
+    return INF
+
+
+def observe(name: str, seconds: float, **labels) -> None:
+    """관측값 하나 기록 (메모리만)"""
+    key = (name, format_labels(labels))
+    with _lock:
+        entry = _pending.setdefault(key, [{}, 0, 0.0])
+        le = bucket_key(seconds)
+        entry[0][le] = entry[0].get(le, 0) + 1
+        entry[1] += 1
+        entry[2] += seconds
+
+
+def flush_if_due() -> int:
+    """마지막 반영 후 METRICS_FLUSH_SECONDS가 지났으면 DB에 반영"""
+    if time.monotonic() - _last_flush < getattr(settings, 'METRICS_FLUSH_SECONDS', 10):
+        return 0
+    return flush_pending()
+
+
+class timed(ContextDecorator):
+    """with/데코레이터 겸용 타이머. 예외는 그대로 올리고 outcome="error"로 기록"""
+
+    def __init__(self, name: str, **labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.elapsed = time.perf_counter() - self._started
+        observe(self.name, self.elapsed, outcome='error' if exc_type else 'ok', **self.labels)
+        return False
+
+
+def flush_pending() -> int:
+    """메모리에 모인 관측값을 DB 행에 더한다. 실패하면 다음 번에 다시 시도. 반환: 반영한 시계열 수"""
+    global _last_flush
+    from .models import MetricHistogram
+
+    with _lock:
+        batch = dict(_pending)
+        _pending.clear()
+        _last_flush = time.monotonic()
+    if not batch:
+        return 0
+
+    flushed = 0
+    try:
+        for (name, labels), (buckets, count, total) in sorted(batch.items()):
+            with transaction.atomic():
+                row = MetricHistogram.objects.select_for_update().filter(name=name, labels=labels).first()
+                if row is None:
+                    try:
+                        with transaction.atomic():
+                            MetricHistogram.objects.create(name=name, labels=labels, buckets=buckets, count=count, total=total)
+                        del batch[(name, labels)]
+                        flushed += 1
+                        continue
+                    except IntegrityError:
+                        # 다른 프로세스가 먼저 만든 경우
+                        row = MetricHistogram.objects.select_for_update().get(name=name, labels=labels)
+                for le, n in buckets.items():
+                    row.buckets[le] = row.buckets.get(le, 0) + n
+                row.count += count
+                row.total += total
+                row.save(update_fields=['buckets', 'count', 'total', 'updated_at'])
+            del batch[(name, labels)]
+            flushed += 1
+    except Exception as e:
+        # DB를 못 쓰는 상황(비동기 컨텍스트, 연결 끊김 등)이면 남은 값은 되돌려 둔다
+        logger.warning('metrics flush failed', extra={'error': str(e)})
+        with _lock:
+            for key, (buckets, count, total) in batch.items():
+                entry = _pending.setdefault(key, [{}, 0, 0.0])
+                for le, n in buckets.items():
+                    entry[0][le] = entry[0].get(le, 0) + n
+                entry[1] += count
+                entry[2] += total
+    return flushed
+
+
+def reset() -> None:
+    """메모리의 미반영 관측값 버리기 (테스트용)"""
+    with _lock:
+        _pending.clear()
+
+
+def render() -> str:
+    """DB에 합산된 히스토그램 → Prometheus 텍스트 형식 (버킷은 누적으로 변환)"""
+    from .models import MetricHistogram
+
+    lines = []
+    current = None
+    for row in MetricHistogram.objects.order_by('name', 'labels'):
+        if row.name != current:
+            current = row.name
+            lines.append(f'# HELP {row.name} {HELP.get(row.name, row.name)}')
+            lines.append(f'# TYPE {row.name} histogram')
+        prefix = f'{row.labels},' if row.labels else ''
+        cumulative = 0
+        for le in BUCKET_KEYS:
+            cumulative += row.buckets.get(le, 0)
+            if le == INF:
+                # 버킷 경계를 바꾼 뒤 남은 옛 키도 +Inf에는 포함
+                cumulative = row.count
+            lines.append(f'{row.name}_bucket{{{prefix}le="{le}"}} {cumulative}')
+        braces = f'{{{row.labels}}}' if row.labels else ''
+        lines.append(f'{row.name}_sum{braces} {row.total:.6f}')
+        lines.append(f'{row.name}_count{braces} {row.count}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,111 @@
+"""
+요청 단위 미들웨어.
+
+request_timing_middleware: 뷰별 처리 시간을 entry.metrics 히스토그램에 기록
+    (라벨은 URL 이름 기준 → 경로 파라미터로 시계열이 늘어나지 않음)
+request_context_middleware: 요청 id(X-Request-ID, 없으면 새로 만듦)/사용자 id를 로그 문맥에 넣고
+    끝나면 접근 로그 한 줄(entry.request: view, status, duration_ms) + 응답 헤더 X-Request-ID
+    (AuthenticationMiddleware 다음에 둔다. 스트리밍 응답은 헤더를 돌려준 시점까지의 시간)
+"""
+
+import logging
+import re
+import time
+import uuid
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.utils.decorators import sync_and_async_middleware
+
+from . import metrics
+from .logs import request_id_var, user_id_var
+
+
+access_logger = logging.getLogger('entry.request')
+
+# 프록시(nginx 등)가 넘긴 요청 id는 이 형식일 때만 그대로 사용 (로그 주입 방지)
+REQUEST_ID_RE = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+
+def _observe_request(request, started: float) -> None:
+    match = getattr(request, 'resolver_match', None)
+    metrics.observe(
+        metrics.HTTP_SECONDS,
+        time.perf_counter() - started,
+        view=match.url_name if match and match.url_name else 'unmatched',
+        method=request.method,
+    )
+
+
+@sync_and_async_middleware
+def request_timing_middleware(get_response):
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            started = time.perf_counter()
+            response = await get_response(request)
+            # 비동기 경로에서는 DB 반영을 하지 않는다 (다음 동기 요청/작업이 반영)
+            _observe_request(request, started)
+            return response
+    else:
+        def middleware(request):
+            started = time.perf_counter()
+            response = get_response(request)
+            _observe_request(request, started)
+            metrics.flush_if_due()
+            return response
+    return middleware
+
+
+def _user_id(request):
+    user = getattr(request, 'user', None)
+    return user.pk if user is not None and user.is_authenticated else None
+
+
+def _start_request(request, user_id):
+    incoming = request.headers.get('X-Request-ID', '')
+    request.request_id = incoming if REQUEST_ID_RE.match(incoming) else uuid.uuid4().hex
+    tokens = (request_id_var.set(request.request_id), user_id_var.set(user_id))
+    return tokens, time.perf_counter()
+
+
+def _finish_request(request, response, started: float, user_id) -> None:
+    response['X-Request-ID'] = request.request_id
+    match = getattr(request, 'resolver_match', None)
+    access_logger.info('request', extra={
+        'method': request.method,
+        'path': request.path,  # 쿼리 문자열은 남기지 않음
+        'view': match.url_name if match and match.url_name else 'unmatched',
+        'status': response.status_code,
+        'duration_ms': round((time.perf_counter() - started) * 1000, 2),
+        'user_id': user_id,
+    })
+
+
+def _reset(tokens) -> None:
+    request_id_var.reset(tokens[0])
+    user_id_var.reset(tokens[1])
+
+
+@sync_and_async_middleware
+def request_context_middleware(get_response):
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            # request.user는 세션 조회(동기 DB)라 비동기 경로에서는 스레드로 넘겨 확인
+            user_id = await sync_to_async(_user_id)(request)
+            tokens, started = _start_request(request, user_id)
+            try:
+                response = await get_response(request)
+                _finish_request(request, response, started, user_id)
+                return response
+            finally:
+                _reset(tokens)
+    else:
+        def middleware(request):
+            tokens, started = _start_request(request, _user_id(request))
+            try:
+                response = get_response(request)
+                # 로그인/로그아웃/가입 요청이면 처리 후 사용자
+                _finish_request(request, response, started, _user_id(request))
+                return response
+            finally:
+                _reset(tokens)
+    return middleware
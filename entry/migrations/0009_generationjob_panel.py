@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-18 00:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('entry', '0008_generationjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generationjob',
+            name='panel',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.16 on 2026-10-18 00:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('entry', '0009_generationjob_panel'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutlineCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('panels', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(auto_now_add=True)),
+                ('hits', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['last_used_at'], name='entry_outline_last_used_idx')],
+            },
+        ),
+    ]
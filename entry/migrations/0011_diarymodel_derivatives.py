@@ -0,0 +1,28 @@
+# Generated by Django 4.2.16 on 2026-10-18 00:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('entry', '0010_outlinecache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='diarymodel',
+            name='panel_urls',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='diarymodel',
+            name='preview_url',
+            field=models.URLField(blank=True, max_length=500, null=True),
+        ),
+        migrations.AddField(
+            model_name='diarymodel',
+            name='thumbnail_url',
+            field=models.URLField(blank=True, max_length=500, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-18 00:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('entry', '0011_diarymodel_derivatives'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='diarymodel',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, null=True),
+        ),
+    ]
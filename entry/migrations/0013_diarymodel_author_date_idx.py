@@ -0,0 +1,17 @@
+# Generated by Django 4.2.16 on 2026-10-18 00:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('entry', '0012_diarymodel_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='diarymodel',
+            index=models.Index(fields=['author', 'posted_date'], name='entry_diary_author_date_idx'),
+        ),
+    ]
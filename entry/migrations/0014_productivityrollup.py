@@ -0,0 +1,36 @@
+# Generated by Django 4.2.16 on 2026-10-18 00:47
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('entry', '0013_diarymodel_author_date_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductivityRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('day', 'Day'), ('week', 'Week'), ('month', 'Month')], max_length=8)),
+                ('start', models.DateField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('total', models.IntegerField(default=0)),
+                ('min_value', models.IntegerField(blank=True, null=True)),
+                ('max_value', models.IntegerField(blank=True, null=True)),
+                ('streak', models.PositiveIntegerField(default=0)),
+                ('cum_count', models.PositiveIntegerField(default=0)),
+                ('cum_total', models.IntegerField(default=0)),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='productivity_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='productivityrollup',
+            constraint=models.UniqueConstraint(fields=('author', 'period', 'start'), name='entry_rollup_author_period_start_uniq'),
+        ),
+    ]
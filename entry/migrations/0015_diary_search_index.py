@@ -0,0 +1,55 @@
+from django.db import migrations
+
+
+# entry/search.py 의 SEARCH_VECTOR_SQL 과 같은 표현식이어야 검색 쿼리가 인덱스를 탄다
+POSTGRES_VECTOR = (
+    "(setweight(to_tsvector('simple', coalesce(\"note\", '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(\"content\", '')), 'B'))"
+)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS entry_diary_search_gin ON entry_diarymodel USING GIN ({POSTGRES_VECTOR})'
+        )
+    elif vendor == 'sqlite':
+        from django.db.utils import OperationalError
+
+        try:
+            # owner: 'u<작성자 id>' 토큰 (사용자 범위 검색) / prefix: 1~3글자 접두어 검색용 인덱스
+            schema_editor.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS entry_diary_fts "
+                "USING fts5(note, content, owner, "
+                "tokenize='unicode61 remove_diacritics 2', prefix='1 2 3')"
+            )
+        except OperationalError:
+            # FTS5 없이 빌드된 SQLite → 검색은 icontains 폴백
+            return
+        # 정렬(rank) = bm25, 제목 가중치 2배
+        schema_editor.execute("INSERT INTO entry_diary_fts(entry_diary_fts, rank) VALUES ('rank', 'bm25(2.0, 1.0, 0.0)')")
+        schema_editor.execute(
+            "INSERT INTO entry_diary_fts(rowid, note, content, owner) "
+            "SELECT id, coalesce(note, ''), coalesce(content, ''), coalesce('u' || author_id, '') "
+            "FROM entry_diarymodel"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS entry_diary_search_gin')
+    elif vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS entry_diary_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('entry', '0014_productivityrollup'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
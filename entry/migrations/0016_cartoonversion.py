@@ -0,0 +1,53 @@
+# Generated by Django 4.2.16 on 2026-10-18 00:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('entry', '0015_diary_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PromptChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(max_length=64, unique=True)),
+                ('text', models.TextField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CartoonVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField()),
+                ('style', models.CharField(blank=True, max_length=20, null=True)),
+                ('mode', models.CharField(choices=[('single', 'Single'), ('panels', 'Panels')], default='single', max_length=16)),
+                ('panel', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('seed', models.BigIntegerField(blank=True, null=True)),
+                ('outline', models.JSONField(blank=True, null=True)),
+                ('prompt_digest', models.CharField(max_length=64)),
+                ('prompt_chunks', models.JSONField(default=list)),
+                ('temp_image_url', models.CharField(blank=True, max_length=500, null=True)),
+                ('image_key', models.CharField(blank=True, max_length=500, null=True)),
+                ('image_url', models.URLField(blank=True, max_length=500, null=True)),
+                ('thumbnail_url', models.URLField(blank=True, max_length=500, null=True)),
+                ('preview_url', models.URLField(blank=True, max_length=500, null=True)),
+                ('panel_urls', models.JSONField(blank=True, null=True)),
+                ('is_pinned', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('diary', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='versions', to='entry.diarymodel')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='cartoonversion',
+            constraint=models.UniqueConstraint(fields=('diary', 'number'), name='entry_version_diary_number_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='cartoonversion',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_pinned', True)), fields=('diary',), name='entry_version_one_pinned_per_diary'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-18 00:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('entry', '0016_cartoonversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generationjob',
+            name='events',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.16 on 2026-10-18 01:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('entry', '0017_generationjob_events'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetricHistogram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('labels', models.CharField(blank=True, default='', max_length=255)),
+                ('buckets', models.JSONField(default=dict)),
+                ('count', models.BigIntegerField(default=0)),
+                ('total', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='metrichistogram',
+            constraint=models.UniqueConstraint(fields=('name', 'labels'), name='entry_metric_name_labels_uniq'),
+        ),
+    ]
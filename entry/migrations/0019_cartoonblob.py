@@ -0,0 +1,37 @@
+# Generated by Django 4.2.16 on 2026-10-18 01:18
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('entry', '0018_metrichistogram'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CartoonBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('key', models.CharField(max_length=500)),
+                ('url', models.URLField(max_length=500)),
+                ('size', models.BigIntegerField(default=0)),
+                ('derived', models.JSONField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='cartoonversion',
+            name='blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='versions', to='entry.cartoonblob'),
+        ),
+        migrations.AddField(
+            model_name='diarymodel',
+            name='image_blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='diaries', to='entry.cartoonblob'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+from django.db import migrations
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+
+# entry/accounts.py 의 조회 식(LOWER(email) = %s AND email <> '')과 같아야 로그인/가입 조회가 인덱스를 탄다
+INDEX = 'auth_user_email_ci_uniq'
+
+
+def create_email_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor not in ('postgresql', 'sqlite'):
+        return
+    User = apps.get_model('auth', 'User')
+    duplicates = list(
+        User.objects.exclude(email='')
+        .values(lower_email=Lower('email'))
+        .annotate(n=Count('id'))
+        .filter(n__gt=1)
+        .values_list('lower_email', flat=True)[:20]
+    )
+    if duplicates:
+        raise RuntimeError(
+            '대소문자만 다른 중복 이메일이 있어 고유 인덱스를 만들 수 없습니다. 정리 후 다시 실행하세요: '
+            + ', '.join(duplicates)
+        )
+    # PostgreSQL은 운영 중 테이블 잠금을 피하려고 CONCURRENTLY (이 마이그레이션은 atomic = False)
+    concurrently = 'CONCURRENTLY ' if vendor == 'postgresql' else ''
+    schema_editor.execute(
+        f"CREATE UNIQUE INDEX {concurrently}IF NOT EXISTS {INDEX} ON auth_user (LOWER(email)) WHERE email <> ''"
+    )
+
+
+def drop_email_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('postgresql', 'sqlite'):
+        schema_editor.execute(f'DROP INDEX IF EXISTS {INDEX}')
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('entry', '0019_cartoonblob'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_email_index, drop_email_index),
+    ]
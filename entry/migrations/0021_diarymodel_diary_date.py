@@ -0,0 +1,51 @@
+# Generated by Django 4.2.16 on 2026-10-18 01:39
+
+from collections import defaultdict
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def fill_diary_date(apps, schema_editor):
+    """
+    기존 일기의 diary_date 채우기 (settings.TIME_ZONE 기준 날짜).
+    같은 사용자·같은 날 일기가 여럿이면 entry 화면/날짜별 API가 고르던 가장 최근 것만 채우고
+    나머지는 비워 둔다 (삭제하지 않음, 상세 화면 목록에는 그대로 나옴)
+    """
+    DiaryModel = apps.get_model('entry', 'DiaryModel')
+    seen = set()
+    ids_by_day = defaultdict(list)
+    rows = (
+        DiaryModel.objects.filter(author__isnull=False)
+        .order_by('author_id', '-posted_date', '-id')
+        .values_list('id', 'author_id', 'posted_date')
+    )
+    for pk, author_id, posted_date in rows.iterator(chunk_size=2000):
+        day = timezone.localtime(posted_date).date()
+        if (author_id, day) in seen:
+            continue
+        seen.add((author_id, day))
+        ids_by_day[day].append(pk)
+    for day, ids in ids_by_day.items():
+        for start in range(0, len(ids), 500):
+            DiaryModel.objects.filter(id__in=ids[start:start + 500]).update(diary_date=day)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('entry', '0020_auth_user_email_ci_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='diarymodel',
+            name='diary_date',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(fill_diary_date, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='diarymodel',
+            constraint=models.UniqueConstraint(fields=('author', 'diary_date'), name='entry_diary_author_day_uniq'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.16 on 2026-10-18 02:01
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def fail_duplicate_active_jobs(apps, schema_editor):
+    """같은 일기에 대기/실행 중 작업이 여럿이면 가장 최근 것만 남기고 나머지는 failed로 정리"""
+    GenerationJob = apps.get_model('entry', 'GenerationJob')
+    seen = set()
+    duplicates = []
+    rows = (
+        GenerationJob.objects.filter(status__in=['queued', 'running'])
+        .order_by('diary_id', '-created_at', '-id')
+        .values_list('id', 'diary_id')
+    )
+    for pk, diary_id in rows:
+        if diary_id in seen:
+            duplicates.append(pk)
+        seen.add(diary_id)
+    for start in range(0, len(duplicates), 500):
+        GenerationJob.objects.filter(id__in=duplicates[start:start + 500]).update(
+            status='failed', error='같은 일기의 중복 작업 (정리됨)', finished_at=timezone.now(),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('entry', '0021_diarymodel_diary_date'),
+    ]
+
+    operations = [
+        migrations.RunPython(fail_duplicate_active_jobs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='generationjob',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['queued', 'running'])), fields=('diary',), name='entry_job_one_active_per_diary'),
+        ),
+    ]
@@ -2,6 +2,28 @@ from django.db import models
 from django.contrib.auth.models import User
 
 
+class CartoonBlob(models.Model):
+    """
+    스토리지에 저장된 만화 원본 이미지 (내용 주소: 저장 이름 = sha256.png).
+    같은 이미지는 한 번만 업로드하고, 일기(image_blob)/생성 이력(blob)이 참조한다.
+    참조가 모두 사라진 blob은 `gc_cartoon_blobs` 커맨드가 스토리지 객체와 함께 삭제.
+    """
+
+    sha256 = models.CharField(max_length=64, unique=True)
+    # 스토리지 저장 이름 (CartoonStorage 기준)
+    key = models.CharField(max_length=500)
+    url = models.URLField(max_length=500)
+    size = models.BigIntegerField(default=0)
+    # 파생 이미지 URL과 저장 이름 (derivatives.save_derivatives 결과, 실패 시 null)
+    derived = models.JSONField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # 마지막으로 저장/참조된 시각 (GC 유예 기간 기준)
+    last_used_at = models.DateTimeField()
+
+    def __str__(self):
+        return self.key
+
+
 class DiaryModel(models.Model):
 
     author = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
@@ -16,7 +38,40 @@ class DiaryModel(models.Model):
     style = models.CharField(max_length=20, blank=True, null=True)
     # 이미지 생성을 위해 최종적으로 사용된 프롬프트 텍스트 저장
     final_prompt = models.TextField(blank=True, null=True)
+    # S3 저장 시 만드는 파생 이미지 (썸네일/미리보기/개별 컷 4장)
+    thumbnail_url = models.URLField(max_length=500, blank=True, null=True)
+    preview_url = models.URLField(max_length=500, blank=True, null=True)
+    panel_urls = models.JSONField(blank=True, null=True)
+    # 저장된 원본 이미지 (내용 주소 blob, 이전 방식으로 저장된 이미지는 비어 있음)
+    image_blob = models.ForeignKey(CartoonBlob, on_delete=models.PROTECT, blank=True, null=True, related_name='diaries')
+    # 마지막 수정 시각 (월별 캘린더 API의 Last-Modified)
+    updated_at = models.DateTimeField(auto_now=True, blank=True, null=True)
+    # posted_date의 사용자 타임존 기준 날짜 ((author, diary_date) 고유 → 하루 일기 하나, save()에서 채움)
+    # 제약 추가 전에 같은 날 중복으로 생긴 일기는 가장 최근 것만 값이 있고 나머지는 비어 있다
+    diary_date = models.DateField(blank=True, null=True, editable=False)
+
+
+    @property
+    def display_thumbnail_url(self):
+        """캘린더/목록 카드용: 가장 작은 이미지"""
+        return self.thumbnail_url or self.preview_url or self.image_url
+
+    @property
+    def display_preview_url(self):
+        """상세/미리보기용: 중간 크기 (없으면 원본)"""
+        return self.preview_url or self.image_url
 
+    def save(self, *args, **kwargs):
+        if self.posted_date and (self._state.adding or self.diary_date is not None):
+            from django.utils import timezone
+            from .dates import local_day
+
+            aware = timezone.is_aware(self.posted_date)
+            self.diary_date = local_day(self.posted_date) if aware else self.posted_date.date()
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'posted_date' in update_fields and 'diary_date' not in update_fields:
+                kwargs['update_fields'] = [*update_fields, 'diary_date']
+        super().save(*args, **kwargs)
 
     def date_for_chart(self):
         return self.posted_date.strftime('%b %e')
@@ -24,10 +79,232 @@ class DiaryModel(models.Model):
     def __str__(self):
         return f"{self.note} - {self.author.username if self.author else 'Anonymous'}"
 
+    SUMMARY_LENGTH = 100
+
     def summary(self):
-        if len(self.content) > 100:
-            return self.content[:100] + '  ...'
-        return self.content[:100]
+        # 목록 쿼리(listing.card_queryset)는 content 대신 앞부분(content_head)만 가져온다
+        content = getattr(self, 'content_head', None)
+        if content is None:
+            content = self.content
+        if len(content) > self.SUMMARY_LENGTH:
+            return content[:self.SUMMARY_LENGTH] + '  ...'
+        return content[:self.SUMMARY_LENGTH]
 
     class Meta:
         ordering = ['-posted_date']
+        indexes = [
+            # 사용자별 날짜/월 범위 조회 (posted_date는 항상 반열린 구간으로 필터)
+            models.Index(fields=['author', 'posted_date'], name='entry_diary_author_date_idx'),
+        ]
+        constraints = [
+            # 같은 날 두 번 저장(중복 제출 포함)해도 일기는 하나 (diaries.upsert_day_entry의 ON CONFLICT 대상)
+            models.UniqueConstraint(fields=['author', 'diary_date'], name='entry_diary_author_day_uniq'),
+        ]
+
+
+class GenerationJob(models.Model):
+    """
+    이미지 생성 작업 큐 (DB 기반)
+    웹 요청은 작업만 등록하고, 실제 생성은 generation_worker 커맨드가 처리
+    """
+
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    ACTIVE_STATUSES = (STATUS_QUEUED, STATUS_RUNNING)
+
+    diary = models.ForeignKey(DiaryModel, on_delete=models.CASCADE, related_name='generation_jobs')
+    author = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
+    style = models.CharField(max_length=20, blank=True, null=True)
+    language = models.CharField(max_length=8, default='en')
+    # 패널 모드에서 특정 패널(1~4)만 재생성할 때 지정
+    panel = models.PositiveSmallIntegerField(blank=True, null=True)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    # 로컬 합성 이미지는 상대 경로일 수 있으므로 URLField 대신 CharField
+    temp_image_url = models.CharField(max_length=500, blank=True, null=True)
+    error = models.TextField(blank=True, null=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    worker = models.CharField(max_length=64, blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    # 진행 단계 이벤트 목록 [{'stage', 'at', 'progress', ...}] (SSE 스트림/상태 조회용)
+    events = models.JSONField(default=list, blank=True)
+
+    def __str__(self):
+        return f"job#{self.pk} diary#{self.diary_id} [{self.status}]"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_SUCCEEDED, self.STATUS_FAILED)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='entry_job_status_created_idx'),
+        ]
+        constraints = [
+            # 일기당 대기/실행 중 작업은 하나 (enqueue_generation의 조회 후 생성 경합 방지)
+            models.UniqueConstraint(
+                fields=['diary'], condition=models.Q(status__in=['queued', 'running']),
+                name='entry_job_one_active_per_diary',
+            ),
+        ]
+
+
+class OutlineCache(models.Model):
+    """
+    일기 → 4패널 아웃라인(JSON) 캐시 (DB 백엔드)
+    key = sha256(일기 텍스트, 언어, 모델, temperature)
+    """
+
+    key = models.CharField(max_length=64, unique=True)
+    panels = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now_add=True)
+    hits = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"outline {self.key[:12]} (hits={self.hits})"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['last_used_at'], name='entry_outline_last_used_idx'),
+        ]
+
+
+class ProductivityRollup(models.Model):
+    """
+    사용자별 생산성 집계 (일/주/월 버킷). 일기 저장/삭제 시 해당 버킷만 갱신 (entry.analytics)
+    - day 행의 cum_count/cum_total: 그날까지의 누적합 → 임의 구간 평균을 행 2개로 계산
+    - streak: day = 그날까지 연속 작성 일수, week/month = 기간 내 최대 연속 일수
+    """
+
+    PERIOD_DAY = 'day'
+    PERIOD_WEEK = 'week'
+    PERIOD_MONTH = 'month'
+    PERIOD_CHOICES = [
+        (PERIOD_DAY, 'Day'),
+        (PERIOD_WEEK, 'Week'),
+        (PERIOD_MONTH, 'Month'),
+    ]
+
+    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='productivity_rollups')
+    period = models.CharField(max_length=8, choices=PERIOD_CHOICES)
+    # 버킷 시작일 (주: 월요일, 월: 1일), 사용자 타임존 기준
+    start = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+    total = models.IntegerField(default=0)
+    min_value = models.IntegerField(blank=True, null=True)
+    max_value = models.IntegerField(blank=True, null=True)
+    streak = models.PositiveIntegerField(default=0)
+    cum_count = models.PositiveIntegerField(default=0)
+    cum_total = models.IntegerField(default=0)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def __str__(self):
+        return f"{self.author_id} {self.period} {self.start} (n={self.count})"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['author', 'period', 'start'], name='entry_rollup_author_period_start_uniq'),
+        ]
+
+
+class PromptChunk(models.Model):
+    """
+    프롬프트 조각 (빈 줄 기준 문단) 중복 제거 저장소. digest = sha256(text)
+    스타일 헤더처럼 버전마다 같은 문단은 한 번만 저장된다.
+    """
+
+    digest = models.CharField(max_length=64, unique=True)
+    text = models.TextField()
+
+    def __str__(self):
+        return f"chunk {self.digest[:12]}"
+
+
+class CartoonVersion(models.Model):
+    """
+    일기별 이미지 생성 이력. 생성할 때마다 한 행, S3 저장 시 이미지 키/URL이 채워진다.
+    프롬프트 본문은 PromptChunk digest 목록(prompt_chunks)으로만 참조.
+    """
+
+    MODE_CHOICES = [
+        ('single', 'Single'),
+        ('panels', 'Panels'),
+    ]
+
+    diary = models.ForeignKey(DiaryModel, on_delete=models.CASCADE, related_name='versions')
+    # 일기 안에서의 순번 (1부터)
+    number = models.PositiveIntegerField()
+    style = models.CharField(max_length=20, blank=True, null=True)
+    mode = models.CharField(max_length=16, choices=MODE_CHOICES, default='single')
+    # 패널 하나만 재생성한 버전이면 해당 패널 번호
+    panel = models.PositiveSmallIntegerField(blank=True, null=True)
+    # 이미지 모델이 seed를 지원할 때만 기록
+    seed = models.BigIntegerField(blank=True, null=True)
+    outline = models.JSONField(blank=True, null=True)
+    prompt_digest = models.CharField(max_length=64)
+    prompt_chunks = models.JSONField(default=list)
+    temp_image_url = models.CharField(max_length=500, blank=True, null=True)
+    # 스토리지 저장 이름 (CartoonStorage 기준), 저장 전에는 비어 있음
+    image_key = models.CharField(max_length=500, blank=True, null=True)
+    image_url = models.URLField(max_length=500, blank=True, null=True)
+    thumbnail_url = models.URLField(max_length=500, blank=True, null=True)
+    preview_url = models.URLField(max_length=500, blank=True, null=True)
+    panel_urls = models.JSONField(blank=True, null=True)
+    blob = models.ForeignKey(CartoonBlob, on_delete=models.PROTECT, blank=True, null=True, related_name='versions')
+    is_pinned = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    @property
+    def is_saved(self):
+        return bool(self.image_key)
+
+    def __str__(self):
+        return f"diary {self.diary_id} v{self.number}"
+
+    class Meta:
+        constraints = [
+            # (diary, number) 인덱스로 버전 목록을 한 번에 조회
+            models.UniqueConstraint(fields=['diary', 'number'], name='entry_version_diary_number_uniq'),
+            models.UniqueConstraint(
+                fields=['diary'], condition=models.Q(is_pinned=True), name='entry_version_one_pinned_per_diary',
+            ),
+        ]
+
+
+class MetricHistogram(models.Model):
+    """
+    소요 시간 히스토그램 (entry.metrics).
+    각 프로세스(웹 워커/생성 워커)가 메모리에 모은 관측값을 주기적으로 더해 넣고,
+    /metrics 가 합산된 값을 Prometheus 형식으로 내보낸다.
+    """
+
+    name = models.CharField(max_length=100)
+    # Prometheus 라벨 문자열 (키 정렬): stage="outline",outcome="ok"
+    labels = models.CharField(max_length=255, blank=True, default='')
+    # 버킷 상한(le) → 그 구간에 들어온 관측 수 (누적 아님)
+    buckets = models.JSONField(default=dict)
+    count = models.BigIntegerField(default=0)
+    total = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}{{{self.labels}}}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['name', 'labels'], name='entry_metric_name_labels_uniq'),
+        ]
@@ -0,0 +1,292 @@
+"""
+일기 전문 검색 (제목 + 본문).
+
+DB 종류별 백엔드:
+    postgresql : 표현식 GIN 인덱스 (setweight(to_tsvector('simple', note), 'A') || ... content 'B')
+                 → 쿼리도 같은 표현식(SEARCH_VECTOR_SQL)을 써야 인덱스를 탄다
+    sqlite     : FTS5 테이블 entry_diary_fts (rowid = 일기 id, owner = 'u<작성자 id>' 토큰),
+                 entry.signals 로 동기화. 한 글자~세 글자 접두어 인덱스(prefix='1 2 3')
+    그 외      : icontains 폴백 (인덱스 없음)
+
+한국어는 조사가 붙으므로("공원에서") 검색어마다 접두어 매칭(공원*)을 쓴다.
+스니펫은 HTML 이스케이프 후 일치 부분만 <mark>로 감싼다.
+"""
+
+from __future__ import annotations
+
+import re
+from html import escape
+from typing import Dict, List, Optional, Tuple
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import DiaryModel
+
+
+PAGE_SIZE = 20
+MAX_TERMS = 8
+SNIPPET_TOKENS = 16
+
+FTS_TABLE = 'entry_diary_fts'
+POSTGRES_INDEX = 'entry_diary_search_gin'
+SEARCH_VECTOR_SQL = (
+    "(setweight(to_tsvector('simple', coalesce(\"note\", '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(\"content\", '')), 'B'))"
+)
+
+# 하이라이트 구분자 (이스케이프 전에 넣었다가 <mark>로 치환)
+_START, _END = '\x02', '\x03'
+
+
+def parse_terms(query: str) -> List[str]:
+    """검색어 → 단어 목록 (따옴표/연산자 문자 제거, 최대 MAX_TERMS개)"""
+    cleaned = re.sub(r'["\'*():&|!<>^\\-]+', ' ', query or '')
+    return [term for term in cleaned.split() if term][:MAX_TERMS]
+
+
+def _mark(text: Optional[str]) -> str:
+    return escape(text or '').replace(_START, '<mark>').replace(_END, '</mark>')
+
+
+def _plain_snippet(content: str, terms: List[str], width: int = 80) -> str:
+    """폴백 백엔드용: 첫 일치 위치 주변만 잘라서 하이라이트"""
+    lowered = content.lower()
+    hits = [lowered.find(term.lower()) for term in terms]
+    first = min([h for h in hits if h >= 0], default=0)
+    start = max(0, first - width // 4)
+    piece = content[start:start + width]
+    for term in terms:
+        piece = re.sub(re.escape(term), lambda m: f'{_START}{m.group(0)}{_END}', piece, flags=re.IGNORECASE)
+    return ('…' if start else '') + piece + ('…' if start + width < len(content) else '')
+
+
+class FallbackBackend:
+    name = 'fallback'
+
+    def search(self, author_id: int, terms: List[str], offset: int, limit: int) -> List[Dict[str, object]]:
+        qs = DiaryModel.objects.filter(author_id=author_id)
+        for term in terms:
+            qs = qs.filter(Q(note__icontains=term) | Q(content__icontains=term))
+        rows = qs.order_by('-posted_date', '-id').values('id', 'note', 'content', 'posted_date')[offset:offset + limit]
+        return [
+            {
+                'id': row['id'],
+                'posted_date': row['posted_date'],
+                'rank': None,
+                'note': _mark(_plain_snippet(row['note'], terms, width=len(row['note']))),
+                'snippet': _mark(_plain_snippet(row['content'], terms)),
+            }
+            for row in rows
+        ]
+
+    def index(self, diary: DiaryModel) -> None:
+        pass
+
+    def remove(self, diary_id: int) -> None:
+        pass
+
+    def reindex_author(self, author_id: int) -> None:
+        pass
+
+    def rebuild(self) -> None:
+        pass
+
+
+class SqliteFTSBackend:
+    """FTS5 테이블 + bm25 정렬 (제목 가중치 2배, 마이그레이션에서 rank 설정)"""
+
+    name = 'sqlite_fts5'
+
+    @staticmethod
+    def owner_token(author_id: Optional[int]) -> str:
+        return f'u{author_id}' if author_id else ''
+
+    @classmethod
+    def match_expression(cls, author_id: int, terms: List[str]) -> str:
+        # owner 토큰과 AND → FTS가 해당 사용자 문서만 건너뛰며 읽는다 (전체 일치 목록을 훑지 않음)
+        words = ' '.join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+        return f'owner:{cls.owner_token(author_id)} AND {{note content}}: ({words})'
+
+    def search(self, author_id: int, terms: List[str], offset: int, limit: int) -> List[Dict[str, object]]:
+        # 1) FTS 테이블 안에서만 순위 매겨 페이지 rowid 선택 (조인 없음)
+        # 2) 그 몇 행에만 highlight/snippet 계산 (정렬 전에 모든 일치 행에 계산하지 않도록)
+        sql = f"""
+            WITH page AS (
+                SELECT rowid AS id, rank FROM {FTS_TABLE}
+                WHERE {FTS_TABLE} MATCH %s
+                ORDER BY rank, rowid DESC
+                LIMIT %s OFFSET %s
+            )
+            SELECT page.id, d.posted_date, page.rank,
+                   highlight({FTS_TABLE}, 0, %s, %s),
+                   snippet({FTS_TABLE}, 1, %s, %s, '…', %s)
+            FROM page
+            JOIN {FTS_TABLE} ON {FTS_TABLE}.rowid = page.id
+            JOIN entry_diarymodel d ON d.id = page.id
+            WHERE {FTS_TABLE} MATCH %s
+            ORDER BY page.rank, page.id DESC
+        """
+        match = self.match_expression(author_id, terms)
+        params = [match, limit, offset, _START, _END, _START, _END, SNIPPET_TOKENS, match]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        return [
+            {
+                'id': diary_id,
+                'posted_date': _parse_sqlite_datetime(posted),
+                'rank': round(-rank, 4),
+                'note': _mark(note),
+                'snippet': _mark(snippet),
+            }
+            for diary_id, posted, rank, note, snippet in rows
+        ]
+
+    def index(self, diary: DiaryModel) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [diary.pk])
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE}(rowid, note, content, owner) VALUES (%s, %s, %s, %s)',
+                [diary.pk, diary.note or '', diary.content or '', self.owner_token(diary.author_id)],
+            )
+
+    def remove(self, diary_id: int) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [diary_id])
+
+    def reindex_author(self, author_id: int) -> None:
+        """한 사용자의 일기만 다시 색인 (가져오기 이후, 다른 사용자 행은 건드리지 않음)"""
+        with connection.cursor() as cursor:
+            # owner 토큰 MATCH로 그 사용자 행만 찾아 지운다 (owner 컬럼 = 비교는 FTS 전체를 훑음)
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid IN '
+                f'(SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s)',
+                [f'owner:{self.owner_token(author_id)}'],
+            )
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE}(rowid, note, content, owner) '
+                f"SELECT id, coalesce(note, ''), coalesce(content, ''), %s "
+                f'FROM entry_diarymodel WHERE author_id = %s',
+                [self.owner_token(author_id), author_id],
+            )
+
+    def rebuild(self) -> None:
+        """bulk_create 이후 전체 재색인 (전체 테이블 쓰기 잠금, 한 사용자분이면 reindex_author)"""
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE}(rowid, note, content, owner) '
+                f"SELECT id, coalesce(note, ''), coalesce(content, ''), coalesce('u' || author_id, '') "
+                f'FROM entry_diarymodel'
+            )
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+
+
+def _parse_sqlite_datetime(value):
+    """raw 커서 결과(UTC, naive 또는 문자열) → aware datetime"""
+    from django.utils.dateparse import parse_datetime
+    from django.utils import timezone
+
+    parsed = parse_datetime(value) if isinstance(value, str) else value
+    if parsed is not None and timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, timezone.utc)
+    return parsed
+
+
+class PostgresBackend:
+    """표현식 GIN 인덱스 + ts_rank, ts_headline (페이지 행에만 적용)"""
+
+    name = 'postgres_gin'
+
+    @staticmethod
+    def tsquery(terms: List[str]) -> str:
+        return ' & '.join("'{}':*".format(term.replace("'", "''")) for term in terms)
+
+    def search(self, author_id: int, terms: List[str], offset: int, limit: int) -> List[Dict[str, object]]:
+        options = f'StartSel={_START}, StopSel={_END}, MaxWords={SNIPPET_TOKENS}, MinWords=5'
+        sql = f"""
+            WITH q AS (SELECT to_tsquery('simple', %s) AS query),
+            ranked AS (
+                SELECT id, ts_rank('{{0.1, 0.2, 0.4, 1.0}}', {SEARCH_VECTOR_SQL}, q.query) AS rank
+                FROM entry_diarymodel, q
+                WHERE author_id = %s AND {SEARCH_VECTOR_SQL} @@ q.query
+                ORDER BY rank DESC, id DESC
+                LIMIT %s OFFSET %s
+            )
+            SELECT d.id, d.posted_date, ranked.rank,
+                   ts_headline('simple', d.note, q.query, %s),
+                   ts_headline('simple', d.content, q.query, %s)
+            FROM ranked JOIN entry_diarymodel d ON d.id = ranked.id, q
+            ORDER BY ranked.rank DESC, d.id DESC
+        """
+        params = [self.tsquery(terms), author_id, limit, offset, f'StartSel={_START}, StopSel={_END}, HighlightAll=true', options]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        return [
+            {'id': diary_id, 'posted_date': posted, 'rank': round(float(rank), 4),
+             'note': _mark(note), 'snippet': _mark(snippet)}
+            for diary_id, posted, rank, note, snippet in rows
+        ]
+
+    def index(self, diary: DiaryModel) -> None:
+        pass  # 표현식 인덱스라 동기화 불필요
+
+    def remove(self, diary_id: int) -> None:
+        pass
+
+    def reindex_author(self, author_id: int) -> None:
+        pass  # 표현식 인덱스는 행 쓰기와 함께 갱신됨 (REINDEX는 모든 사용자의 쓰기를 막음)
+
+    def rebuild(self) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(f'REINDEX INDEX {POSTGRES_INDEX}')
+
+
+_backend = None
+
+
+def _fts_table_exists() -> bool:
+    return FTS_TABLE in connection.introspection.table_names()
+
+
+def get_backend():
+    """현재 DB에 맞는 백엔드 (FTS 테이블이 없으면 폴백)"""
+    global _backend
+    if _backend is None or _backend[0] != connection.vendor:
+        if connection.vendor == 'postgresql':
+            backend = PostgresBackend()
+        elif connection.vendor == 'sqlite' and _fts_table_exists():
+            backend = SqliteFTSBackend()
+        else:
+            backend = FallbackBackend()
+        _backend = (connection.vendor, backend)
+    return _backend[1]
+
+
+def search(author_id: int, query: str, page: int = 1, page_size: int = PAGE_SIZE) -> Tuple[List[Dict[str, object]], bool]:
+    """반환: (현재 페이지 결과, 다음 페이지 존재 여부)"""
+    terms = parse_terms(query)
+    if not terms:
+        return [], False
+    offset = (max(page, 1) - 1) * page_size
+    # 한 개 더 읽어서 다음 페이지 여부 판단
+    rows = get_backend().search(author_id, terms, offset, page_size + 1)
+    return rows[:page_size], len(rows) > page_size
+
+
+def index_diary(diary: DiaryModel) -> None:
+    get_backend().index(diary)
+
+
+def remove_diary(diary_id: int) -> None:
+    get_backend().remove(diary_id)
+
+
+def reindex_author(author_id: int) -> None:
+    get_backend().reindex_author(author_id)
+
+
+def rebuild_index() -> None:
+    get_backend().rebuild()
@@ -0,0 +1,61 @@
+"""
+DiaryModel 변경 → 생산성 집계(ProductivityRollup), 검색 색인(SQLite FTS5), 조회 응답 캐시(diary_cache) 갱신.
+SQLite 연결마다 WAL 모드 (읽기가 쓰기를 막지 않고, 쓰기끼리는 OPTIONS['timeout']만큼 기다림).
+
+주의: QuerySet.update()/bulk_create()는 시그널이 없으므로 호출 측에서
+analytics.refresh_day()/rebuild(), search.reindex_author()/rebuild_index(), diary_cache.invalidate_user()를 직접 불러야 한다.
+"""
+
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import analytics, diary_cache, search
+from .dates import local_day
+from .models import DiaryModel
+
+
+@receiver(connection_created, dispatch_uid='entry_sqlite_wal')
+def enable_sqlite_wal(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        # 메모리 DB는 'memory'로 남는다 (무시됨)
+        cursor.execute('PRAGMA journal_mode=WAL')
+
+
+@receiver(pre_save, sender=DiaryModel, dispatch_uid='entry_rollup_pre_save')
+def remember_previous_day(sender, instance, raw=False, **kwargs):
+    # 날짜/작성자가 바뀌면 이전 버킷도 갱신해야 하므로 저장 전 값을 기억
+    instance._rollup_previous = None
+    if raw or not instance.pk:
+        return
+    previous = DiaryModel.objects.filter(pk=instance.pk).values_list('author_id', 'posted_date').first()
+    if previous and previous[0] and previous[1]:
+        instance._rollup_previous = (previous[0], local_day(previous[1]))
+
+
+@receiver(post_save, sender=DiaryModel, dispatch_uid='entry_diary_post_save')
+def sync_on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    # 이미지 URL만 바뀐 저장도 응답 내용이 바뀌므로 항상 무효화
+    diary_cache.invalidate_on_commit(instance.author_id)
+    previous = getattr(instance, '_rollup_previous', None)
+    if previous and previous[0] != instance.author_id:
+        diary_cache.invalidate_on_commit(previous[0])
+    if not update_fields or {'note', 'content'} & set(update_fields):
+        search.index_diary(instance)
+    # 이미지 URL 등만 바뀐 저장은 집계와 무관
+    if update_fields and not {'author', 'posted_date', 'productivity'} & set(update_fields):
+        return
+    analytics.refresh_for_diary(instance)
+    if previous and previous != (instance.author_id, local_day(instance.posted_date)):
+        analytics.refresh_day(*previous)
+
+
+@receiver(post_delete, sender=DiaryModel, dispatch_uid='entry_diary_post_delete')
+def sync_on_delete(sender, instance, **kwargs):
+    diary_cache.invalidate_on_commit(instance.author_id)
+    analytics.refresh_for_diary(instance)
+    search.remove_diary(instance.pk)
@@ -1,3 +1,1816 @@
-from django.test import TestCase
+from datetime import datetime, timedelta
+import hashlib
+import io
+import json
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .jobs import claim_next_job, enqueue_generation, run_job
+from .models import DiaryModel, GenerationJob
+
+
+def make_diary(user, note='오늘', content='오늘은 공원에서 산책을 했다. 날씨가 좋았다.', posted_date=None, **extra):
+    if posted_date is None:
+        posted_date = timezone.make_aware(datetime(2025, 10, 20, 12, 0))
+    return DiaryModel.objects.create(
+        author=user, note=note, content=content, posted_date=posted_date, productivity=5, **extra
+    )
+
+
+class GenerationJobQueueTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='a@test.com', email='a@test.com', password='pw12345!')
+        self.diary = make_diary(self.user)
+
+    def test_enqueue_reuses_active_job(self):
+        first = enqueue_generation(self.diary, style='ani')
+        second = enqueue_generation(self.diary, style='ani')
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(first.status, GenerationJob.STATUS_QUEUED)
+
+    def test_enqueue_rejects_different_request_while_active(self):
+        from .jobs import GenerationBusy
+
+        active = enqueue_generation(self.diary, style='ani')
+        with self.assertRaises(GenerationBusy) as ctx:
+            enqueue_generation(self.diary, style='real')
+        self.assertEqual(ctx.exception.active.pk, active.pk)
+        with self.assertRaises(GenerationBusy):
+            enqueue_generation(self.diary, style='ani', panel=3)
+
+        self.client.force_login(self.user)
+        resp = self.client.post(reverse('regenerate_panel', args=[self.diary.id, 3]), {'style': 'Theme2'})
+        self.assertEqual(resp.status_code, 409)
+        self.assertEqual(resp.json()['job_id'], active.pk)
+        self.assertEqual(GenerationJob.objects.filter(diary=self.diary).count(), 1)
+
+    def test_one_active_job_per_diary_is_enforced(self):
+        from django.db import IntegrityError, transaction
+
+        first = enqueue_generation(self.diary, style='ani')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            GenerationJob.objects.create(diary=self.diary, author=self.user, style='ani')
+
+        # 조회 후 생성 사이에 다른 요청이 먼저 등록한 경우 (첫 조회는 못 봄) → 그 작업을 반환
+        real_filter = GenerationJob.objects.filter
+        lookups = []
+
+        def racing_filter(*args, **kwargs):
+            lookups.append(kwargs)
+            return GenerationJob.objects.none() if len(lookups) == 1 else real_filter(*args, **kwargs)
+
+        with mock.patch.object(GenerationJob.objects, 'filter', side_effect=racing_filter):
+            job = enqueue_generation(self.diary, style='ani')
+        self.assertEqual(len(lookups), 2)
+        self.assertEqual(job.pk, first.pk)
+        self.assertEqual(GenerationJob.objects.filter(diary=self.diary).count(), 1)
+
+    def test_enqueue_does_not_read_inside_the_write(self):
+        diary = DiaryModel.objects.get(pk=self.diary.pk)  # author 미로딩
+        job = enqueue_generation(diary, style='ani')
+        self.assertEqual(job.author_id, self.user.pk)
+        # 트랜잭션 안에서 author를 읽으면 SQLite가 쓰기 잠금으로 올리지 못하고 바로 실패
+        self.assertFalse(DiaryModel.author.is_cached(diary))
+
+    def test_claim_is_exclusive(self):
+        enqueue_generation(self.diary)
+        job = claim_next_job('w1')
+        self.assertIsNotNone(job)
+        self.assertEqual(job.status, GenerationJob.STATUS_RUNNING)
+        self.assertEqual(job.attempts, 1)
+        self.assertIsNone(claim_next_job('w2'))
+
+    def test_run_job_records_result(self):
+        def fake_generate(diary_id, style_path, language, **kwargs):
+            DiaryModel.objects.filter(pk=diary_id).update(temp_image_url='https://example.com/tmp.png')
+
+        enqueue_generation(self.diary)
+        job = claim_next_job('w1')
+        with mock.patch('entry.Image_making.pipeline.generate_and_attach_image_to_diary', side_effect=fake_generate):
+            job = run_job(job)
+        self.assertEqual(job.status, GenerationJob.STATUS_SUCCEEDED)
+        self.assertEqual(job.temp_image_url, 'https://example.com/tmp.png')
+
+    def test_concurrent_events_are_not_lost(self):
+        from .jobs import record_event
+
+        def fake_generate(diary_id, style_path, language, progress=None, **kwargs):
+            progress('prompt')
+            # 워커가 도는 동안 저장 요청이 다른 인스턴스로 이벤트를 붙임
+            record_event(GenerationJob.objects.get(pk=job.pk), 'uploaded', image_url='https://example.com/a.png')
+            progress('composited')
+            DiaryModel.objects.filter(pk=diary_id).update(temp_image_url='https://example.com/tmp.png')
+
+        enqueue_generation(self.diary)
+        job = claim_next_job('w1')
+        stale = GenerationJob.objects.get(pk=job.pk)
+        with mock.patch('entry.Image_making.pipeline.generate_and_attach_image_to_diary', side_effect=fake_generate):
+            job = run_job(job)
+        record_event(stale, 'uploaded', image_url='https://example.com/b.png')
+
+        stages = [e['stage'] for e in GenerationJob.objects.get(pk=job.pk).events]
+        self.assertEqual(stages, ['queued', 'started', 'prompt', 'uploaded', 'composited', 'succeeded', 'uploaded'])
+        self.assertEqual(stale.events[-1]['image_url'], 'https://example.com/b.png')
+
+    def test_run_job_records_failure(self):
+        enqueue_generation(self.diary)
+        job = claim_next_job('w1')
+        with mock.patch('entry.Image_making.pipeline.generate_and_attach_image_to_diary', side_effect=RuntimeError('boom')):
+            job = run_job(job)
+        self.assertEqual(job.status, GenerationJob.STATUS_FAILED)
+        self.assertEqual(job.error, 'boom')
+
+    def test_submit_and_poll_endpoints(self):
+        self.client.force_login(self.user)
+        resp = self.client.post(reverse('generate_image', args=[self.diary.id]))
+        self.assertEqual(resp.status_code, 202)
+        job_id = resp.json()['job_id']
+
+        resp = self.client.get(reverse('generation_job_status', args=[job_id]))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()['job']['job_status'], GenerationJob.STATUS_QUEUED)
+
+        other = User.objects.create_user(username='b@test.com', email='b@test.com', password='pw12345!')
+        self.client.force_login(other)
+        resp = self.client.get(reverse('generation_job_status', args=[job_id]))
+        self.assertEqual(resp.status_code, 404)
+
+
+class GenerationProgressStreamTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='a@test.com', email='a@test.com', password='pw12345!')
+        self.diary = make_diary(self.user)
+        self.client.force_login(self.user)
+        self.async_client.cookies = self.client.cookies
+
+    def test_run_job_records_stage_events(self):
+        def fake_generate(diary_id, style_path, language, progress=None, **kwargs):
+            progress('outline_started')
+            progress('outline_done')
+            progress('image_received', panel=1, progress=70)
+            DiaryModel.objects.filter(pk=diary_id).update(temp_image_url='https://example.com/tmp.png')
+
+        enqueue_generation(self.diary)
+        job = claim_next_job('w1')
+        with mock.patch('entry.Image_making.pipeline.generate_and_attach_image_to_diary', side_effect=fake_generate):
+            job = run_job(job)
+        job.refresh_from_db()
+        stages = [event['stage'] for event in job.events]
+        self.assertEqual(stages, ['queued', 'started', 'outline_started', 'outline_done', 'image_received', 'succeeded'])
+        self.assertEqual(job.events[4]['progress'], 70)
+        self.assertEqual(self.client.get(reverse('generation_job_status', args=[job.id])).json()['job']['progress'], 100)
+
+    def _finished_job(self):
+        from .jobs import make_event
+
+        return GenerationJob.objects.create(
+            diary=self.diary, author=self.user, status=GenerationJob.STATUS_SUCCEEDED,
+            temp_image_url='https://example.com/tmp.png',
+            events=[make_event('queued'), make_event('started'), make_event('image_received'), make_event('succeeded')],
+        )
+
+    async def _read_stream(self, job, **headers):
+        resp = await self.async_client.get(reverse('generation_job_events', args=[job.id]), **headers)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp['Content-Type'], 'text/event-stream')
+        body = ''.join([chunk.decode() if isinstance(chunk, bytes) else chunk async for chunk in resp.streaming_content])
+        return [block for block in body.split('\n\n') if block.strip()]
+
+    async def test_stream_replays_events_and_finishes(self):
+        job = await sync_to_async(self._finished_job)()
+        blocks = await self._read_stream(job)
+        self.assertEqual(blocks[0], 'retry: 2000')
+        self.assertEqual([b.splitlines()[0] for b in blocks[1:5]], ['id: 0', 'id: 1', 'id: 2', 'id: 3'])
+        done = blocks[-1].splitlines()
+        self.assertEqual(done[0], 'event: done')
+        self.assertEqual(json.loads(done[1][len('data: '):])['temp_image_url'], 'https://example.com/tmp.png')
+
+    async def test_stream_resumes_from_last_event_id(self):
+        job = await sync_to_async(self._finished_job)()
+        blocks = await self._read_stream(job, headers={'Last-Event-ID': '2'})
+        self.assertEqual([b.splitlines()[0] for b in blocks[1:]], ['id: 3', 'event: done'])
+
+    async def test_stream_requires_owner(self):
+        job = await sync_to_async(self._finished_job)()
+        self.async_client.cookies.clear()
+        resp = await self.async_client.get(reverse('generation_job_events', args=[job.id]))
+        self.assertEqual(resp.status_code, 401)
+
+
+class PanelModeTests(TestCase):
+
+    def setUp(self):
+        import tempfile
+        from pathlib import Path
+
+        self.user = User.objects.create_user(username='a@test.com', email='a@test.com', password='pw12345!')
+        self.diary = make_diary(self.user)
+        self.tmp = tempfile.TemporaryDirectory()
+        patcher = mock.patch('entry.Image_making.pipeline.MEDIA_DIR', Path(self.tmp.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+
+    @staticmethod
+    def _png(color):
+        from PIL import Image
+        from .Image_making.compose import to_png_bytes
+        return to_png_bytes(Image.new('RGB', (64, 64), color))
+
+    def test_composite_layout(self):
+        from .Image_making.compose import composite_2x2, grid_size, panel_boxes
+
+        image = composite_2x2([self._png('red'), self._png('blue')], ['one', 'two'])
+        self.assertEqual(image.size, grid_size())
+        left, top, right, bottom = panel_boxes()[1]
+        self.assertEqual(image.getpixel((left + 20, top + 20)), (0, 0, 255))
+        # 비어 있는 3번 패널은 흰 배경
+        left, top, _, _ = panel_boxes()[2]
+        self.assertEqual(image.getpixel((left + 20, top + 20)), (255, 255, 255))
+
+    def test_panels_mode_and_single_panel_regeneration(self):
+        from .Image_making import pipeline
+
+        outline = [{'scene': f'scene {i}', 'caption': f'cap {i}', 'emotion': ''} for i in range(4)]
+        calls = []
+
+        def fake_bytes(prompt, size):
+            calls.append(prompt)
+            return self._png('green')
+
+        with mock.patch.object(pipeline, '_outline_diary_into_4_panels', return_value=outline), \
+                mock.patch.object(pipeline, 'generate_image_bytes', side_effect=fake_bytes):
+            pipeline.generate_and_attach_image_to_diary(self.diary.id, style_path=None, mode=pipeline.MODE_PANELS)
+            self.assertEqual(len(calls), 4)
+            self.assertTrue(all('[PANEL' in p and '2x2' not in p for p in calls))
+
+            pipeline.regenerate_panel_for_diary(self.diary.id, 3, style_path=None)
+            self.assertEqual(len(calls), 5)
+            self.assertIn('[PANEL 3]', calls[-1])
+
+        self.diary.refresh_from_db()
+        self.assertTrue(self.diary.temp_image_url.startswith(reverse('temp_image', args=[self.diary.id])))
+        self.assertTrue(pipeline.composite_path(self.diary.id).exists())
+
+    def test_failed_panel_keeps_the_others(self):
+        from .Image_making import pipeline
+
+        outline = [{'scene': f'scene {i}', 'caption': f'cap {i}', 'emotion': ''} for i in range(4)]
+        events = []
+
+        def fake_bytes(prompt, size):
+            if '[PANEL 2]' in prompt:
+                raise TimeoutError('image request timed out')
+            return self._png('green')
+
+        with mock.patch.object(pipeline, '_outline_diary_into_4_panels', return_value=outline), \
+                mock.patch.object(pipeline, 'generate_image_bytes', side_effect=fake_bytes), \
+                self.assertLogs('entry.Image_making.pipeline', 'WARNING'):
+            pipeline.generate_and_attach_image_to_diary(
+                self.diary.id, style_path=None, mode=pipeline.MODE_PANELS,
+                progress=lambda stage, **data: events.append((stage, data)),
+            )
+        workdir = pipeline.panel_workdir(self.diary.id)
+        self.assertEqual(sorted(p.name for p in workdir.glob('panel_*.png')), ['panel_1.png', 'panel_3.png', 'panel_4.png'])
+        self.assertTrue(pipeline.composite_path(self.diary.id).exists())
+        self.assertIn(('composited', {'failed_panels': [2]}), events)
+
+        # 빠진 패널만 다시 생성
+        with mock.patch.object(pipeline, 'generate_image_bytes', return_value=self._png('blue')) as regen:
+            pipeline.regenerate_panel_for_diary(self.diary.id, 2, style_path=None)
+        self.assertEqual(regen.call_count, 1)
+        self.assertTrue((workdir / 'panel_2.png').exists())
+
+        # 요청한 패널이 모두 실패하면 작업 실패
+        with mock.patch.object(pipeline, 'generate_image_bytes', side_effect=TimeoutError('down')), \
+                self.assertLogs('entry.Image_making.pipeline', 'WARNING'):
+            with self.assertRaises(TimeoutError):
+                pipeline.regenerate_panel_for_diary(self.diary.id, 4, style_path=None)
+
+
+class OpenAIClientTests(TestCase):
+
+    def test_retry_is_capped_at_one(self):
+        from .Image_making.client import FakeAPIError, FakeOpenAIClient, RateLimiter, call_with_retry
+
+        fake = FakeOpenAIClient(errors=[FakeAPIError(429), FakeAPIError(500), FakeAPIError(500)])
+        sleeps = []
+        with self.assertRaises(FakeAPIError):
+            call_with_retry(fake.images.generate, retries=5, backoff=0.5,
+                            limiter=RateLimiter(rate=0), sleep=sleeps.append, prompt='x')
+        self.assertEqual(len(fake.calls), 2)
+        self.assertEqual(len(sleeps), 1)
+        self.assertGreaterEqual(sleeps[0], 0.5)
+
+    def test_retry_recovers_and_skips_client_errors(self):
+        from .Image_making.client import FakeAPIError, FakeOpenAIClient, RateLimiter, call_with_retry
+
+        limiter = RateLimiter(rate=0)
+        fake = FakeOpenAIClient(errors=[FakeAPIError(503)])
+        resp = call_with_retry(fake.images.generate, limiter=limiter, sleep=lambda s: None, prompt='x')
+        self.assertEqual(resp.data[0].url, fake.image_url)
+        self.assertEqual(len(fake.calls), 2)
+
+        fake = FakeOpenAIClient(errors=[FakeAPIError(400)])
+        with self.assertRaises(FakeAPIError):
+            call_with_retry(fake.images.generate, limiter=limiter, sleep=lambda s: None, prompt='x')
+        self.assertEqual(len(fake.calls), 1)
+
+    def test_limiter_caps_in_flight_requests(self):
+        from concurrent.futures import ThreadPoolExecutor
+        from .Image_making.client import FakeOpenAIClient, RateLimiter, call_with_retry
+
+        fake = FakeOpenAIClient(latency=0.05)
+        limiter = RateLimiter(max_in_flight=2, rate=0)
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            list(pool.map(lambda i: call_with_retry(fake.images.generate, limiter=limiter, prompt=str(i)), range(6)))
+        self.assertEqual(len(fake.calls), 6)
+        self.assertEqual(fake.max_in_flight, 2)
+
+    def test_token_bucket_spaces_out_bursts(self):
+        from .Image_making.client import RateLimiter
+
+        now = [0.0]
+        waits = []
+
+        def fake_sleep(seconds):
+            waits.append(seconds)
+            now[0] += seconds
+
+        limiter = RateLimiter(max_in_flight=10, rate=2.0, burst=2, clock=lambda: now[0], sleep=fake_sleep)
+        for _ in range(4):
+            with limiter.slot():
+                pass
+        # 버스트 2개는 바로, 나머지 2개는 0.5초 간격
+        self.assertEqual(len(waits), 2)
+        self.assertAlmostEqual(sum(waits), 1.0)
+
+    def test_pipeline_uses_shared_client(self):
+        from django.core.cache import cache
+        from .Image_making import client as openai_client
+        from .Image_making.pipeline import build_prompt_from_diary, generate_image
+
+        cache.clear()
+        fake = openai_client.FakeOpenAIClient()
+        openai_client.set_client(fake)
+        self.addCleanup(openai_client.set_client, None)
+
+        prompt = build_prompt_from_diary('오늘은 비가 왔다.', style_template='')
+        self.assertIn('Hook scene', prompt)
+        url, _ = generate_image(prompt)
+        self.assertEqual(url, fake.image_url)
+        self.assertEqual([c['kind'] for c in fake.calls], ['chat', 'images'])
+        self.assertIn('timeout', fake.calls[0])
+
+    def test_fake_provider_is_deterministic_and_configurable(self):
+        import base64
+        from io import BytesIO
+        from PIL import Image
+        from .Image_making import client as openai_client
+
+        def outcomes(seed):
+            fake = openai_client.FakeOpenAIClient(error_rate=0.5, seed=seed)
+            result = []
+            for _ in range(20):
+                try:
+                    fake.images.generate(prompt='x')
+                    result.append(None)
+                except openai_client.FakeAPIError as e:
+                    result.append(e.status_code)
+            return result
+
+        self.assertEqual(outcomes(7), outcomes(7))
+        self.assertTrue(any(outcomes(7)) and not all(outcomes(7)))
+
+        with self.settings(OPENAI_PROVIDER='fake', FAKE_OPENAI_IMAGE_PX=96, FAKE_OPENAI_SEED=3):
+            openai_client.set_client(None)
+            self.addCleanup(openai_client.set_client, None)
+            fake = openai_client.get_client()
+        self.assertIsInstance(fake, openai_client.FakeOpenAIClient)
+        data = fake.images.generate(prompt='x', response_format='b64_json').data[0].b64_json
+        image = Image.open(BytesIO(base64.b64decode(data)))
+        self.assertEqual(image.size, (96, 96))
+        # 잡음 이미지라 압축이 거의 안 된다 (실제 생성 이미지 크기에 가깝게)
+        self.assertGreater(len(base64.b64decode(data)), 96 * 96 * 3 * 0.9)
+
+
+class OutlineCacheTests(TestCase):
+
+    def setUp(self):
+        from django.core.cache import cache
+        from .Image_making import client as openai_client
+
+        cache.clear()
+        self.fake = openai_client.FakeOpenAIClient()
+        openai_client.set_client(self.fake)
+        self.addCleanup(openai_client.set_client, None)
+
+    def test_style_switch_reuses_outline(self):
+        from .Image_making.pipeline import build_prompt_from_diary
+
+        text = 'Title: 산책\n\n공원에서 강아지를 만났다.'
+        simple = build_prompt_from_diary(text, style_template='[GLOBAL STYLE]\nsimple doodle\n')
+        ani = build_prompt_from_diary(text, style_template='[GLOBAL STYLE]\nanime\n')
+        self.assertEqual([c['kind'] for c in self.fake.calls], ['chat'])
+        self.assertIn('simple doodle', simple)
+        self.assertIn('anime', ani)
+
+        build_prompt_from_diary(text + ' 수정', style_template='')
+        self.assertEqual(len(self.fake.calls), 2)
+
+    def test_db_backend_ttl_and_lru_eviction(self):
+        from .Image_making.outline_cache import DBBackend, get_or_compute
+        from .models import OutlineCache
+
+        backend = DBBackend(ttl=3600, max_entries=2)
+        panels = [{'scene': 's', 'caption': 'c', 'emotion': ''}] * 4
+        computed = []
+
+        def compute():
+            computed.append(1)
+            return panels
+
+        for text in ('a', 'b'):
+            get_or_compute(text, 'en', 'm', 0.3, compute, backend=backend)
+        get_or_compute('a', 'en', 'm', 0.3, compute, backend=backend)  # a 사용 → b가 LRU
+        get_or_compute('c', 'en', 'm', 0.3, compute, backend=backend)
+        self.assertEqual(len(computed), 3)
+        self.assertEqual(OutlineCache.objects.count(), 2)
+
+        get_or_compute('a', 'en', 'm', 0.3, compute, backend=backend)
+        self.assertEqual(len(computed), 3)
+        get_or_compute('b', 'en', 'm', 0.3, compute, backend=backend)
+        self.assertEqual(len(computed), 4)
+
+        OutlineCache.objects.update(created_at=timezone.now() - timedelta(hours=2))
+        get_or_compute('a', 'en', 'm', 0.3, compute, backend=backend)
+        self.assertEqual(len(computed), 5)
+
+    def test_fallback_outline_is_not_cached(self):
+        from .Image_making.outline_cache import DBBackend, get_or_compute
+        from .models import OutlineCache
+
+        empty = [{'scene': '', 'caption': '', 'emotion': ''}] * 4
+        get_or_compute('x', 'en', 'm', 0.3, lambda: empty, backend=DBBackend())
+        self.assertFalse(OutlineCache.objects.exists())
+
+
+class StyleRegistryTests(TestCase):
+
+    def setUp(self):
+        import tempfile
+        from pathlib import Path
+        from .Image_making.styles import StyleRegistry, set_registry
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dir = Path(self.tmp.name)
+        self.write('simple', '[GLOBAL STYLE]\nsimple doodle\n\n[NEGATIVE PROMPT]\nno text\n')
+        self.write('ani', '[GLOBAL STYLE]\nanime\n')
+        self.registry = StyleRegistry(self.dir, reload_interval=0).load()
+        set_registry(self.registry)
+        self.addCleanup(set_registry, None)
+
+    def write(self, name, text, mtime=None):
+        import os
+
+        path = self.dir / f'sample_prompt_{name}.txt'
+        path.write_text(text, encoding='utf-8')
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+        return path
+
+    def test_sections_and_theme_alias(self):
+        from .Image_making.styles import resolve_style, template_for
+
+        self.assertEqual(self.registry.names(), ['ani', 'simple'])
+        self.assertEqual(template_for('simple').sections['NEGATIVE PROMPT'], 'no text')
+        self.assertEqual(resolve_style('Theme2'), 'ani')
+        self.assertIsNone(resolve_style('Theme3'))
+        # 모르는 이름은 기본 스타일
+        self.assertIs(self.registry.get('real'), self.registry.get('simple'))
+
+    def test_changed_and_new_files_are_reloaded(self):
+        before = self.registry.get('ani')
+        self.assertIs(self.registry.get('ani'), before)  # 그대로면 같은 객체
+
+        self.write('ani', '[GLOBAL STYLE]\nwatercolor\n', mtime=before.mtime + 10)
+        self.assertEqual(self.registry.get('ani').sections['GLOBAL STYLE'], 'watercolor')
+
+        self.write('real', '[GLOBAL STYLE]\nphoto\n')
+        self.assertEqual(self.registry.resolve('Theme3'), 'real')
+
+    def test_render_accepts_text_or_template(self):
+        from .Image_making.pipeline import _render_panel_prompt, _render_prompt
+
+        panels = [{'scene': f's{i}', 'caption': f'c{i}', 'emotion': ''} for i in range(4)]
+        template = self.registry.get('simple')
+        self.assertEqual(_render_prompt(template, panels), _render_prompt(template.text, panels))
+        self.assertEqual(_render_panel_prompt(template, panels[0], 1), _render_panel_prompt(template.text, panels[0], 1))
+
+
+class PromptRendererTests(TestCase):
+    """정규식 후처리 체인(_ensure_negative_prompt → _normalize_layout_to_2x2 → _clamp_to_four_panels)으로
+    만든 결과(testdata/prompt_golden.json)와 바이트 단위로 같아야 한다"""
+
+    @classmethod
+    def setUpTestData(cls):
+        from pathlib import Path
+
+        cls.golden = json.loads((Path(__file__).parent / 'testdata' / 'prompt_golden.json').read_text(encoding='utf-8'))
+
+    def test_matches_golden_outputs(self):
+        from .Image_making.pipeline import _render_prompt
+        from .Image_making.styles import StyleTemplate
+
+        for case, expected in self.golden['expected'].items():
+            template_name, panels_name = case.split('/')
+            text = self.golden['templates'][template_name]
+            panels = self.golden['panels'][panels_name]
+            with self.subTest(case=case):
+                self.assertEqual(_render_prompt(text, panels), expected)
+                self.assertEqual(_render_prompt(StyleTemplate(template_name, text), panels), expected)
+
+    def test_always_2x2_with_negative_prompt(self):
+        from .Image_making.prompt import LAYOUT_2X2_BLOCK, compile_prompt
+
+        panels = self.golden['panels']['full'] * 2  # 8개를 줘도 4개만
+        for name, text in self.golden['templates'].items():
+            with self.subTest(template=name):
+                prompt = compile_prompt(text).render(panels)
+                self.assertEqual(prompt.count(LAYOUT_2X2_BLOCK), 1)
+                self.assertEqual(prompt.count('\n[PANEL '), 4)
+                self.assertEqual(prompt.count('[NEGATIVE PROMPT]'), 1)
+                self.assertGreater(prompt.index('[NEGATIVE PROMPT]'), prompt.rindex('[PANEL '))
+
+
+class StreamingTransferTests(TestCase):
+
+    def test_save_temp_image_streams_into_storage(self):
+        import tempfile
+        from django.core.files.storage import FileSystemStorage
+        from .bench import random_png_like, serve_bytes
+        from .Image_making.pipeline import save_temp_image_to_s3
+
+        user = User.objects.create_user(username='a@test.com', email='a@test.com', password='pw12345!')
+        payload = random_png_like(300 * 1024 + 7)
+        with serve_bytes(payload) as url, tempfile.TemporaryDirectory() as tmp:
+            diary = make_diary(user, temp_image_url=url)
+            storage = FileSystemStorage(location=tmp, base_url='/media/cartoon/')
+            saved_url = save_temp_image_to_s3(diary.id, storage=storage)
+
+            self.assertEqual(saved_url, f'/media/cartoon/{hashlib.sha256(payload).hexdigest()}.png')
+            name = saved_url.rsplit('/', 1)[1]
+            with storage.open(name, 'rb') as f:
+                self.assertEqual(f.read(), payload)
+        diary.refresh_from_db()
+        self.assertEqual(diary.image_url, saved_url)
+
+    def test_streaming_body_reads_in_bounded_pieces(self):
+        from .Image_making.transfer import StreamingBody
+
+        seen = []
+        body = StreamingBody(iter([b'abc', b'', b'defgh']), on_chunk=[seen.append])
+        self.assertEqual(body.read(2), b'ab')
+        self.assertEqual(body.read(4), b'cdef')
+        self.assertEqual(body.read(), b'gh')
+        self.assertEqual(body.read(1), b'')
+        self.assertEqual(seen, [b'abc', b'defgh'])
+        self.assertEqual(body.bytes_read, 8)
+
+
+class DownloadImageTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='a@test.com', email='a@test.com', password='pw12345!')
+        self.client.force_login(self.user)
+
+    def test_stream_mode_proxies_in_chunks(self):
+        from .bench import random_png_like, serve_bytes
+
+        payload = random_png_like(200 * 1024)
+        with serve_bytes(payload) as url, self.settings(CARTOON_DOWNLOAD_MODE='stream'):
+            diary = make_diary(self.user, image_url=url)
+            resp = self.client.get(reverse('download', args=[diary.id]))
+            self.assertTrue(resp.streaming)
+            self.assertEqual(b''.join(resp.streaming_content), payload)
+        self.assertIn('attachment;', resp['Content-Disposition'])
+        self.assertEqual(resp['Content-Length'], str(len(payload)))
+
+    def test_redirect_mode_issues_presigned_url(self):
+        from diary.storages import CartoonStorage
+
+        storage = CartoonStorage(
+            bucket_name='diary-bucket', access_key='test', secret_key='test',
+            region_name='ap-northeast-2', custom_domain='diary-bucket.s3.ap-northeast-2.amazonaws.com',
+        )
+        diary = make_diary(self.user, image_url=storage.url('diary_1_20251020.png'))
+        self.assertEqual(storage.name_from_url(diary.image_url), 'diary_1_20251020.png')
+        self.assertIsNone(storage.name_from_url('https://example.com/other.png'))
+
+        with self.settings(CARTOON_DOWNLOAD_MODE='redirect'), \
+                mock.patch('diary.storages.CartoonStorage', return_value=storage):
+            resp = self.client.get(reverse('download', args=[diary.id]))
+        self.assertEqual(resp.status_code, 302)
+        self.assertIn('media/cartoon/diary_1_20251020.png', resp['Location'])
+        self.assertIn('X-Amz-Signature=', resp['Location'])
+        self.assertIn('response-content-disposition=attachment', resp['Location'])
+
+
+class DerivativeTests(TestCase):
+
+    def test_save_creates_thumbnail_preview_and_panel_crops(self):
+        import tempfile
+        from io import BytesIO
+        from PIL import Image
+        from django.core.files.storage import FileSystemStorage
+        from .bench import serve_bytes
+        from .Image_making.compose import to_png_bytes
+        from .Image_making.pipeline import save_temp_image_to_s3
+
+        source = Image.new('RGB', (1024, 1024), 'white')
+        source.paste((255, 0, 0), (512, 0, 1024, 512))  # 2번 컷(우상단)만 빨강
+        payload = to_png_bytes(source)
+
+        user = User.objects.create_user(username='a@test.com', email='a@test.com', password='pw12345!')
+        with serve_bytes(payload) as url, tempfile.TemporaryDirectory() as tmp:
+            diary = make_diary(user, temp_image_url=url)
+            storage = FileSystemStorage(location=tmp, base_url='/media/cartoon/')
+            save_temp_image_to_s3(diary.id, storage=storage)
+            diary.refresh_from_db()
+
+            def open_saved(saved_url):
+                with storage.open(saved_url.rsplit('/', 1)[1], 'rb') as f:
+                    return Image.open(BytesIO(f.read()))
+
+            self.assertEqual(open_saved(diary.thumbnail_url).size, (320, 320))
+            self.assertEqual(open_saved(diary.preview_url).size, (768, 768))
+            self.assertEqual(len(diary.panel_urls), 4)
+            panel_2 = open_saved(diary.panel_urls[1]).convert('RGB')
+            self.assertEqual(panel_2.size, (512, 512))
+            r, g, b = panel_2.getpixel((256, 256))
+            self.assertTrue(r > 200 and g < 60 and b < 60)
+        self.assertTrue(diary.thumbnail_url.endswith('_thumb.webp'))
+        self.assertEqual(diary.display_thumbnail_url, diary.thumbnail_url)
+
+
+class ContentAddressedStorageTests(TestCase):
+
+    def setUp(self):
+        import tempfile
+        from PIL import Image
+        from django.core.files.storage import FileSystemStorage
+        from .Image_making.compose import to_png_bytes
+
+        self.user = User.objects.create_user(username='a@test.com', email='a@test.com', password='pw12345!')
+        self.payload = to_png_bytes(Image.new('RGB', (128, 128), 'white'))
+        self.digest = hashlib.sha256(self.payload).hexdigest()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.storage = FileSystemStorage(location=self.tmp.name, base_url='/media/cartoon/')
+
+    def save(self, diary):
+        from .Image_making.pipeline import save_temp_image_to_s3
+
+        with mock.patch.object(self.storage, 'save', wraps=self.storage.save) as saves:
+            url = save_temp_image_to_s3(diary.id, storage=self.storage)
+        return url, [call.args[0] for call in saves.call_args_list]
+
+    def test_same_image_is_uploaded_once(self):
+        from .bench import serve_bytes
+        from .models import CartoonBlob
+
+        with serve_bytes(self.payload) as url:
+            first = make_diary(self.user, temp_image_url=url)
+            second = make_diary(self.user, temp_image_url=url, posted_date=timezone.make_aware(datetime(2025, 10, 21, 12, 0)))
+            url1, names1 = self.save(first)
+            url2, names2 = self.save(first)  # 저장 버튼 다시 누름
+            url3, names3 = self.save(second)  # 같은 임시 URL을 다른 일기에서 저장
+
+        self.assertEqual(url1, f'/media/cartoon/{self.digest}.png')
+        self.assertEqual(len(names1), 7)  # 원본 + 파생 이미지 6장
+        self.assertEqual((url2, names2, url3, names3), (url1, [], url1, []))
+        self.assertEqual(CartoonBlob.objects.count(), 1)
+        second.refresh_from_db()
+        self.assertEqual(second.image_blob.sha256, self.digest)
+        self.assertTrue(second.thumbnail_url.startswith(f'/media/cartoon/{self.digest}_thumb'))
+
+    def test_existing_object_skips_upload(self):
+        from django.core.files.base import ContentFile
+        from .bench import serve_bytes
+
+        # 다른 서버/이전 실행이 이미 올려 둔 객체 (DB 행 없음) → HEAD로 확인하고 업로드 생략
+        self.storage.save(f'{self.digest}.png', ContentFile(self.payload))
+        with serve_bytes(self.payload) as url:
+            _, names = self.save(make_diary(self.user, temp_image_url=url))
+        self.assertNotIn(f'{self.digest}.png', names)
+        self.assertEqual(sorted(self.storage.listdir('')[1])[0], f'{self.digest}.png')
+
+    def test_gc_removes_only_unreferenced_blobs(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from django.test import override_settings
+        from .bench import serve_bytes
+        from .blobs import collect_garbage
+        from .models import CartoonBlob
+
+        with serve_bytes(self.payload) as url:
+            kept = make_diary(self.user, temp_image_url=url)
+            self.save(kept)
+        with serve_bytes(self.payload[:-1] + b'x') as url:  # 다른 내용 (파생 이미지 생성은 실패)
+            dropped = make_diary(self.user, temp_image_url=url, posted_date=timezone.make_aware(datetime(2025, 10, 21, 12, 0)))
+            self.save(dropped)
+        self.assertEqual(CartoonBlob.objects.count(), 2)
+        orphan = CartoonBlob.objects.get(diaries=dropped)
+        dropped.delete()
+        CartoonBlob.objects.update(last_used_at=timezone.now() - timedelta(days=2))
+
+        with override_settings(CARTOON_STORAGE='django.core.files.storage.FileSystemStorage', MEDIA_ROOT=self.tmp.name):
+            out = StringIO()
+            call_command('gc_cartoon_blobs', '--dry-run', stdout=out)
+        self.assertIn('삭제 대상 1건', out.getvalue())
+        self.assertTrue(self.storage.exists(orphan.key))
+
+        self.assertEqual(collect_garbage(self.storage)['deleted'], 1)
+        self.assertFalse(self.storage.exists(orphan.key))
+        self.assertEqual(list(CartoonBlob.objects.values_list('sha256', flat=True)), [self.digest])
+        self.assertTrue(self.storage.exists(f'{self.digest}.png'))
+        self.assertEqual(collect_garbage(self.storage)['candidates'], 0)
+
+
+class DiaryMonthApiTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='a@test.com', email='a@test.com', password='pw12345!')
+        self.other = User.objects.create_user(username='b@test.com', email='b@test.com', password='pw12345!')
+        self.client.force_login(self.user)
+
+    def test_month_payload_is_scoped_to_user_and_month(self):
+        make_diary(self.user, note='10월 1일', posted_date=timezone.make_aware(datetime(2025, 10, 1, 0, 30)))
+        make_diary(self.user, note='10월 31일', posted_date=timezone.make_aware(datetime(2025, 10, 31, 23, 30)),
+                   thumbnail_url='https://example.com/t.webp')
+        make_diary(self.user, note='9월', posted_date=timezone.make_aware(datetime(2025, 9, 30, 23, 59)))
+        make_diary(self.user, note='11월', posted_date=timezone.make_aware(datetime(2025, 11, 1, 0, 0)))
+        make_diary(self.other, note='남의 일기', posted_date=timezone.make_aware(datetime(2025, 10, 15, 12, 0)))
+
+        resp = self.client.get(reverse('diary_month_api', args=[2025, 10]))
+        self.assertEqual(resp.status_code, 200)
+        days = resp.json()['days']
+        self.assertEqual(sorted(days), ['2025-10-01', '2025-10-31'])
+        self.assertEqual(days['2025-10-31']['note'], '10월 31일')
+        self.assertEqual(days['2025-10-31']['thumbnail_url'], 'https://example.com/t.webp')
+
+    def test_etag_round_trip_returns_304(self):
+        make_diary(self.user)
+        url = reverse('diary_month_api', args=[2025, 10])
+        first = self.client.get(url)
+        self.assertIn('ETag', first)
+        self.assertIn('Last-Modified', first)
+
+        second = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 304)
+
+        make_diary(self.user, note='새 일기', posted_date=timezone.make_aware(datetime(2025, 10, 21, 9, 0)))
+        third = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(third.status_code, 200)
+        self.assertNotEqual(third['ETag'], first['ETag'])
+
+    def test_invalid_month_returns_400(self):
+        resp = self.client.get('/api/diary/month/2025-13/')
+        self.assertEqual(resp.status_code, 400)
+
+
+class DateRangeLookupTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='a@test.com', email='a@test.com', password='pw12345!')
+        self.client.force_login(self.user)
+
+    def test_day_filter_is_half_open_in_local_time(self):
+        from .dates import day_filter
+
+        # Asia/Seoul 자정 경계 (UTC로는 전날 15:00)
+        make_diary(self.user, note='경계 시작', posted_date=timezone.make_aware(datetime(2025, 10, 20, 0, 0)))
+        make_diary(self.user, note='다음날', posted_date=timezone.make_aware(datetime(2025, 10, 21, 0, 0)))
+        notes = list(DiaryModel.objects.filter(author=self.user, **day_filter(datetime(2025, 10, 20).date()))
+                     .values_list('note', flat=True))
+        self.assertEqual(notes, ['경계 시작'])
+
+        resp = self.client.get(reverse('diary_by_date_api', args=['2025-10-21']))
+        self.assertEqual(resp.json()['data']['note'], '다음날')
+
+    def test_per_day_lookup_uses_author_date_index(self):
+        from django.db import connection
+        from .dates import day_filter
+
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            self.skipTest('query plan check only for SQLite/Postgres')
+        for day in range(1, 29):
+            make_diary(self.user, posted_date=timezone.make_aware(datetime(2025, 10, day, 9, 0)))
+
+        qs = DiaryModel.objects.filter(author=self.user, **day_filter(datetime(2025, 10, 20).date()))
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                # 작은 테이블이라 seq scan을 고르지 않도록
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                plan = qs.explain()
+        else:
+            plan = qs.explain()
+        self.assertIn('entry_diary_author_date_idx', plan)
+
+
+class DiaryListPaginationTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='a@test.com', email='a@test.com', password='pw12345!')
+        self.client.force_login(self.user)
+
+    def test_cursor_walks_every_diary_once_newest_first(self):
+        from .listing import diary_page
+
+        # 같은 시각 일기 (하루 하나 제약 전에 생긴 중복, diary_date 없음) → id로 순서 결정
+        same_time = timezone.make_aware(datetime(2025, 10, 5, 9, 0))
+        created = DiaryModel.objects.bulk_create([
+            DiaryModel(author=self.user, note='중복', content='x', posted_date=same_time, productivity=5)
+            for _ in range(3)
+        ])
+        created += [make_diary(self.user, posted_date=timezone.make_aware(datetime(2025, 10, d, 9, 0)))
+                    for d in (1, 2, 7)]
+
+        seen, cursor = [], None
+        while True:
+            page, cursor = diary_page(self.user, cursor, limit=2)
+            seen += [d.id for d in page]
+            if cursor is None:
+                break
+        expected = sorted(created, key=lambda d: (d.posted_date, d.id), reverse=True)
+        self.assertEqual(seen, [d.id for d in expected])
+
+    def test_list_cards_never_fetch_full_content(self):
+        long_text = '가' * 5000
+        make_diary(self.user, content=long_text)
+
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(reverse('diary_list_api'))
+        self.assertEqual(resp.json()['items'][0]['summary'], '가' * 100 + '  ...')
+        diary_queries = [q['sql'] for q in ctx.captured_queries if 'entry_diarymodel' in q['sql']]
+        self.assertEqual(len(diary_queries), 1)
+        # content는 SUBSTR(...) 안에서만 등장
+        self.assertIn('SUBSTR', diary_queries[0].upper())
+        self.assertEqual(diary_queries[0].count('"content"'), 1)
+
+    def test_show_renders_first_page_and_api_continues(self):
+        for d in range(1, 31):
+            make_diary(self.user, note=f'day {d}', posted_date=timezone.make_aware(datetime(2025, 10, d, 9, 0)))
+
+        resp = self.client.get(reverse('show'))
+        self.assertEqual(len(resp.context['diaries']), 24)
+        self.assertEqual(resp.context['diaries'][0].note, 'day 30')
+
+        more = self.client.get(reverse('diary_list_api'), {'cursor': resp.context['next_cursor']}).json()
+        self.assertEqual([i['note'] for i in more['items']], [f'day {d}' for d in range(6, 0, -1)])
+        self.assertIsNone(more['next_cursor'])
+
+        self.assertEqual(self.client.get(reverse('diary_list_api'), {'cursor': 'garbage'}).status_code, 400)
+
+
+class ProductivityRollupTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='a@test.com', email='a@test.com', password='pw12345!')
+        self.client.force_login(self.user)
+
+    def _day(self, d, value, hour=9):
+        diary = make_diary(self.user, posted_date=timezone.make_aware(datetime(2025, 10, d, hour, 0)))
+        diary.productivity = value
+        diary.save()
+        return diary
+
+    def _legacy_duplicate(self, d, value, hour):
+        # 하루 하나 제약 전에 생긴 같은 날 두 번째 일기 (diary_date 없음): 다른 날 만든 뒤 옮긴다
+        diary = self._day(28, value, hour)
+        DiaryModel.objects.filter(pk=diary.pk).update(diary_date=None)
+        diary.refresh_from_db()
+        diary.posted_date = timezone.make_aware(datetime(2025, 10, d, hour, 0))
+        diary.save()
+        return diary
+
+    def assertMatchesRebuild(self):
+        from .analytics import rebuild
+        from .models import ProductivityRollup
+
+        fields = ('period', 'start', 'count', 'total', 'min_value', 'max_value', 'streak', 'cum_count', 'cum_total')
+        incremental = list(ProductivityRollup.objects.filter(author=self.user).order_by('period', 'start').values_list(*fields))
+        rebuild(self.user.id)
+        rebuilt = list(ProductivityRollup.objects.filter(author=self.user).order_by('period', 'start').values_list(*fields))
+        self.assertEqual(incremental, rebuilt)
+
+    def test_incremental_updates_match_full_rebuild(self):
+        self._day(1, 4)
+        self._day(2, 6)
+        self._day(4, 8)
+        second_same_day = self._legacy_duplicate(4, 2, hour=20)
+        self._day(3, 10)          # 빈 날을 채우면 4일까지 연속
+        self.assertMatchesRebuild()
+
+        second_same_day.productivity = 9
+        second_same_day.save()
+        moved = self._day(20, 5)
+        moved.posted_date = timezone.make_aware(datetime(2025, 9, 30, 9, 0))
+        moved.save()
+        DiaryModel.objects.filter(author=self.user, posted_date__day=2).first().delete()
+        self.assertMatchesRebuild()
+
+    def test_range_api_serves_from_rollups_only(self):
+        for d, value in ((1, 4), (2, 6), (3, 8), (10, 2)):
+            self._day(d, value)
+
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(reverse('productivity_api'),
+                                   {'period': 'day', 'start': '2025-10-02', 'end': '2025-10-10'})
+        self.assertFalse([q for q in ctx.captured_queries if 'entry_diarymodel' in q['sql']])
+
+        data = resp.json()
+        self.assertEqual(data['summary'], {
+            'count': 3, 'mean': round(16 / 3, 2), 'min': 2, 'max': 8, 'longest_streak': 3, 'current_streak': 1,
+        })
+        self.assertEqual([p['start'] for p in data['points']], ['2025-10-02', '2025-10-03', '2025-10-10'])
+        # 이동평균(7일): 10일 창에는 10일 하나만
+        self.assertEqual([p['moving_avg'] for p in data['points']], [5.0, 6.0, 2.0])
+
+        weekly = self.client.get(reverse('productivity_api'),
+                                 {'period': 'month', 'start': '2025-10-01', 'end': '2025-10-31'}).json()
+        self.assertEqual(weekly['points'][0]['mean'], 5.0)
+        self.assertEqual(self.client.get(reverse('productivity_api'), {'period': 'year'}).status_code, 400)
+
+
+class DiarySearchTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='a@test.com', email='a@test.com', password='pw12345!')
+        self.other = User.objects.create_user(username='b@test.com', email='b@test.com', password='pw12345!')
+        self.client.force_login(self.user)
+
+    def test_ranked_prefix_search_with_highlighted_snippets(self):
+        title_hit = make_diary(self.user, note='공원 산책', content='아침에 <b>일찍</b> 일어났다.')
+        body_hit = make_diary(self.user, note='평범한 하루', content='오후에 공원에서 친구를 만났다.',
+                              posted_date=timezone.make_aware(datetime(2025, 10, 21, 12, 0)))
+        make_diary(self.user, note='집콕', content='하루 종일 집에 있었다.',
+                   posted_date=timezone.make_aware(datetime(2025, 10, 22, 12, 0)))
+        make_diary(self.other, note='공원', content='남의 일기')
+
+        data = self.client.get(reverse('diary_search_api'), {'q': '공원'}).json()
+        ids = [item['id'] for item in data['items']]
+        self.assertEqual(set(ids), {title_hit.id, body_hit.id})
+        self.assertEqual(ids[0], title_hit.id)  # 제목 일치가 먼저
+        self.assertEqual(data['items'][0]['note'], '<mark>공원</mark> 산책')
+        self.assertIn('<mark>공원에서</mark>', data['items'][1]['snippet'])
+
+        # 수정/삭제가 색인에 반영
+        body_hit.content = '오후에 도서관에 갔다.'
+        body_hit.save()
+        title_hit.delete()
+        self.assertEqual(self.client.get(reverse('diary_search_api'), {'q': '공원'}).json()['items'], [])
+        updated = self.client.get(reverse('diary_search_api'), {'q': '도서관'}).json()['items'][0]
+        self.assertIn('<mark>도서관에</mark>', updated['snippet'])
+
+    def test_pagination_and_validation(self):
+        for i in range(25):
+            make_diary(self.user, note=f'산책 {i}', posted_date=timezone.make_aware(datetime(2025, 9, 1 + i, 9, 0)))
+        first = self.client.get(reverse('diary_search_api'), {'q': '산책'}).json()
+        self.assertEqual(len(first['items']), 20)
+        self.assertEqual(first['next_page'], 2)
+        second = self.client.get(reverse('diary_search_api'), {'q': '산책', 'page': 2}).json()
+        self.assertEqual(len(second['items']), 5)
+        self.assertIsNone(second['next_page'])
+        self.assertFalse({i['id'] for i in first['items']} & {i['id'] for i in second['items']})
+
+        self.assertEqual(self.client.get(reverse('diary_search_api'), {'q': '  '}).status_code, 400)
+        # FTS 문법 문자는 제거되고 평범한 단어 검색으로
+        self.assertEqual(self.client.get(reverse('diary_search_api'), {'q': '"산책 OR*'}).status_code, 200)
+
+
+class CartoonVersionTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='a@test.com', email='a@test.com', password='pw12345!')
+        self.client.force_login(self.user)
+        self.diary = make_diary(self.user)
+
+    def test_generations_are_versioned_with_deduplicated_prompts_and_pinnable(self):
+        import tempfile
+        from PIL import Image
+        from django.core.files.storage import FileSystemStorage
+        from .bench import serve_bytes
+        from .Image_making import pipeline
+        from .Image_making.compose import to_png_bytes
+        from .models import CartoonVersion, PromptChunk
+        from .versions import list_versions, load_prompt
+
+        outlines = [
+            [{'scene': f'scene {i}', 'caption': f'cap {i}', 'emotion': ''} for i in range(4)],
+            [{'scene': f'scene {i}' if i else 'another start', 'caption': f'cap {i}', 'emotion': ''} for i in range(4)],
+        ]
+        white = to_png_bytes(Image.new('RGB', (64, 64), 'white'))
+        black = to_png_bytes(Image.new('RGB', (64, 64), 'black'))
+        with serve_bytes(white) as url1, serve_bytes(black) as url2, tempfile.TemporaryDirectory() as tmp:
+            storage = FileSystemStorage(location=tmp, base_url='/media/cartoon/')
+            with mock.patch.object(pipeline, '_outline_diary_into_4_panels', side_effect=outlines), \
+                    mock.patch.object(pipeline, 'generate_image', side_effect=[(url1, None), (url2, None)]):
+                for style in ('simple', 'ani'):
+                    pipeline.generate_and_attach_image_to_diary(
+                        self.diary.id, style_path=None, mode=pipeline.MODE_SINGLE, style=style,
+                    )
+                    pipeline.save_temp_image_to_s3(self.diary.id, storage=storage)
+
+        v1, v2 = CartoonVersion.objects.filter(diary=self.diary).order_by('number')
+        self.assertEqual((v1.number, v1.style, v2.number, v2.style), (1, 'simple', 2, 'ani'))
+        self.assertEqual(v1.outline, outlines[0])
+        self.assertTrue(v1.image_key and v2.image_key)
+        self.assertNotEqual(v1.image_url, v2.image_url)
+        self.assertEqual((v1.is_pinned, v2.is_pinned), (False, True))
+
+        # 공통 문단(스타일 헤더 등)은 한 번만 저장
+        self.assertLess(PromptChunk.objects.count(), len(v1.prompt_chunks) + len(v2.prompt_chunks))
+        self.diary.refresh_from_db()
+        self.assertEqual(load_prompt(v2), self.diary.final_prompt)
+
+        with self.assertNumQueries(1):
+            listed = list_versions(self.diary.id)
+        self.assertEqual([v['number'] for v in listed], [2, 1])
+
+        resp = self.client.post(reverse('pin_version', args=[self.diary.id, v1.id]))
+        self.assertEqual(resp.status_code, 200)
+        self.diary.refresh_from_db()
+        self.assertEqual(self.diary.image_url, v1.image_url)
+        self.assertEqual(self.diary.style, 'simple')
+        self.assertEqual(self.diary.final_prompt, load_prompt(v1))
+        pinned = self.client.get(reverse('diary_versions', args=[self.diary.id])).json()['versions']
+        self.assertEqual([v['is_pinned'] for v in pinned], [False, True])
+
+    def test_unsaved_version_cannot_be_pinned(self):
+        from .versions import record_generation
+
+        version = record_generation(self.diary, 'prompt', style='simple', temp_image_url='https://example.com/t.png')
+        resp = self.client.post(reverse('pin_version', args=[self.diary.id, version.id]))
+        self.assertEqual(resp.status_code, 409)
+
+        other = User.objects.create_user(username='b@test.com', email='b@test.com', password='pw12345!')
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(reverse('diary_versions', args=[self.diary.id])).status_code, 404)
+
+
+class MetricsTests(TestCase):
+
+    def setUp(self):
+        from . import metrics
+
+        self.metrics = metrics
+        metrics.reset()
+        self.user = User.objects.create_user(username='a@test.com', email='a@test.com', password='pw12345!')
+        self.diary = make_diary(self.user)
+
+    def test_timer_records_stage_histogram(self):
+        timed = self.metrics.timed(self.metrics.STAGE_SECONDS, stage='outline')
+        with timed:
+            pass
+        with self.assertRaises(RuntimeError):
+            with self.metrics.timed(self.metrics.STAGE_SECONDS, stage='outline'):
+                raise RuntimeError('boom')
+        self.metrics.observe(self.metrics.STAGE_SECONDS, 95.0, stage='outline', outcome='ok')
+        self.assertEqual(self.metrics.flush_pending(), 2)
+        # 두 번째 반영은 기존 행에 더한다
+        self.metrics.observe(self.metrics.STAGE_SECONDS, 0.01, stage='outline', outcome='ok')
+        self.metrics.flush_pending()
+
+        text = self.metrics.render()
+        labels = 'outcome="ok",stage="outline"'
+        self.assertIn('# TYPE diary_stage_duration_seconds histogram', text)
+        self.assertIn(f'diary_stage_duration_seconds_bucket{{{labels},le="0.05"}} 2', text)
+        self.assertIn(f'diary_stage_duration_seconds_bucket{{{labels},le="90.0"}} 2', text)
+        self.assertIn(f'diary_stage_duration_seconds_bucket{{{labels},le="120.0"}} 3', text)
+        self.assertIn(f'diary_stage_duration_seconds_count{{{labels}}} 3', text)
+        self.assertIn('diary_stage_duration_seconds_count{outcome="error",stage="outline"} 1', text)
+
+    def test_job_and_request_timings_exposed(self):
+        def fake_generate(diary_id, style_path, language, **kwargs):
+            DiaryModel.objects.filter(pk=diary_id).update(temp_image_url='https://example.com/tmp.png')
+
+        enqueue_generation(self.diary)
+        with mock.patch('entry.Image_making.pipeline.generate_and_attach_image_to_diary', side_effect=fake_generate):
+            run_job(claim_next_job('w1'))
+
+        self.client.force_login(self.user)
+        self.client.get(reverse('show'))
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+
+        with self.settings(METRICS_TOKEN='secret'):
+            resp = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp['Content-Type'].startswith('text/plain; version=0.0.4'))
+        text = resp.content.decode()
+        self.assertIn('diary_generation_duration_seconds_count{kind="full",status="succeeded"} 1', text)
+        self.assertIn('stage="queue_wait"', text)
+        self.assertIn('diary_http_request_duration_seconds_count{method="GET",view="show"} 1', text)
+
+
+class GenerateCartoonsCommandTests(TestCase):
+
+    def setUp(self):
+        from django.core.cache import cache
+        from .Image_making import client as openai_client
+
+        cache.clear()
+        self.fake = openai_client.FakeOpenAIClient()
+        openai_client.set_client(self.fake)
+        self.addCleanup(openai_client.set_client, None)
+        self.user = User.objects.create_user(username='a@test.com', email='a@test.com', password='pw12345!')
+        self.other = User.objects.create_user(username='b@test.com', email='b@test.com', password='pw12345!')
+
+    def test_backfill_missing_images_with_resume(self):
+        import os
+        import tempfile
+        from io import StringIO
+        from django.core.management import call_command
+        from .bench import serve_bytes
+        from .Image_making.client import _blank_png_b64
+        import base64
+
+        day = lambda d: timezone.make_aware(datetime(2025, 3, d, 9, 0))
+        first = make_diary(self.user, posted_date=day(1))
+        second = make_diary(self.user, posted_date=day(2))
+        make_diary(self.user, posted_date=day(3), image_url='https://example.com/saved.png')
+        make_diary(self.other, posted_date=day(1))
+
+        tmp = tempfile.mkdtemp()
+        checkpoint = os.path.join(tmp, 'ckpt.jsonl')
+        options = dict(user=['a@test.com'], missing_image=True, concurrency=1, checkpoint=checkpoint, stdout=StringIO())
+        with serve_bytes(base64.b64decode(_blank_png_b64())) as url, self.settings(
+            CARTOON_STORAGE='django.core.files.storage.FileSystemStorage', MEDIA_ROOT=tmp, MEDIA_URL='/media/',
+        ):
+            self.fake.image_url = url
+            # 첫 실행은 한 건만 처리하고 멈춘 것처럼
+            call_command('generate_cartoons', limit=1, save=True, **options)
+            out = StringIO()
+            call_command('generate_cartoons', save=True, **{**options, 'stdout': out})
+
+        # 저장까지 끝난 일기는 --missing-image 조건에서 빠진다
+        self.assertIn('대상 1건, 체크포인트로 건너뜀 0건, 실행 1건', out.getvalue())
+        for diary in (first, second):
+            diary.refresh_from_db()
+            self.assertTrue(diary.image_url.startswith('/media/'))
+            job = diary.generation_jobs.get()
+            self.assertEqual(job.status, GenerationJob.STATUS_SUCCEEDED)
+            self.assertEqual(job.events[-1]['stage'], 'uploaded')
+        with open(checkpoint, encoding='utf-8') as f:
+            self.assertEqual([json.loads(line)['diary_id'] for line in f], [first.id, second.id])
+
+    def test_failures_are_reported_and_retryable(self):
+        import os
+        import tempfile
+        from io import StringIO
+        from django.core.management import call_command
+        from .Image_making.client import FakeAPIError
+
+        diary = make_diary(self.user)
+        checkpoint = os.path.join(tempfile.mkdtemp(), 'ckpt.jsonl')
+        self.fake.errors = [FakeAPIError(400, 'bad prompt')]
+        out = StringIO()
+        call_command('generate_cartoons', concurrency=1, checkpoint=checkpoint, stdout=out)
+        self.assertIn('실패 1', out.getvalue())
+        self.assertIn('bad prompt', out.getvalue())
+
+        out = StringIO()
+        call_command('generate_cartoons', concurrency=1, checkpoint=checkpoint, stdout=out)
+        self.assertIn('실행 0건', out.getvalue())
+        call_command('generate_cartoons', concurrency=1, checkpoint=checkpoint, retry_failed=True, stdout=out)
+        self.assertEqual(diary.generation_jobs.filter(status=GenerationJob.STATUS_SUCCEEDED).count(), 1)
+
+
+class EmailLoginTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='Kim@Test.com', email='Kim@Test.com', password='pw12345!')
+
+    def test_login_ignores_email_case(self):
+        response = self.client.post(reverse('login'), {'username': 'kim@TEST.com', 'password': 'pw12345!'})
+        self.assertRedirects(response, reverse('entry'), fetch_redirect_response=False)
+        self.assertEqual(int(self.client.session['_auth_user_id']), self.user.id)
+
+    def test_login_error_messages(self):
+        response = self.client.post(reverse('login'), {'username': 'kim@test.com', 'password': 'wrong'})
+        self.assertEqual(response.context['error'], '비밀번호를 잘못 입력했습니다.')
+        response = self.client.post(reverse('login'), {'username': 'lee@test.com', 'password': 'pw12345!'})
+        self.assertEqual(response.context['error'], '존재하지 않는 아이디(이메일)입니다.')
+
+    def test_username_login_still_works(self):
+        from django.contrib.auth import authenticate
+
+        admin = User.objects.create_user(username='admin', password='pw12345!')
+        self.assertEqual(authenticate(username='admin', password='pw12345!'), admin)
+
+    def test_signup_rejects_case_variant_duplicate(self):
+        response = self.client.post(reverse('signup'), {'email': 'KIM@test.com', 'password': 'pw12345!'})
+        self.assertContains(response, '이미 사용 중인 이메일입니다.')
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_unique_index_blocks_case_variant(self):
+        from django.db import IntegrityError, transaction
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            User.objects.create_user(username='other', email='kim@test.com', password='x')
+        # 빈 이메일은 인덱스 대상이 아님
+        User.objects.create_user(username='no-email-1', password='x')
+        User.objects.create_user(username='no-email-2', password='x')
+
+    def test_lookup_uses_index(self):
+        from .accounts import EMAIL_INDEX, users_with_email
+
+        self.assertEqual(list(users_with_email(' KIM@test.COM ')), [self.user])
+        self.assertFalse(users_with_email('').exists())
+        self.assertIn(EMAIL_INDEX, users_with_email('kim@test.com').explain())
+
+    def test_hash_iterations_setting(self):
+        with self.settings(PASSWORD_HASH_ITERATIONS=1):
+            user = User.objects.create_user(username='fast@test.com', email='fast@test.com', password='pw')
+            self.assertTrue(user.password.startswith('pbkdf2_sha256$1$'))
+            self.assertTrue(user.check_password('pw'))
+
+
+class DiaryResponseCacheTests(TestCase):
+
+    def setUp(self):
+        from django.core.cache import caches
+
+        caches['diary'].clear()
+        self.user = User.objects.create_user(username='a@test.com', email='a@test.com', password='pw12345!')
+        self.client.force_login(self.user)
+        self.diary = make_diary(self.user, note='산책')
+
+    def _diary_queries(self, url, **headers):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(url, **headers)
+        return resp, [q['sql'] for q in ctx.captured_queries if DiaryModel._meta.db_table in q['sql']]
+
+    def test_date_api_is_cached_until_save(self):
+        url = reverse('diary_by_date_api', args=['2025-10-20'])
+        first, queries = self._diary_queries(url)
+        self.assertEqual(first.json()['data']['note'], '산책')
+        self.assertEqual(len(queries), 1)
+        second, queries = self._diary_queries(url)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(queries, [])
+
+        self.diary.note = '바다'
+        self.diary.save()
+        self.assertEqual(self.client.get(url).json()['data']['note'], '바다')
+
+    def test_empty_day_is_cached_and_invalidated_by_new_diary(self):
+        url = reverse('diary_by_date_api', args=['2025-10-22'])
+        self.assertEqual(self.client.get(url).json()['status'], 'empty')
+        self.assertEqual(self._diary_queries(url)[1], [])
+
+        make_diary(self.user, note='새 일기', posted_date=timezone.make_aware(datetime(2025, 10, 22, 9, 0)))
+        self.assertEqual(self.client.get(url).json()['data']['note'], '새 일기')
+
+    def test_cache_is_per_user(self):
+        other = User.objects.create_user(username='b@test.com', email='b@test.com', password='pw12345!')
+        url = reverse('diary_by_date_api', args=['2025-10-20'])
+        self.assertEqual(self.client.get(url).json()['status'], 'ok')
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(url).json()['status'], 'empty')
+        self.assertEqual(self.client.get(reverse('get_diary_detail', args=[self.diary.id])).status_code, 404)
+
+    def test_detail_api_conditional_get_and_delete(self):
+        url = reverse('get_diary_detail', args=[self.diary.id])
+        first = self.client.get(url)
+        self.assertIn('ETag', first)
+        self.assertIn('Last-Modified', first)
+        second, queries = self._diary_queries(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(queries, [])
+
+        self.diary.image_url = 'https://example.com/a.png'
+        self.diary.save(update_fields=['image_url'])
+        third = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(third.status_code, 200)
+        self.assertEqual(third.json()['data']['image_url'], 'https://example.com/a.png')
+
+        self.diary.delete()
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_detail_page_uses_cached_day(self):
+        url = reverse('detail_by_date', args=['2025-10-20'])
+        self.assertContains(self.client.get(url), '산책')
+        resp, queries = self._diary_queries(url)
+        self.assertContains(resp, '산책')
+        self.assertEqual(queries, [])
+
+        self.diary.note = '저녁'
+        self.diary.save()
+        self.assertContains(self.client.get(url), '저녁')
+
+    def test_file_backend(self):
+        import os
+        import tempfile
+
+        tmp = tempfile.mkdtemp()
+        caches = {
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'diary': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': tmp},
+        }
+        url = reverse('diary_by_date_api', args=['2025-10-20'])
+        with self.settings(CACHES=caches):
+            self.client.get(url)
+            self.assertTrue(os.listdir(tmp))
+            self.assertEqual(self._diary_queries(url)[1], [])
+            self.diary.note = '바다'
+            self.diary.save()
+            self.assertEqual(self.client.get(url).json()['data']['note'], '바다')
+
+    def test_invalidated_again_after_commit(self):
+        from . import diary_cache
+
+        before = diary_cache.generation(self.user.id)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.diary.save()
+            during = diary_cache.generation(self.user.id)
+        self.assertEqual(len(callbacks), 1)
+        self.assertNotEqual(before, during)
+        self.assertNotEqual(during, diary_cache.generation(self.user.id))
+
+
+class DiaryArchiveTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='a@test.com', email='a@test.com', password='pw12345!')
+        self.other = User.objects.create_user(username='b@test.com', email='b@test.com', password='pw12345!')
+        for day in (1, 2, 3):
+            make_diary(self.user, note=f'10월 {day}일', content=f'{day}일 공원 산책',
+                       posted_date=timezone.make_aware(datetime(2025, 10, day, 21, 0)), style='ani')
+        make_diary(self.other, note='남의 일기')
+
+    def export(self, user, **options):
+        import os
+        import tempfile
+        from django.core.management import call_command
+
+        path = os.path.join(tempfile.mkdtemp(), 'archive.zip' if options.get('zip') else 'archive.ndjson')
+        call_command('export_diaries', user=user.email, output=path, chunk_size=2, stderr=io.StringIO(), **options)
+        return path
+
+    def test_export_endpoint_streams_own_diaries(self):
+        self.client.force_login(self.user)
+        resp = self.client.get(reverse('diary_export_api'))
+        self.assertTrue(resp.streaming)
+        self.assertIn('attachment', resp['Content-Disposition'])
+        lines = [json.loads(line) for line in b''.join(resp.streaming_content).decode('utf-8').splitlines()]
+        self.assertEqual([line['note'] for line in lines], ['10월 1일', '10월 2일', '10월 3일'])
+        self.assertEqual(lines[0]['date'], '2025-10-01')
+        self.assertEqual(lines[0]['style'], 'ani')
+        self.assertEqual(self.client.get(reverse('diary_export_api'), {'format': 'xml'}).status_code, 400)
+
+    def test_import_reindexes_only_the_importing_user(self):
+        from django.core.management import call_command
+        from django.db import connection
+        from . import search
+
+        backend = search.get_backend()
+        if backend.name != 'sqlite_fts5':
+            self.skipTest('FTS5 table only')
+        # 다른 사용자의 색인 행 (전체 재색인이면 DiaryModel 기준으로 다시 써져 사라진다)
+        third = User.objects.create_user(username='c@test.com', email='c@test.com', password='pw12345!')
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {search.FTS_TABLE}(rowid, note, content, owner) VALUES (%s, %s, %s, %s)',
+                [999999, '표식', '표식 행', backend.owner_token(third.id)],
+            )
+
+        path = self.export(self.user)
+        with mock.patch.object(search, 'rebuild_index', side_effect=AssertionError('global rebuild')):
+            call_command('import_diaries', path, user=str(self.other.id), stdout=io.StringIO())
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM {search.FTS_TABLE} WHERE rowid = 999999')
+            self.assertEqual(cursor.fetchone()[0], 1)
+        self.client.force_login(self.other)
+        # 가져온 3건 + 원래 있던 일기
+        self.assertEqual(len(self.client.get(reverse('diary_search_api'), {'q': '산책'}).json()['items']), 4)
+
+    def test_round_trip_to_another_user(self):
+        from django.core.management import call_command
+        from . import analytics
+
+        path = self.export(self.user)
+        out = io.StringIO()
+        call_command('import_diaries', path, user=str(self.other.id), batch_size=2, stdout=out)
+        self.assertIn('새 일기 3건', out.getvalue())
+
+        imported = DiaryModel.objects.filter(author=self.other, note__startswith='10월').order_by('posted_date')
+        self.assertEqual([d.content for d in imported], ['1일 공원 산책', '2일 공원 산책', '3일 공원 산책'])
+        self.assertEqual(imported[0].posted_date, timezone.make_aware(datetime(2025, 10, 1, 21, 0)))
+        # bulk_create 뒤 집계/검색 색인 갱신
+        self.assertTrue(analytics.has_data(self.other.id))
+        self.client.force_login(self.other)
+        resp = self.client.get(reverse('diary_search_api'), {'q': '산책'})
+        self.assertEqual(len(resp.json()['items']), 4)  # 원래 있던 일기 포함
+
+        # 다시 가져와도 같은 결과 (날짜별 덮어쓰기)
+        out = io.StringIO()
+        call_command('import_diaries', path, user=self.other.email, stdout=out)
+        self.assertIn('새 일기 0건, 수정 0건, 변경 없음 3건', out.getvalue())
+        self.assertEqual(DiaryModel.objects.filter(author=self.other).count(), 4)
+
+    def test_import_upserts_by_day_like_entry_view(self):
+        import os
+        import tempfile
+        from django.core.management import call_command
+
+        self.client.force_login(self.user)
+        self.client.get(reverse('diary_by_date_api', args=['2025-10-02']))  # 캐시 채움
+        lines = [
+            {'date': '2025-10-02', 'note': '덮어씀', 'content': '새 본문', 'productivity': 9},
+            {'date': '2025-10-05', 'note': '첫 저장', 'content': 'a', 'style': 'real'},
+            {'date': '2025-10-05', 'note': '두 번째 저장', 'content': 'b'},
+        ]
+        path = os.path.join(tempfile.mkdtemp(), 'in.ndjson')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(''.join(json.dumps(line, ensure_ascii=False) + '\n' for line in lines))
+        call_command('import_diaries', path, user=self.user.email, stdout=io.StringIO())
+
+        second = DiaryModel.objects.get(author=self.user, note='덮어씀')
+        self.assertEqual((second.productivity, second.style), (9, 'ani'))  # 스타일은 값이 없으면 유지
+        fifth = DiaryModel.objects.get(author=self.user, posted_date__gte=timezone.make_aware(datetime(2025, 10, 5)))
+        self.assertEqual((fifth.note, fifth.style, fifth.productivity), ('두 번째 저장', 'real', 5))
+        resp = self.client.get(reverse('diary_by_date_api', args=['2025-10-02']))
+        self.assertEqual(resp.json()['data']['note'], '덮어씀')
+
+    def test_bad_line_stops_after_applied_batches(self):
+        import os
+        import tempfile
+        from django.core.management import call_command
+        from django.core.management.base import CommandError
+
+        path = os.path.join(tempfile.mkdtemp(), 'in.ndjson')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'date': '2025-11-01', 'note': '좋은 줄', 'content': 'x'}) + '\n')
+            f.write('{"note": "날짜 없음", "content": "y"}\n')
+        with self.assertRaisesMessage(CommandError, '2번째 줄'):
+            call_command('import_diaries', path, user=self.other.email, batch_size=1)
+        self.assertTrue(DiaryModel.objects.filter(author=self.other, note='좋은 줄').exists())
+
+    def test_zip_export_and_import_restores_images(self):
+        import tempfile
+        import zipfile
+        from PIL import Image
+        from django.core.files.base import ContentFile
+        from django.core.files.storage import FileSystemStorage
+        from . import archive, blobs
+        from .Image_making.compose import to_png_bytes
+        from .models import CartoonBlob
+
+        payload = to_png_bytes(Image.new('RGB', (64, 64), 'white'))
+        digest = hashlib.sha256(payload).hexdigest()
+        source = FileSystemStorage(location=tempfile.mkdtemp(), base_url='/media/cartoon/')
+        blob, _ = blobs.store(source, ContentFile(payload), digest, len(payload))
+        diary = DiaryModel.objects.get(author=self.user, note='10월 2일')
+        diary.image_url, diary.image_blob = blob.url, blob
+        diary.save()
+
+        data = b''.join(archive.iter_zip(self.user, storage=source, chunk_size=2))
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            self.assertEqual(zf.read('images/2025-10-02_%d.png' % diary.id), payload)
+            records = [json.loads(line) for line in zf.read('diaries.ndjson').decode('utf-8').splitlines()]
+        self.assertEqual([r['image_file'] for r in records], [None, 'images/2025-10-02_%d.png' % diary.id, None])
+
+        # 다른 배포(빈 스토리지/DB)로 옮긴 것처럼
+        DiaryModel.objects.filter(image_blob=blob).update(image_blob=None)
+        blob.delete()
+        target = FileSystemStorage(location=tempfile.mkdtemp(), base_url='/media/cartoon/')
+        result = archive.import_file(self.other, io.BytesIO(data), storage=target)
+        self.assertEqual(result['created'], 3)
+        restored = DiaryModel.objects.get(author=self.other, note='10월 2일')
+        self.assertEqual(restored.image_url, f'/media/cartoon/{digest}.png')
+        self.assertEqual(restored.image_blob.sha256, digest)
+        self.assertTrue(restored.thumbnail_url)
+        self.assertTrue(target.exists(f'{digest}.png'))
+
+
+class DailyUpsertTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='a@test.com', email='a@test.com', password='pw12345!')
+        self.client.force_login(self.user)
+
+    def submit(self, **data):
+        form = {'note': '산책', 'content': '공원', 'productivity': 5, 'selected_date': '2025-10-20', **data}
+        return self.client.post(reverse('entry'), form)
+
+    def test_resubmit_overwrites_same_day(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        self.submit(theme='Theme2', image_url='https://example.com/a.png')
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.submit(note='바다', productivity=8)
+        diary = DiaryModel.objects.get(author=self.user)
+        self.assertEqual(resp.context['new_diary_id'], diary.id)
+        self.assertEqual((diary.note, diary.productivity), ('바다', 8))
+        # 비어 있는 스타일/이미지는 기존 값 유지
+        self.assertEqual((diary.style, diary.image_url), ('ani', 'https://example.com/a.png'))
+        self.assertEqual(diary.diary_date.isoformat(), '2025-10-20')
+        writes = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('INSERT INTO "entry_diarymodel"')]
+        self.assertEqual(len(writes), 1)
+        self.assertIn('ON CONFLICT', writes[0])
+
+        self.submit(selected_date='2025-10-21')
+        self.assertEqual(DiaryModel.objects.filter(author=self.user).count(), 2)
+        self.assertEqual(self.client.get(reverse('diary_by_date_api', args=['2025-10-20'])).json()['data']['note'], '바다')
+
+    def test_constraint_and_save_keep_diary_date(self):
+        from django.db import IntegrityError, transaction
+
+        diary = make_diary(self.user, posted_date=timezone.make_aware(datetime(2025, 10, 20, 23, 30)))
+        self.assertEqual(diary.diary_date.isoformat(), '2025-10-20')  # Asia/Seoul 기준
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            make_diary(self.user, posted_date=timezone.make_aware(datetime(2025, 10, 20, 8, 0)))
+
+        diary.posted_date = timezone.make_aware(datetime(2025, 10, 22, 9, 0))
+        diary.save(update_fields=['posted_date'])
+        diary.refresh_from_db()
+        self.assertEqual(diary.diary_date.isoformat(), '2025-10-22')
+
+    def test_backfill_keeps_latest_of_legacy_duplicates(self):
+        import importlib
+        from django.apps import apps
+
+        migration = importlib.import_module('entry.migrations.0021_diarymodel_diary_date')
+        rows = DiaryModel.objects.bulk_create([
+            DiaryModel(author=self.user, note=str(hour), content='x', productivity=5,
+                       posted_date=timezone.make_aware(datetime(2025, 10, 20, hour, 0)))
+            for hour in (9, 21, 12)
+        ])
+        migration.fill_diary_date(apps, None)
+        dates = dict(DiaryModel.objects.filter(pk__in=[r.pk for r in rows]).values_list('note', 'diary_date'))
+        self.assertEqual(dates['21'].isoformat(), '2025-10-20')
+        self.assertEqual((dates['9'], dates['12']), (None, None))
+
+
+class DailyUpsertConcurrencyTests(TransactionTestCase):
+
+    def test_parallel_submits_create_one_diary(self):
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+        from django.db import connection, connections
+        from django.test import Client
+
+        user = User.objects.create_user(username='a@test.com', email='a@test.com', password='pw12345!')
+        workers = 8
+        barrier = threading.Barrier(workers)
+        sessions = []
+        for _ in range(workers):
+            client = Client()
+            client.force_login(user)
+            sessions.append(client)
+
+        def submit(i):
+            try:
+                barrier.wait()
+                resp = sessions[i].post(reverse('entry'), {
+                    'note': f'제출 {i}', 'content': '같은 날', 'productivity': 5, 'selected_date': '2025-10-20',
+                })
+                return resp.context.get('new_diary_id')
+            finally:
+                connections.close_all()
+
+        if connection.vendor == 'sqlite':
+            # 파일 DB(WAL)여야 쓰기끼리 busy timeout만큼 기다린다 (메모리 공유 캐시는 바로 'table is locked')
+            self.assertFalse(connection.is_in_memory_db())
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            ids = list(pool.map(submit, range(workers)))
+
+        diary = DiaryModel.objects.get(author=user)
+        # 모든 제출이 성공하고 같은 일기를 가리킨다
+        self.assertEqual(ids, [diary.id] * workers)
+        self.assertTrue(diary.note.startswith('제출 '))
+
+    def test_parallel_identical_blob_stores(self):
+        import tempfile
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+        from django.core.files.base import ContentFile
+        from django.core.files.storage import FileSystemStorage
+        from django.db import connections
+        from . import blobs
+        from .models import CartoonBlob
+
+        payload = b'same image' * 100
+        digest = hashlib.sha256(payload).hexdigest()
+        storage = FileSystemStorage(location=tempfile.mkdtemp(), base_url='/media/cartoon/')
+        blobs.store(storage, ContentFile(payload), digest, len(payload))
+        workers = 8
+        barrier = threading.Barrier(workers)
+
+        def store(_):
+            try:
+                barrier.wait()
+                blob, uploaded = blobs.store(storage, ContentFile(payload), digest, len(payload))
+                return blob.pk, uploaded
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(store, range(workers)))
+
+        blob = CartoonBlob.objects.get(sha256=digest)
+        # 이미 있는 blob의 사용 시각 갱신이 잠금 오류 없이 모두 성공
+        self.assertEqual(results, [(blob.pk, False)] * workers)
+
+    def test_enqueue_retries_on_lock(self):
+        from django.db import OperationalError
+
+        user = User.objects.create_user(username='b@test.com', email='b@test.com', password='pw12345!')
+        diary = make_diary(user)
+        real_create = GenerationJob.objects.create
+        calls = []
+
+        def locked_once(**kwargs):
+            calls.append(kwargs)
+            if len(calls) == 1:
+                raise OperationalError('database is locked')
+            return real_create(**kwargs)
+
+        with mock.patch.object(GenerationJob.objects, 'create', side_effect=locked_once):
+            job = enqueue_generation(diary, style='ani')
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(GenerationJob.objects.get(diary=diary).pk, job.pk)
+
+    def test_upsert_retries_on_lock(self):
+        from unittest import mock
+        from django.db import OperationalError
+        from entry import diaries
+
+        user = User.objects.create_user(username='b@test.com', email='b@test.com', password='pw12345!')
+        real = diaries._upsert
+        calls = []
+
+        def flaky(diary, update_fields):
+            calls.append(1)
+            if len(calls) == 1:
+                raise OperationalError('database is locked')
+            return real(diary, update_fields)
+
+        day = timezone.make_aware(datetime(2025, 10, 20))
+        with mock.patch.object(diaries, '_upsert', flaky):
+            saved = diaries.upsert_day_entry(user, day, '제목', '본문', 5)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(DiaryModel.objects.get(author=user).id, saved.id)
+
+        with mock.patch.object(diaries, '_upsert', side_effect=OperationalError('no such table: x')) as broken:
+            with self.assertRaises(OperationalError):
+                diaries.upsert_day_entry(user, day, '제목', '본문', 5)
+        self.assertEqual(broken.call_count, 1)
+
+
+class StructuredLoggingTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='a@test.com', email='a@test.com', password='pw12345!')
+        self.client.force_login(self.user)
+
+    def test_background_handler_writes_json_with_context(self):
+        import json as jsonlib
+        import logging
+        from entry.logs import BackgroundHandler, ContextFilter, request_id_var, user_id_var
+
+        stream = io.StringIO()
+        handler = BackgroundHandler(stream=stream)
+        handler.addFilter(ContextFilter())
+        logger = logging.getLogger('entry.tests.json')
+        logger.addHandler(handler)
+        logger.propagate = False
+        tokens = request_id_var.set('req-1'), user_id_var.set(7)
+        try:
+            logger.warning('hello %s', 'world', extra={'duration_ms': 1.5})
+            try:
+                raise ValueError('boom')
+            except ValueError:
+                logger.exception('failed')
+        finally:
+            request_id_var.reset(tokens[0])
+            user_id_var.reset(tokens[1])
+            logger.removeHandler(handler)
+            logger.propagate = True
+            handler.flush()
+            handler.close()
+
+        first, second = [jsonlib.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual(
+            (first['msg'], first['level'], first['request_id'], first['user_id'], first['duration_ms']),
+            ('hello world', 'WARNING', 'req-1', 7, 1.5),
+        )
+        self.assertIn('ValueError: boom', second['exc'])
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        import json as jsonlib
+        import logging
+        import threading
+        import time
+        from entry.logs import BackgroundHandler
+
+        release = threading.Event()
+
+        class BlockedStream(io.StringIO):
+            def write(self, text):
+                release.wait(5)
+                return super().write(text)
+
+        stream = BlockedStream()
+        handler = BackgroundHandler(stream=stream, queue_size=1)
+        logger = logging.getLogger('entry.tests.queue')
+        logger.addHandler(handler)
+        logger.propagate = False
+        try:
+            started = time.perf_counter()
+            for i in range(5):
+                logger.warning('line %d', i)
+            self.assertLess(time.perf_counter() - started, 1)
+            dropped = handler.dropped()
+            self.assertGreaterEqual(dropped, 3)
+            release.set()
+            handler.flush()
+            logger.warning('after')
+        finally:
+            release.set()
+            logger.removeHandler(handler)
+            logger.propagate = True
+            handler.flush()
+            handler.close()
+
+        last = jsonlib.loads(stream.getvalue().splitlines()[-1])
+        self.assertEqual((last['msg'], last['dropped']), ('after', dropped))
+
+    def test_sample_filter_keeps_whole_requests_and_warnings(self):
+        import logging
+        from entry.logs import SampleFilter
+
+        def record(level, request_id, **extra):
+            r = logging.LogRecord('entry.api', level, __file__, 1, 'm', None, None)
+            r.request_id = request_id
+            r.__dict__.update(extra)
+            return r
+
+        half = SampleFilter(rate=0.5)
+        kept = [half.filter(record(logging.INFO, f'req-{i}')) for i in range(400)]
+        self.assertTrue(150 < sum(kept) < 250)
+        self.assertEqual(kept, [half.filter(record(logging.INFO, f'req-{i}')) for i in range(400)])
+
+        none = SampleFilter(rate=0)
+        self.assertFalse(none.filter(record(logging.INFO, 'r')))
+        self.assertTrue(none.filter(record(logging.WARNING, 'r')))
+        access = SampleFilter(rate=0, views=['diary_by_date_api'])
+        self.assertFalse(access.filter(record(logging.INFO, 'r', view='diary_by_date_api')))
+        self.assertTrue(access.filter(record(logging.INFO, 'r', view='entry')))
+
+    def test_request_id_header_and_access_log(self):
+        with self.assertLogs('entry.request', 'INFO') as logs:
+            resp = self.client.get(reverse('entry'), HTTP_X_REQUEST_ID='edge-abc.1')
+        self.assertEqual(resp['X-Request-ID'], 'edge-abc.1')
+        access = logs.records[-1]
+        self.assertEqual(
+            (access.view, access.status, access.user_id, access.path),
+            ('entry', 200, self.user.id, reverse('entry')),
+        )
+        self.assertGreaterEqual(access.duration_ms, 0)
+
+        # 형식이 맞지 않는 값(로그 주입)은 버리고 새로 만든다
+        resp = self.client.get(reverse('entry'), HTTP_X_REQUEST_ID='bad\nid')
+        self.assertRegex(resp['X-Request-ID'], r'^[0-9a-f]{32}$')
+
+    def test_entry_logs_metadata_not_diary_text(self):
+        with self.assertLogs('entry', 'DEBUG') as logs:
+            self.client.post(reverse('entry'), {
+                'note': '비밀 제목', 'content': '비밀 본문', 'productivity': 5, 'selected_date': '2025-10-20',
+            })
+        saved = [r for r in logs.records if r.getMessage() == 'diary saved']
+        self.assertEqual(len(saved), 1)
+        self.assertEqual(saved[0].diary_id, DiaryModel.objects.get(author=self.user).id)
+        self.assertGreaterEqual(saved[0].duration_ms, 0)
+        for r in logs.records:
+            self.assertNotIn('비밀', repr(vars(r)))
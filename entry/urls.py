@@ -11,11 +11,22 @@ urlpatterns = [
    
     # API
     path('api/diary/dates/', views.diary_dates_api, name='diary_dates_api'),
+    path('api/diary/list/', views.diary_list_api, name='diary_list_api'),
+    path('api/diary/search/', views.diary_search_api, name='diary_search_api'),
+    path('api/diary/month/<int:year>-<int:month>/', views.diary_month_api, name='diary_month_api'),
+    path('api/diary/export/', views.diary_export_api, name='diary_export_api'),
     path('api/diary/<str:date>/', views.diary_by_date_api, name='diary_by_date_api'),
     path('api/diary/detail/<int:diary_id>/', views.get_diary_detail, name='get_diary_detail'),
+    path('api/diary/<int:diary_id>/versions/', views.diary_versions, name='diary_versions'),
+    path('api/diary/<int:diary_id>/versions/<int:version_id>/pin/', views.pin_version, name='pin_version'),
     
     path('productivity/', views.productivity, name='productivity'),
+    path('api/productivity/', views.productivity_api, name='productivity_api'),
     path('generate-image/<int:diary_id>/', views.generate_image, name='generate_image'),
+    path('generate-image/<int:diary_id>/panel/<int:panel>/', views.regenerate_panel, name='regenerate_panel'),
+    path('temp-image/<int:diary_id>/', views.temp_image, name='temp_image'),
+    path('api/generation/<int:job_id>/', views.generation_job_status, name='generation_job_status'),
+    path('api/generation/<int:job_id>/events/', views.generation_job_events, name='generation_job_events'),
     path('save-image/<int:diary_id>/', views.save_image, name='save_image'),
     path('download/<int:diary_id>/', views.download_image, name='download'),  # ← views.py에 없는 함수!
 
@@ -27,4 +38,6 @@ urlpatterns = [
     
     path('api/diary/dates/', views.diary_dates_api, name='diary_dates_api'),
     path('api/diary/<str:date>/', views.diary_by_date_api, name='diary_by_date_api'),
+
+    path('metrics', views.metrics_view, name='metrics'),
 ]
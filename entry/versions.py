@@ -0,0 +1,131 @@
+"""
+이미지 생성 이력 (CartoonVersion) 기록/조회/대표 지정.
+
+- 생성 시: record_generation() → 새 버전 (프롬프트는 문단 단위 PromptChunk로 중복 제거)
+- S3 저장 시: attach_saved_image() → 해당 버전에 이미지 키/URL/blob 기록
+- 대표 지정: pin_version() → 일기의 image_url/파생 이미지/프롬프트를 그 버전으로 되돌림
+"""
+
+import hashlib
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import Max
+
+from .models import CartoonBlob, CartoonVersion, DiaryModel, PromptChunk
+
+
+CHUNK_SEPARATOR = "\n\n"
+
+# 목록 API에 내려주는 필드 (프롬프트 본문/아웃라인 제외 → PromptChunk 조인 없음)
+LIST_FIELDS = (
+    'id', 'number', 'style', 'mode', 'panel', 'seed', 'image_key', 'image_url',
+    'thumbnail_url', 'preview_url', 'is_pinned', 'created_at',
+)
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def store_prompt(prompt: str) -> Tuple[str, List[str]]:
+    """프롬프트를 문단 단위로 저장 (이미 있는 문단은 건너뜀). 반환: (전체 digest, 문단 digest 목록)"""
+    chunks = (prompt or '').split(CHUNK_SEPARATOR)
+    digests = [_digest(chunk) for chunk in chunks]
+    PromptChunk.objects.bulk_create(
+        [PromptChunk(digest=d, text=c) for d, c in dict(zip(digests, chunks)).items()],
+        ignore_conflicts=True,
+    )
+    return _digest(prompt or ''), digests
+
+
+def load_prompt(version: CartoonVersion) -> str:
+    texts = dict(PromptChunk.objects.filter(digest__in=set(version.prompt_chunks)).values_list('digest', 'text'))
+    return CHUNK_SEPARATOR.join(texts.get(d, '') for d in version.prompt_chunks)
+
+
+def record_generation(
+    diary: DiaryModel,
+    prompt: str,
+    *,
+    style: Optional[str] = None,
+    mode: str = 'single',
+    panel: Optional[int] = None,
+    outline: Optional[List[Dict[str, Any]]] = None,
+    temp_image_url: Optional[str] = None,
+    seed: Optional[int] = None,
+) -> CartoonVersion:
+    prompt_digest, chunk_digests = store_prompt(prompt)
+    fields = dict(
+        style=style or diary.style, mode=mode, panel=panel, seed=seed, outline=outline,
+        prompt_digest=prompt_digest, prompt_chunks=chunk_digests, temp_image_url=temp_image_url,
+    )
+    # 동시에 두 작업이 같은 번호를 잡으면 한 번 더 시도
+    for attempt in range(2):
+        try:
+            with transaction.atomic():
+                last = CartoonVersion.objects.filter(diary=diary).aggregate(n=Max('number'))['n'] or 0
+                return CartoonVersion.objects.create(diary=diary, number=last + 1, **fields)
+        except IntegrityError:
+            if attempt:
+                raise
+    raise AssertionError('unreachable')
+
+
+def attach_saved_image(
+    diary: DiaryModel,
+    image_key: str,
+    image_url: str,
+    derived: Optional[Dict[str, Any]] = None,
+    blob: Optional[CartoonBlob] = None,
+) -> Optional[CartoonVersion]:
+    """S3에 저장된 이미지를 그 이미지를 만든 버전(temp_image_url 일치, 없으면 최신)에 기록하고 대표로 지정"""
+    versions = CartoonVersion.objects.filter(diary=diary).order_by('-number')
+    version = versions.filter(temp_image_url=diary.temp_image_url).first() or versions.first()
+    if version is None:
+        return None
+    derived = derived or {}
+    version.image_key = image_key
+    version.image_url = image_url
+    version.thumbnail_url = derived.get('thumbnail_url')
+    version.preview_url = derived.get('preview_url')
+    version.panel_urls = derived.get('panel_urls')
+    version.blob = blob
+    with transaction.atomic():
+        version.save(update_fields=['image_key', 'image_url', 'thumbnail_url', 'preview_url', 'panel_urls', 'blob'])
+        _set_pinned(version)
+    return version
+
+
+def _set_pinned(version: CartoonVersion) -> None:
+    CartoonVersion.objects.filter(diary_id=version.diary_id, is_pinned=True).exclude(pk=version.pk).update(is_pinned=False)
+    if not version.is_pinned:
+        version.is_pinned = True
+        version.save(update_fields=['is_pinned'])
+
+
+def pin_version(version: CartoonVersion) -> DiaryModel:
+    """저장된 버전을 일기의 대표 이미지로 지정. 저장 전 버전이면 ValueError"""
+    if not version.is_saved:
+        raise ValueError('저장된 버전만 대표로 지정할 수 있습니다.')
+    diary = version.diary
+    diary.image_url = version.image_url
+    diary.thumbnail_url = version.thumbnail_url
+    diary.preview_url = version.preview_url
+    diary.panel_urls = version.panel_urls
+    diary.image_blob_id = version.blob_id
+    diary.final_prompt = load_prompt(version)
+    diary.style = version.style or diary.style
+    with transaction.atomic():
+        _set_pinned(version)
+        diary.save(update_fields=[
+            'image_url', 'thumbnail_url', 'preview_url', 'panel_urls', 'image_blob', 'final_prompt', 'style', 'updated_at',
+        ])
+    return diary
+
+
+def list_versions(diary_id: int) -> List[Dict[str, Any]]:
+    """일기의 버전 목록 (최신순). (diary, number) 인덱스 한 번 조회"""
+    return list(
+        CartoonVersion.objects.filter(diary_id=diary_id).order_by('-number').values(*LIST_FIELDS)
+    )
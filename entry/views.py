@@ -1,16 +1,44 @@
-from datetime import datetime
+from datetime import datetime, timedelta
+import asyncio
 import json
-
-from django.http import HttpResponseRedirect, JsonResponse
+import logging
+import time
+
+import requests
+from asgiref.sync import sync_to_async
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseRedirect, JsonResponse, StreamingHttpResponse,
+)
 from django.shortcuts import render, get_object_or_404, redirect
 from django.views.decorators.http import require_http_methods
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
-from django.contrib.auth import login, logout
+from django.contrib.auth import authenticate, login, logout
 from django.contrib import messages
-
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.urls import reverse
+from django.utils.formats import date_format
+
+from . import accounts, analytics, archive, diary_cache, metrics, search, versions
+from .dates import day_filter, local_day, month_range, parse_day
+from .diaries import upsert_day_entry
 from .forms import AddForm
-from .models import DiaryModel
+from .Image_making.styles import DEFAULT_STYLE, resolve_style
+from .listing import InvalidCursor, diary_page
+from .models import CartoonVersion, DiaryModel, GenerationJob
+
+
+logger = logging.getLogger(__name__)
+# 자주 호출되는 조회 API (settings.LOG_API_SAMPLE_RATE로 표본 추출)
+api_logger = logging.getLogger('entry.api')
+
+# 차트 한 번에 내려주는 최대 구간 (일)
+PRODUCTIVITY_MAX_DAYS = {
+    analytics.DAY: 731,
+    analytics.WEEK: 366 * 5,
+    analytics.MONTH: 366 * 30,
+}
 
 
 @login_required
@@ -18,75 +46,40 @@ def entry(request):
     form = AddForm(request.POST or None)
 
     if request.method == 'POST':
-        print(f"[ENTRY] POST 요청 받음")
-        print(f"[ENTRY] POST 데이터: {request.POST}")
-
         if form.is_valid():
             try:
                 note = request.POST['note']
                 content = request.POST['content']
                 selected_date = request.POST.get('selected_date', None)
 
-                print(f"[ENTRY] 제목: {note}")
-                print(f"[ENTRY] 내용 길이: {len(content)}")
-                print(f"[ENTRY] 선택된 날짜: {selected_date}")
-
                 if selected_date:
-                    # 날짜 문자열을 datetime으로 변환
-                    posted_date = datetime.strptime(selected_date, '%Y-%m-%d')
+                    # 날짜 문자열을 사용자 타임존 기준 datetime으로 변환
+                    posted_date = timezone.make_aware(datetime.strptime(selected_date, '%Y-%m-%d'))
                 else:
-                    # 날짜 선택 안 했으면 오늘
-                    posted_date = datetime.now()
+                    # 날짜 선택 안 했으면 지금
+                    posted_date = timezone.now()
 
                 productivity = int(request.POST.get('productivity', 5))
                 # 사용자가 선택한 테마(스타일)
                 raw_theme = (request.POST.get('theme') or '').strip()
-                theme_map = {
-                    'Theme1': 'simple',
-                    'Theme2': 'ani',
-                    'Theme3': 'real',
-                    'simple': 'simple',
-                    'ani': 'ani',
-                    'real': 'real',
-                }
-                selected_style = theme_map.get(raw_theme) if raw_theme else None
+                # 테마 값(Theme1~3) 또는 스타일 이름 → 등록된 스타일 (entry/Image_making/styles.py)
+                selected_style = resolve_style(raw_theme)
 
                 image_url = request.POST.get('image_url', '').strip()
 
-                # ✅ 같은 날짜의 일기가 있는지 확인
-                today_date = posted_date.date()
-                existing_diary = DiaryModel.objects.filter(
-                    author=request.user,
-                    posted_date__date=today_date
-                ).first()
-
-                if existing_diary:
-                    # 기존 일기 수정
-                    print(f"[ENTRY] 기존 일기 수정 (ID: {existing_diary.id})")
-                    existing_diary.note = note
-                    existing_diary.content = content
-                    existing_diary.productivity = productivity
-                    if selected_style:
-                        existing_diary.style = selected_style
-                    if image_url:
-                        existing_diary.image_url = image_url
-                    existing_diary.save()
-                    todays_diary = existing_diary
-                else:
-                    # 새 일기 생성
-                    print(f"[ENTRY] 새 일기 생성")
-                    todays_diary = DiaryModel()
-                    todays_diary.author = request.user
-                    todays_diary.note = note
-                    todays_diary.posted_date = posted_date
-                    todays_diary.content = content
-                    todays_diary.productivity = productivity
-                    if selected_style:
-                        todays_diary.style = selected_style
-                    if image_url:
-                        todays_diary.image_url = image_url
-                    todays_diary.save()
-                    print(f"[ENTRY] ✅ 일기 생성 완료 (ID: {todays_diary.id})")
+                # ✅ 같은 날짜에 일기가 있으면 덮어쓰고 없으면 생성 ((author, diary_date) 고유 제약 + ON CONFLICT 한 번)
+                started = time.perf_counter()
+                todays_diary = upsert_day_entry(
+                    request.user, posted_date, note, content, productivity,
+                    style=selected_style, image_url=image_url,
+                )
+                # 제목/본문은 남기지 않음 (길이만)
+                logger.info('diary saved', extra={
+                    'diary_id': todays_diary.id,
+                    'diary_date': todays_diary.diary_date,
+                    'content_length': len(content),
+                    'duration_ms': round((time.perf_counter() - started) * 1000, 2),
+                })
 
                 form = AddForm()
                 return render(
@@ -101,13 +94,10 @@ def entry(request):
                     }
                 )
             except Exception as e:
-                print(f"[ENTRY] ❌ 오류 발생: {str(e)}")
-                import traceback
-                traceback.print_exc()
+                logger.exception('diary save failed')
                 messages.error(request, f'일기 저장 중 오류가 발생했습니다: {str(e)}')
         else:
-            print(f"[ENTRY] ❌ 폼 유효성 검사 실패")
-            print(f"[ENTRY] 폼 에러: {form.errors}")
+            logger.info('entry form invalid', extra={'fields': sorted(form.errors)})
             messages.error(request, f'입력값을 확인해주세요: {form.errors}')
 
     return render(
@@ -124,9 +114,9 @@ def entry(request):
 
 @login_required
 def show(request):
-    # ✅ 자신의 일기만 조회
-    diaries = DiaryModel.objects.filter(author=request.user).order_by('posted_date')
-    icon = True if len(diaries) == 0 else None
+    # ✅ 자신의 일기만, 첫 페이지만 렌더 (이후는 diary_list_api로 무한 스크롤)
+    diaries, next_cursor = diary_page(request.user)
+    icon = True if not diaries else None
 
     return render(
         request,
@@ -135,7 +125,8 @@ def show(request):
             'show_highlight': True,
             'title': 'All Entries',
             'subtitle': 'It\'s all you\'ve written.',
-            'diaries': reversed(diaries),
+            'diaries': diaries,
+            'next_cursor': next_cursor,
             'icon': icon
         }
     )
@@ -150,20 +141,23 @@ def detail_view(request, date):
     """해당 날짜의 모든 일기 조회"""
     try:
         # 날짜 형식으로 파싱
-        target_date = datetime.strptime(date, '%Y-%m-%d').date()
+        target_date = parse_day(date)
         
-        # 해당 날짜의 모든 일기 가져오기
-        diaries = DiaryModel.objects.filter(
-            author=request.user,
-            posted_date__date=target_date
-        ).order_by('posted_date')  # 작성 순서대로
+        # 해당 날짜의 모든 일기 가져오기 ((author, posted_date) 인덱스 범위 조회, 사용자별 캐시)
+        diaries = diary_cache.get_or_build(
+            request.user.id, 'day', target_date.isoformat(),
+            lambda: list(DiaryModel.objects.filter(
+                author=request.user,
+                **day_filter(target_date)
+            ).order_by('posted_date')),  # 작성 순서대로
+        )
         
-        if not diaries.exists():
+        if not diaries:
             messages.warning(request, '해당 날짜에 작성된 일기가 없습니다.')
             return redirect('entry')  # ✅ 수정!
         
         # 첫 번째 일기를 기본 선택
-        selected_diary = diaries.first()
+        selected_diary = diaries[0]
         
         return render(request, 'entry/detail.html', {
             'date': date,
@@ -178,21 +172,27 @@ def detail_view(request, date):
 
 @login_required
 def get_diary_detail(request, diary_id):
-    """AJAX로 특정 일기 상세 정보 가져오기"""
-    try:
+    """AJAX로 특정 일기 상세 정보 가져오기 (사용자별 캐시, ETag → 304)"""
+    def build():
         diary = DiaryModel.objects.get(id=diary_id, author=request.user)  # ✅ 수정!
-        return JsonResponse({
+        return {
             'status': 'ok',
             'data': {
                 'id': diary.id,
                 'note': diary.note,
                 'content': diary.content,
                 'image_url': diary.image_url,
+                'thumbnail_url': diary.display_thumbnail_url,
+                'preview_url': diary.display_preview_url,
+                'panel_urls': diary.panel_urls or [],
                 'posted_date': diary.posted_date.strftime('%Y-%m-%d'),
                 'date_created': diary.posted_date.strftime('%Y-%m-%d %H:%M:%S')
             }
-        })
-    except DiaryModel.DoesNotExist:  # ✅ 수정!
+        }, diary.updated_at
+
+    try:
+        return diary_cache.cached_json(request, 'id', diary_id, build)
+    except DiaryModel.DoesNotExist:  # ✅ 수정! (없는 일기는 캐시하지 않음)
         return JsonResponse({
             'status': 'error',
             'message': '일기를 찾을 수 없습니다.'
@@ -213,35 +213,76 @@ def detail(request, diary_id):
         }
     )
     
+@login_required
 def download_image(request, diary_id):
-    """이미지를 로컬 PC에 PNG로 다운로드"""
+    """
+    이미지를 로컬 PC에 PNG로 다운로드
+    - redirect: S3 서명 URL로 리다이렉트 (Content-Disposition 포함, 앱 서버는 데이터 전송에 관여 안 함)
+    - stream:   청크 단위 프록시 (S3 외 URL이거나 서명 URL 생성 실패 시 폴백)
+    """
+    from django.conf import settings
+    from django.utils.http import content_disposition_header
+    from .Image_making.transfer import open_url_stream
+
     try:
         # ✅ 자신의 일기만 조회
         diary = get_object_or_404(DiaryModel, pk=diary_id, author=request.user)
-        
+
         if not diary.image_url:
             return HttpResponse('이미지가 없습니다.', status=404)
-        
-        # S3에서 이미지 가져오기
-        response = requests.get(diary.image_url)
-        
-        if response.status_code == 200:
-            # PNG 파일로 다운로드
-            http_response = HttpResponse(response.content, content_type='image/png')
-            http_response['Content-Disposition'] = f'attachment; filename="네컷일기_{diary.posted_date.strftime("%Y%m%d")}.png"'
-            return http_response
-        else:
-            return HttpResponse('이미지를 가져올 수 없습니다.', status=500)
-            
+
+        file_name = f'네컷일기_{diary.posted_date.strftime("%Y%m%d")}.png'
+        disposition = content_disposition_header(as_attachment=True, filename=file_name)
+
+        if getattr(settings, 'CARTOON_DOWNLOAD_MODE', 'stream') == 'redirect':
+            presigned_url = _presigned_download_url(diary.image_url, disposition)
+            if presigned_url:
+                return HttpResponseRedirect(presigned_url)
+
+        # S3에서 이미지 스트리밍 (전체를 메모리에 올리지 않음)
+        upstream, _ = open_url_stream(diary.image_url)
+
+        def body():
+            try:
+                yield from upstream.iter_content(chunk_size=64 * 1024)
+            finally:
+                upstream.close()
+
+        http_response = StreamingHttpResponse(body(), content_type='image/png')
+        if upstream.headers.get('Content-Length'):
+            http_response['Content-Length'] = upstream.headers['Content-Length']
+        http_response['Content-Disposition'] = disposition
+        return http_response
+
+    except Http404:
+        raise
+    except requests.RequestException as e:
+        logger.warning('image download failed', extra={'diary_id': diary_id, 'error': str(e)})
+        return HttpResponse('이미지를 가져올 수 없습니다.', status=502)
     except Exception as e:
-        print(f"[DOWNLOAD] ❌ 에러: {str(e)}")
+        logger.exception('image download failed', extra={'diary_id': diary_id})
         return HttpResponse(f'다운로드 실패: {str(e)}', status=500)
 
+
+def _presigned_download_url(image_url, disposition):
+    """image_url이 CartoonStorage 객체면 서명 URL, 아니면 None"""
+    try:
+        from diary.storages import cartoon_storage
+
+        storage = cartoon_storage()
+        name = storage.name_from_url(image_url)
+        if name is None:
+            return None
+        return storage.presigned_download_url(name, content_disposition=disposition)
+    except Exception:
+        logger.warning('presigned download url failed, falling back to streaming', exc_info=True)
+        return None
+
+
 @login_required
 def productivity(request):
-    # ✅ 자신의 일기만 조회
-    data = DiaryModel.objects.filter(author=request.user).order_by('posted_date')[:10]
-    icon = True if len(data) == 0 else None
+    # 데이터는 차트가 productivity_api로 구간별로 가져간다 (집계 테이블만 조회)
+    icon = True if not analytics.has_data(request.user.id) else None
 
     return render(
         request,
@@ -249,41 +290,239 @@ def productivity(request):
         {
             'title': 'Productivity Chart',
             'subtitle': 'Keep the line heading up always.',
-            'data': data,
             'icon': icon
         }
     )
 
 
+@login_required
+def productivity_api(request):
+    """
+    생산성 집계 구간 조회 (일기 테이블은 읽지 않음)
+    ?period=day|week|month&start=YYYY-MM-DD&end=YYYY-MM-DD (기본: 최근 90일, day)
+    """
+    period = request.GET.get('period', analytics.DAY)
+    if period not in analytics.PERIODS:
+        return JsonResponse({'status': 'error', 'message': '잘못된 period입니다.'}, status=400)
+    try:
+        end = parse_day(request.GET['end']) if request.GET.get('end') else local_day()
+        start = parse_day(request.GET['start']) if request.GET.get('start') else end - timedelta(days=89)
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': '날짜 형식은 YYYY-MM-DD 입니다.'}, status=400)
+    if start > end or (end - start).days > PRODUCTIVITY_MAX_DAYS[period]:
+        return JsonResponse({'status': 'error', 'message': '조회 구간이 잘못되었거나 너무 깁니다.'}, status=400)
+
+    return JsonResponse({
+        'status': 'ok',
+        'period': period,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'summary': analytics.range_summary(request.user.id, start, end),
+        'points': analytics.series(request.user.id, period, start, end),
+    })
+
+
 @login_required
 def generate_image(request, diary_id):
+    """이미지 생성 작업을 큐에 등록하고 job id를 반환 (생성은 워커가 처리)"""
     if request.method != 'POST':
         return JsonResponse({'error': 'POST required'}, status=405)
 
     try:
-        from .Image_making.pipeline import generate_and_attach_image_to_diary
-        from pathlib import Path
+        from .jobs import GenerationBusy, enqueue_generation, job_payload
 
         # ✅ 자신의 일기만 처리
         diary = get_object_or_404(DiaryModel, pk=diary_id, author=request.user)
         # 스타일 결정: 요청 파라미터 > 일기 저장된 스타일 > 기본(simple)
-        raw_style = (request.POST.get('style') or '').strip().lower()
-        style = raw_style or (diary.style or 'simple')
-        base_dir = Path(__file__).resolve().parents[1]
-        style_map = {
-            'simple': base_dir / 'sample_prompt_simple.txt',
-            'ani': base_dir / 'sample_prompt_ani.txt',
-            'real': base_dir / 'sample_prompt_real.txt',
-        }
-        style_path = style_map.get(style, base_dir / 'sample_prompt_simple.txt')
+        raw_style = (request.POST.get('style') or '').strip()
+        style = resolve_style(raw_style) or diary.style or DEFAULT_STYLE
 
-        generate_and_attach_image_to_diary(diary_id, style_path=style_path, language='en')
-        diary.refresh_from_db()
-        return JsonResponse({'status': 'ok', 'temp_image_url': diary.temp_image_url})
+        job = enqueue_generation(diary, style=style, language='en')
+        return JsonResponse({'status': 'ok', 'job_id': job.id, 'job': job_payload(job)}, status=202)
+    except GenerationBusy as e:
+        return _generation_busy(e)
     except Exception as e:
         return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
 
 
+@login_required
+def regenerate_panel(request, diary_id, panel):
+    """패널 모드: 마음에 들지 않는 패널 하나만 재생성 작업으로 등록"""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST required'}, status=405)
+    if panel not in (1, 2, 3, 4):
+        return JsonResponse({'status': 'error', 'message': 'panel은 1~4 사이여야 합니다.'}, status=400)
+
+    from .jobs import GenerationBusy, enqueue_generation, job_payload
+
+    diary = get_object_or_404(DiaryModel, pk=diary_id, author=request.user)
+    raw_style = (request.POST.get('style') or '').strip()
+    try:
+        job = enqueue_generation(diary, style=resolve_style(raw_style) or diary.style, language='en', panel=panel)
+    except GenerationBusy as e:
+        return _generation_busy(e)
+    return JsonResponse({'status': 'ok', 'job_id': job.id, 'job': job_payload(job)}, status=202)
+
+
+def _generation_busy(error):
+    """같은 일기에 다른 조건의 작업이 진행 중 → 409 (진행 중인 작업을 같이 돌려줘 화면이 이어서 표시)"""
+    from .jobs import job_payload
+
+    return JsonResponse({
+        'status': 'error',
+        'message': str(error),
+        'job_id': error.active.id,
+        'job': job_payload(error.active),
+    }, status=409)
+
+
+@login_required
+def diary_versions(request, diary_id):
+    """일기의 이미지 생성 이력 (최신순)"""
+    diary = get_object_or_404(DiaryModel.objects.only('id'), pk=diary_id, author=request.user)
+    items = versions.list_versions(diary.id)
+    for item in items:
+        item['created_at'] = item['created_at'].isoformat()
+    return JsonResponse({'status': 'ok', 'versions': items})
+
+
+@login_required
+@require_http_methods(['POST'])
+def pin_version(request, diary_id, version_id):
+    """저장된 버전을 일기의 대표 이미지로 지정"""
+    version = get_object_or_404(
+        CartoonVersion.objects.select_related('diary'),
+        pk=version_id, diary_id=diary_id, diary__author=request.user,
+    )
+    try:
+        diary = versions.pin_version(version)
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=409)
+    return JsonResponse({
+        'status': 'ok',
+        'version_id': version.id,
+        'image_url': diary.image_url,
+        'preview_url': diary.preview_url,
+        'thumbnail_url': diary.thumbnail_url,
+    })
+
+
+@login_required
+def temp_image(request, diary_id):
+    """패널 모드 합성본(로컬 임시 이미지) 미리보기"""
+    from .Image_making.pipeline import composite_path
+
+    get_object_or_404(DiaryModel, pk=diary_id, author=request.user)
+    path = composite_path(diary_id)
+    if not path.exists():
+        raise Http404('임시 이미지가 없습니다.')
+    return FileResponse(open(path, 'rb'), content_type='image/png')
+
+
+@login_required
+def generation_job_status(request, job_id):
+    """생성 작업 상태 조회 (add.html 진행바 폴링용)"""
+    from .jobs import job_payload
+
+    job = get_object_or_404(GenerationJob, pk=job_id, author=request.user)
+    return JsonResponse({'status': 'ok', 'job': job_payload(job)})
+
+
+def _session_user_id(request):
+    user = request.user
+    return user.pk if user.is_authenticated else None
+
+
+def _sse(event: str, data: dict, event_id=None) -> str:
+    lines = [f'id: {event_id}'] if event_id is not None else []
+    lines += [f'event: {event}', 'data: ' + json.dumps(data, ensure_ascii=False)]
+    return '\n'.join(lines) + '\n\n'
+
+
+async def _job_event_stream(job_id: int, start: int):
+    """
+    작업 이벤트를 SSE로 흘려보낸다. 이벤트 id = events 목록의 인덱스
+    (연결이 끊기면 브라우저가 Last-Event-ID로 이어서 받는다).
+    작업이 끝나면 done 이벤트 후 종료, 오래 열린 연결은 GENERATION_SSE_MAX_SECONDS 후 닫는다.
+    """
+    from django.conf import settings
+
+    from .jobs import job_progress
+
+    interval = getattr(settings, 'GENERATION_SSE_POLL_INTERVAL', 0.5)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + getattr(settings, 'GENERATION_SSE_MAX_SECONDS', 55)
+    last_write = loop.time()
+    sent = start
+
+    yield 'retry: 2000\n\n'
+    while True:
+        job = await GenerationJob.objects.filter(pk=job_id).only(
+            'id', 'status', 'events', 'temp_image_url', 'error',
+        ).afirst()
+        if job is None:
+            break
+        events = job.events or []
+        for index in range(sent, len(events)):
+            yield _sse('progress', events[index], event_id=index)
+            last_write = loop.time()
+        sent = max(sent, len(events))
+
+        if job.is_finished:
+            yield _sse('done', {
+                'job_status': job.status,
+                'progress': job_progress(job),
+                'temp_image_url': job.temp_image_url,
+                'error': job.error,
+            })
+            break
+        if loop.time() >= deadline:
+            break
+        if loop.time() - last_write >= 15:
+            # 프록시 유휴 타임아웃 방지
+            yield ': keep-alive\n\n'
+            last_write = loop.time()
+        await asyncio.sleep(interval)
+
+
+async def generation_job_events(request, job_id):
+    """
+    생성 작업 진행 이벤트 SSE 스트림 (async 뷰: ASGI에서 연결마다 워커를 점유하지 않음)
+    event: progress  → {'stage', 'at', 'ts', 'progress', ...}
+    event: done      → {'job_status', 'temp_image_url', 'error'}
+    """
+    # login_required는 async 뷰를 지원하지 않으므로(4.2) 세션 조회만 동기로
+    user_id = await sync_to_async(_session_user_id)(request)
+    if user_id is None:
+        return JsonResponse({'status': 'error', 'message': '로그인이 필요합니다.'}, status=401)
+    if not await GenerationJob.objects.filter(pk=job_id, author_id=user_id).aexists():
+        raise Http404
+
+    try:
+        start = int(request.headers.get('Last-Event-ID', -1)) + 1
+    except ValueError:
+        start = 0
+    response = StreamingHttpResponse(_job_event_stream(job_id, max(start, 0)), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # nginx 버퍼링 끄기 (이벤트가 바로 전달되도록)
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def metrics_view(request):
+    """Prometheus 수집용 히스토그램 (METRICS_TOKEN 또는 스태프 로그인)"""
+    from django.conf import settings
+    from django.utils.crypto import constant_time_compare
+
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    supplied = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+    if not ((token and constant_time_compare(supplied, token)) or request.user.is_staff):
+        return HttpResponse(status=403)
+    # 이 프로세스에 쌓인 관측값까지 반영한 뒤 내보낸다
+    metrics.flush_pending()
+    return HttpResponse(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+
 @login_required
 def save_image(request, diary_id):
     if request.method != 'POST':
@@ -298,6 +537,11 @@ def save_image(request, diary_id):
         s3_url = save_temp_image_to_s3(diary_id)
 
         if s3_url:
+            from .jobs import record_event
+
+            job = diary.generation_jobs.order_by('-id').first()
+            if job is not None:
+                record_event(job, 'uploaded', image_url=s3_url)
             return JsonResponse({'status': 'ok', 'image_url': s3_url})
         else:
             return JsonResponse({'status': 'error', 'message': 'S3 upload failed'}, status=500)
@@ -309,17 +553,15 @@ def login_view(request):
     if request.method == 'POST':
         email_from_form = request.POST.get('username')
         password_from_form = request.POST.get('password')
-        
-        try:
-            user_obj = User.objects.get(email=email_from_form)
-            
-            if user_obj.check_password(password_from_form):
-                login(request, user_obj)
-                return redirect('entry')
-            else:
-                return render(request, 'entry/login.html', {'error': '비밀번호를 잘못 입력했습니다.'})
-        except User.DoesNotExist:
-            return render(request, 'entry/login.html', {'error': '존재하지 않는 아이디(이메일)입니다.'})
+
+        # EmailBackend: LOWER(email) 인덱스 조회 + 비밀번호 확인
+        user_obj = authenticate(request, email=email_from_form, password=password_from_form)
+        if user_obj is not None:
+            login(request, user_obj)
+            return redirect('entry')
+        if accounts.email_exists(email_from_form):
+            return render(request, 'entry/login.html', {'error': '비밀번호를 잘못 입력했습니다.'})
+        return render(request, 'entry/login.html', {'error': '존재하지 않는 아이디(이메일)입니다.'})
     else:
         return render(request, 'entry/login.html')
 
@@ -335,37 +577,38 @@ def signup(request):
         email = request.POST.get('email', '').strip()
         password = request.POST.get('password', '').strip()
         
-        print(f"[SIGNUP] 닉네임: {nickname}")
-        print(f"[SIGNUP] 이메일: {email}")
-        
         if not email or not password:
             messages.error(request, '이메일과 비밀번호를 입력해주세요.')
             return render(request, 'entry/signup.html')
         
         try:
-            if User.objects.filter(email=email).exists():
+            if accounts.email_exists(email):
+                messages.error(request, '이미 사용 중인 이메일입니다.')
+                return render(request, 'entry/signup.html')
+
+            try:
+                with transaction.atomic():
+                    user = User.objects.create_user(
+                        username=email,
+                        email=email,
+                        password=password
+                    )
+            except IntegrityError:
+                # 같은 이메일로 동시에 가입 (LOWER(email) 고유 인덱스 / username 중복)
                 messages.error(request, '이미 사용 중인 이메일입니다.')
                 return render(request, 'entry/signup.html')
-            
-            user = User.objects.create_user(
-                username=email,
-                email=email,
-                password=password
-            )
             
             if nickname:
                 user.first_name = nickname
                 user.save()
             
-            print(f"[SIGNUP] ✅ 회원가입 성공! User ID: {user.id}")
+            logger.info('signup', extra={'new_user_id': user.id})
             
             messages.success(request, '회원가입이 완료되었습니다!')
             return redirect('login')
             
         except Exception as e:
-            print(f"[SIGNUP] ❌ 에러: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception('signup failed')
             messages.error(request, f'회원가입 중 오류가 발생했습니다: {str(e)}')
             return render(request, 'entry/signup.html')
     
@@ -403,44 +646,167 @@ def diary_dates_api(request):
         }, status=500)
 
 
+@login_required
+def diary_list_api(request):
+    """목록 다음 페이지 (키셋 커서). ?cursor=<next_cursor>"""
+    try:
+        diaries, next_cursor = diary_page(request.user, request.GET.get('cursor') or None)
+    except InvalidCursor:
+        return JsonResponse({'status': 'error', 'message': '잘못된 커서입니다.'}, status=400)
+
+    items = [
+        {
+            'id': diary.id,
+            'note': diary.note,
+            'posted_date': date_format(timezone.localtime(diary.posted_date), 'DATETIME_FORMAT'),
+            'summary': diary.summary(),
+            'thumbnail_url': diary.display_thumbnail_url if diary.image_url else None,
+            'detail_url': reverse('detail', args=[diary.id]),
+        }
+        for diary in diaries
+    ]
+    return JsonResponse({'status': 'ok', 'items': items, 'next_cursor': next_cursor})
+
+
+@login_required
+def diary_search_api(request):
+    """
+    제목/본문 전문 검색 (관련도순). ?q=검색어&page=1
+    note/snippet 은 HTML 이스케이프 후 일치 부분만 <mark>로 감싼 문자열
+    """
+    query = (request.GET.get('q') or '').strip()
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': '잘못된 페이지입니다.'}, status=400)
+    if not query:
+        return JsonResponse({'status': 'error', 'message': '검색어를 입력하세요.'}, status=400)
+
+    rows, has_next = search.search(request.user.id, query, page=page)
+    items = [
+        {
+            'id': row['id'],
+            'note': row['note'],
+            'snippet': row['snippet'],
+            'rank': row['rank'],
+            'date': local_day(row['posted_date']).isoformat(),
+            'detail_url': reverse('detail', args=[row['id']]),
+        }
+        for row in rows
+    ]
+    return JsonResponse({
+        'status': 'ok',
+        'query': query,
+        'page': page,
+        'next_page': page + 1 if has_next else None,
+        'items': items,
+    })
+
+
+@login_required
+def diary_export_api(request):
+    """
+    내 일기 전체 내려받기 (스트리밍, 기록 수와 관계없이 메모리 일정)
+    ?format=ndjson (기본, 한 줄에 일기 하나) / zip (만화 PNG + diaries.ndjson)
+    """
+    from django.utils.http import content_disposition_header
+
+    fmt = request.GET.get('format', 'ndjson')
+    if fmt not in ('ndjson', 'zip'):
+        return JsonResponse({'status': 'error', 'message': '지원하지 않는 형식입니다.'}, status=400)
+
+    if fmt == 'zip':
+        response = StreamingHttpResponse(archive.iter_zip(request.user), content_type='application/zip')
+    else:
+        response = StreamingHttpResponse(archive.iter_ndjson(request.user), content_type='application/x-ndjson; charset=utf-8')
+    file_name = f'네컷일기_{local_day().strftime("%Y%m%d")}.{fmt}'
+    response['Content-Disposition'] = content_disposition_header(as_attachment=True, filename=file_name)
+    response['Cache-Control'] = 'private, no-store'
+    return response
+
+
+@login_required
+def diary_month_api(request, year, month):
+    """
+    한 달치 캘린더 데이터를 한 번의 쿼리로 반환 (날짜별 id/제목/생산성/썸네일)
+    ETag/Last-Modified 지원 → 변경 없으면 304
+    """
+    if not 1 <= month <= 12:
+        return JsonResponse({'status': 'error', 'message': '잘못된 월입니다.'}, status=400)
+
+    tz = timezone.get_current_timezone()
+    start, end = month_range(year, month, tz)
+
+    # ✅ 자신의 일기만, 해당 월 범위만 조회
+    rows = DiaryModel.objects.filter(
+        author=request.user,
+        posted_date__gte=start,
+        posted_date__lt=end,
+    ).order_by('posted_date', 'id').values(
+        'id', 'note', 'productivity', 'posted_date', 'image_url', 'thumbnail_url', 'preview_url', 'updated_at'
+    )
+
+    days = {}
+    last_modified = None
+    for row in rows:
+        # 같은 날 여러 개면 가장 최근 일기 (diary_by_date_api와 동일)
+        day = timezone.localtime(row['posted_date'], tz).date().isoformat()
+        days[day] = {
+            'id': row['id'],
+            'note': row['note'],
+            'productivity': row['productivity'],
+            'thumbnail_url': row['thumbnail_url'] or row['preview_url'] or row['image_url'],
+        }
+        if row['updated_at'] and (last_modified is None or row['updated_at'] > last_modified):
+            last_modified = row['updated_at']
+
+    payload = {'status': 'ok', 'month': f'{year:04d}-{month:02d}', 'days': days}
+    last_modified_ts = int(last_modified.timestamp()) if last_modified else None
+    # 브라우저가 매번 재검증하도록 (변경 없으면 304)
+    return diary_cache.conditional_json(request, payload, diary_cache.json_etag(payload), last_modified_ts)
+
+
+def _diary_by_date_payload(user, target_date):
+    # ✅ 자신의 일기만 조회 (날짜는 반열린 구간으로)
+    diary = DiaryModel.objects.filter(
+        author=user,
+        **day_filter(target_date)
+    ).order_by('-posted_date').first()
+
+    # 캐시에 없을 때만 실행됨
+    api_logger.info('diary by date built', extra={'day': target_date, 'diary_id': diary.id if diary else None})
+    if diary:
+        return {
+            'status': 'ok',
+            'data': {
+                'id': diary.id,
+                'note': diary.note,
+                'content': diary.content,
+                'productivity': diary.productivity,
+                'image_url': diary.image_url if diary.image_url else None,
+                'thumbnail_url': diary.display_thumbnail_url,
+                'preview_url': diary.display_preview_url,
+                'panel_urls': diary.panel_urls or [],
+                'date': diary.posted_date.strftime('%Y-%m-%d')
+            }
+        }, diary.updated_at
+    return {
+        'status': 'empty',
+        'message': '해당 날짜의 일기가 없습니다.'
+    }, None
+
+
 @login_required
 def diary_by_date_api(request, date):
-    """특정 날짜의 일기 데이터를 반환"""
+    """특정 날짜의 일기 데이터를 반환 (사용자별 캐시, 빈 날짜도 캐시, ETag → 304)"""
     try:
-        target_date = datetime.strptime(date, '%Y-%m-%d').date()
-        
-        # ✅ 자신의 일기만 조회
-        diary = DiaryModel.objects.filter(
-            author=request.user,
-            posted_date__date=target_date
-        ).order_by('-posted_date').first()
-        
-        if diary:
-            print(f"[API] ✅ 일기 발견")
-            print(f"[API] ID: {diary.id}")
-            print(f"[API] 작성자: {diary.author.username}")
-            print(f"[API] 제목: {diary.note}")
-            print(f"[API] S3 이미지 URL: {diary.image_url if diary.image_url else '없음'}")
-            
-            return JsonResponse({
-                'status': 'ok',
-                'data': {
-                    'id': diary.id,
-                    'note': diary.note,
-                    'content': diary.content,
-                    'productivity': diary.productivity,
-                    'image_url': diary.image_url if diary.image_url else None,
-                    'date': diary.posted_date.strftime('%Y-%m-%d')
-                }
-            })
-        else:
-            return JsonResponse({
-                'status': 'empty',
-                'message': '해당 날짜의 일기가 없습니다.'
-            })
-            
+        target_date = parse_day(date)
+        return diary_cache.cached_json(
+            request, 'date', target_date.isoformat(),
+            lambda: _diary_by_date_payload(request.user, target_date),
+        )
     except Exception as e:
-        print(f"[API] ❌ 에러: {str(e)}")
+        api_logger.exception('diary by date failed')
         return JsonResponse({
             'status': 'error',
             'message': str(e)